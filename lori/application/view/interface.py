@@ -18,6 +18,7 @@ from typing import Optional
 import dash
 from dash import Dash, dcc, html
 from dash_bootstrap_components import themes
+from flask import Response, abort, request
 
 from lori import Configurations
 from lori.application import Application
@@ -111,6 +112,8 @@ class ViewInterface(Interface, Dash):
         self.view.register()
         self.layout = self.create_layout
 
+        self.server.add_url_rule("/cameras/<id>/stream", "camera_stream", self.stream_camera)
+
     def start(self) -> None:
         self.run(
             host=self._host,
@@ -119,6 +122,29 @@ class ViewInterface(Interface, Dash):
             debug=self._logger.getEffectiveLevel() <= logging.DEBUG,
         )
 
+    # noinspection PyShadowingBuiltins
+    def stream_camera(self, id: str) -> Response:
+        """
+        Stream the frames of a camera connector as multipart MJPEG, to be displayed e.g. by an HTML image element.
+        Frames are shared with all other subscribers of the camera and dropped, if the client receives too slowly.
+
+        """
+        connector = self.context.connectors.get(id, None)
+        if connector is None or not callable(getattr(connector, "subscribe", None)):
+            abort(404)
+
+        fps = request.args.get("fps", default=None, type=float)
+        subscription = connector.subscribe(fps)
+
+        def generate():
+            try:
+                for frame in subscription:
+                    yield b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + frame + b"\r\n"
+            finally:
+                subscription.close()
+
+        return Response(generate(), mimetype="multipart/x-mixed-replace; boundary=frame")
+
     # noinspection PyUnresolvedReferences
     def create_layout(self) -> html.Div:
         return html.Div(
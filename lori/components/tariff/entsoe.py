@@ -8,10 +8,14 @@ lori.components.tariff.entsoe
 
 from __future__ import annotations
 
+import os
+from typing import Optional
+
 import pandas as pd
 from lori import Channel, Configurations, Constant
 from lori.components.tariff import Tariff, TariffProvider, register_tariff_type
 from lori.connectors.entsoe import EntsoeConnector
+from lori.data.vintages import Vintages
 
 
 # noinspection SpellCheckingInspection
@@ -21,10 +25,17 @@ class EntsoeProvider(TariffProvider):
 
     _offset: float = 0
 
+    vintages: Optional[Vintages] = None
+
     def configure(self, configs: Configurations) -> None:
         super().configure(configs)
         self._offset = configs.get_float("offset", default=0)
 
+        # Record every received day-ahead price issue, to be able to retrieve prices as they were known at any time
+        vintages = configs.get_section("vintages", defaults={"enabled": False})
+        if vintages.get_bool("enabled"):
+            self.vintages = Vintages.from_configs(vintages, dir=os.path.join(configs.dirs.data, "vintages", self.id))
+
         entsoe_connector = EntsoeConnector(
             self,
             key="entsoe_connector",
@@ -46,6 +57,9 @@ class EntsoeProvider(TariffProvider):
         self.data.register(self._on_tariff_received, EntsoeProvider.PRICE_DAY_AHEAD, unique=False)
 
     def _on_tariff_received(self, data: pd.DataFrame) -> None:
+        if self.vintages is not None:
+            self.vintages.write(data)
+
         timestamp = data.index[0]
         import_data = data[EntsoeProvider.PRICE_DAY_AHEAD] / 10.0 + self._offset
         import_channel: Channel = self.data.get(Tariff.PRICE_IMPORT)
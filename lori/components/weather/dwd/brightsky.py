@@ -9,6 +9,7 @@ lori.connector.weather.dwd.brightsky
 from __future__ import annotations
 
 import json
+import os
 from typing import Optional, Tuple
 
 import requests
@@ -18,6 +19,7 @@ import pandas as pd
 from lori import ConfigurationException, Configurations, Resources
 from lori.components.weather import Weather
 from lori.connectors import Connector
+from lori.io.http import HttpSession
 from lori.location import Location
 from lori.typing import TimestampType
 
@@ -27,6 +29,12 @@ class Brightsky(Connector):
     address: str = "https://api.brightsky.dev/"
     horizon: int = 10
 
+    # Seconds to cache responses of forecasts, and of completed historical days
+    cache_ttl: float = 900
+    cache_ttl_historical: float = 86400
+
+    _session: HttpSession
+
     def __init__(self, context: Weather, location: Location, **kwargs) -> None:
         super().__init__(context, context.configs.get_section("brightsky", defaults={}), **kwargs)
         self.location = location
@@ -39,6 +47,16 @@ class Brightsky(Connector):
         if -1 > self.horizon > 10:
             raise ConfigurationException(f"Invalid forecast horizon: {self.horizon}")
 
+        self.cache_ttl = configs.get_float("cache_ttl", default=Brightsky.cache_ttl)
+        self.cache_ttl_historical = configs.get_float("cache_ttl_historical", default=Brightsky.cache_ttl_historical)
+
+        # Share pooled connections and cached responses with all Brightsky connectors, e.g. of several components
+        self._session = HttpSession.get_shared(
+            "brightsky",
+            cache_dir=os.path.join(configs.dirs.tmp, "http", "brightsky"),
+            timeout=configs.get_float("timeout", default=30),
+        )
+
     def read(
         self,
         resources: Resources,
@@ -99,7 +117,11 @@ class Brightsky(Connector):
             "lon": self.location.longitude,
             "tz": self.location.timezone.zone,
         }
-        response = requests.get(self.address + "weather", params=parameters)
+        if parameters["last_date"] < pd.Timestamp.now(tz=self.location.timezone).strftime("%Y-%m-%d"):
+            ttl = self.cache_ttl_historical
+        else:
+            ttl = self.cache_ttl
+        response = self._session.get(self.address + "weather", params=parameters, ttl=ttl)
 
         if response.status_code != 200:
             raise requests.HTTPError(
@@ -9,14 +9,17 @@ lori.components.weather.forecast
 from __future__ import annotations
 
 import datetime as dt
+import os
 from typing import Optional
 
 import pandas as pd
 import pytz as tz
 from lori.components import Component
 from lori.components.weather import Weather
-from lori.core import Configurations, ResourceException
+from lori.core import ConfigurationException, Configurations, ResourceException
+from lori.data.vintages import Vintages
 from lori.location import Location
+from lori.typing import TimestampType
 from lori.util import floor_date, to_date, to_timezone
 
 
@@ -27,6 +30,8 @@ class WeatherForecast(Weather):
     interval: int = 60
     offset: int = 0
 
+    vintages: Optional[Vintages] = None
+
     @classmethod
     def _assert_context(cls, context: Component):
         from lori.components.weather import WeatherProvider
@@ -41,6 +46,23 @@ class WeatherForecast(Weather):
         self.interval = configs.get_int("interval", default=WeatherForecast.interval)
         self.offset = configs.get_int("offset", default=WeatherForecast.offset)
 
+        # Record every received forecast issue, to be able to retrieve forecasts as they were known at any time
+        vintages = configs.get_section("vintages", defaults={"enabled": False})
+        if vintages.get_bool("enabled"):
+            self.vintages = Vintages.from_configs(
+                vintages,
+                dir=os.path.join(configs.dirs.data, "vintages", self.id),
+                timezone=self.location.timezone,
+            )
+
+    def activate(self) -> None:
+        super().activate()
+        if self.vintages is not None:
+            self.data.register(self._on_forecast_received, unique=False)
+
+    def _on_forecast_received(self, data: pd.DataFrame) -> None:
+        self.vintages.write(data)
+
     def localize(self, configs: Configurations) -> None:
         # Do nothing, as context was already validated as WeatherProvider, that does have a location
         pass
@@ -55,6 +77,7 @@ class WeatherForecast(Weather):
         start: Optional[pd.Timestamp, dt.datetime, str] = None,
         end: Optional[pd.Timestamp, dt.datetime, str] = None,
         timezone: Optional[tz.BaseTzInfo | str | int | float] = None,
+        as_of: Optional[TimestampType] = None,
         **kwargs,
     ) -> pd.DataFrame:
         """
@@ -76,6 +99,11 @@ class WeatherForecast(Weather):
         :type timezone:
             :class:`pytz.BaseTzInfo`, str or number
 
+        :param as_of:
+            the point in time, of which the latest issued forecast will be retrieved from the recorded vintages.
+        :type as_of:
+            :class:`pandas.Timestamp`, datetime or str
+
         :returns:
             the forecasted data, indexed in a specific time interval.
 
@@ -94,6 +122,12 @@ class WeatherForecast(Weather):
         if start is None:
             start = pd.Timestamp.now(tz=timezone)
 
+        if as_of is not None:
+            if self.vintages is None:
+                raise ConfigurationException(f"Unable to retrieve forecast as of {as_of} without vintages: {self.id}")
+            forecast = self.vintages.read(start, end, as_of=to_date(as_of, timezone=timezone))
+            return self._get_range(forecast, start, end, **kwargs)
+
         if forecast.empty or start < forecast.index[0] or end > forecast.index[-1]:
             start_schedule = floor_date(start, self.location.timezone, freq=f"{self.interval}T")
             start_schedule += pd.Timedelta(minutes=self.offset)
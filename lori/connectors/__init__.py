@@ -38,7 +38,19 @@ from ..data.databases import Databases  # noqa: F401
 
 import importlib
 
-for import_connector in ["virtual", "csv", "sql", "influx", "tables", "cameras", "modbus", "revpi", "entsoe"]:
+for import_connector in [
+    "virtual",
+    "csv",
+    "sql",
+    "influx",
+    "tables",
+    "parquet",
+    "ring",
+    "cameras",
+    "modbus",
+    "revpi",
+    "entsoe",
+]:
     try:
         importlib.import_module(f".{import_connector}", "lori.connectors")
 
@@ -5,43 +5,218 @@ lori.connectors.cameras.camera
 
 """
 
+from __future__ import annotations
+
 from abc import abstractmethod
-from time import sleep, time
-from typing import Iterable
+from threading import Condition, Event, Lock, Thread
+from time import monotonic, time
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 import pandas as pd
-from lori.connectors import ConnectionException, Connector
-from lori.core import Resources
+from lori.connectors import ConnectionException, Connector, ConnectorException
+from lori.core import Configurations, Resources
+
+
+class CameraSubscription(Iterable[bytes]):
+    """
+    Subscription to the frames broadcast by a camera connector. Only the latest frame is kept for each subscriber,
+    so slow subscribers drop frames instead of holding up the capture or any other subscriber.
+
+    """
+
+    fps: Optional[float]
+
+    dropped: int = 0
+
+    _frame: Optional[bytes] = None
+    _timestamp: float = 0
+    _closed: bool = False
+    _condition: Condition
+
+    def __init__(self, connector: CameraConnector, fps: Optional[float] = None) -> None:
+        self._connector = connector
+        self._condition = Condition()
+        self._frame = None
+        self._timestamp = 0
+        self._closed = False
+        self.dropped = 0
+        self.fps = fps
+
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            frame = self.get()
+            if frame is None:
+                return
+            yield frame
+
+    def __enter__(self) -> CameraSubscription:
+        return self
+
+    # noinspection PyShadowingBuiltins
+    def __exit__(self, type, value, traceback) -> None:
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def put(self, frame: bytes) -> None:
+        with self._condition:
+            if self.fps is not None and monotonic() - self._timestamp < 1 / self.fps:
+                return
+            if self._frame is not None:
+                self.dropped += 1
+            self._frame = frame
+            self._condition.notify_all()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        Waits for the next frame and returns it, or None if the subscription was closed or timed out.
+
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._frame is not None or self._closed, timeout=timeout)
+            if self._closed:
+                return None
+            frame = self._frame
+            self._frame = None
+            if frame is not None:
+                self._timestamp = monotonic()
+            return frame
+
+    def close(self) -> None:
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._frame = None
+            self._condition.notify_all()
+        self._connector.unsubscribe(self)
 
 
 class CameraConnector(Connector):
+    quality: int = 90
+    resolution: Optional[Tuple[int, int]] = None
+
+    fps: float = 10
+
+    _broadcast_frame: Optional[bytes] = None
+    _broadcast_timestamp: float = 0
+    _broadcast_stop: Optional[Event] = None
+
+    _capture_lock: Lock
+    _subscriptions: List[CameraSubscription]
+    _subscriptions_lock: Lock
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._capture_lock = Lock()
+        self._subscriptions = []
+        self._subscriptions_lock = Lock()
+
+    def configure(self, configs: Configurations) -> None:
+        super().configure(configs)
+
+        # Encoding of frames, applied once for all channels and subscribers
+        self.quality = configs.get_int("quality", default=CameraConnector.quality)
+        if not 0 < self.quality <= 100:
+            raise ConnectorException(self, f"Invalid JPEG quality: {self.quality}")
+
+        resolution = configs.get("resolution", default=None)
+        if resolution is not None:
+            try:
+                width, height = (int(r) for r in str(resolution).lower().split("x"))
+            except ValueError:
+                raise ConnectorException(self, f"Invalid resolution '{resolution}', expected e.g. '1280x720'")
+            self.resolution = (width, height)
+
+        # Maximum rate of frames to be broadcast to subscribers
+        self.fps = configs.get_float("fps", default=CameraConnector.fps)
+        if self.fps <= 0:
+            raise ConnectorException(self, f"Invalid frame rate: {self.fps}")
+
     def read(self, resources: Resources) -> pd.DataFrame:
         timestamp = pd.Timestamp.now(tz="UTC").floor(freq="s")
 
-        # TODO: Wrap read_frame() and cache latest frame to only read if frame is older than a second
-        data = self.read_frame()
-        return pd.DataFrame(data=[data] * len(resources), index=[timestamp], columns=list(resources.ids))
+        # Read a single frame for all channels, or reuse the latest frame broadcast to subscribers
+        data = self._broadcast_frame
+        if data is None or self._broadcast_stop is None or monotonic() - self._broadcast_timestamp > 1:
+            data = self._capture_frame()
+        return pd.DataFrame(data=[[data] * len(resources)], index=[timestamp], columns=list(resources.ids))
 
     @abstractmethod
     def read_frame(self) -> bytes: ...
 
-    def stream(self, fps: int = 30) -> Iterable[bytes]:
-        while True:
+    def _capture_frame(self) -> bytes:
+        with self._capture_lock:
+            return self.read_frame()
+
+    def subscribe(self, fps: Optional[float] = None) -> CameraSubscription:
+        """
+        Subscribe to the frames of the camera. Frames are captured and encoded only once, to be broadcast to all
+        subscribers, as long as at least one subscription is open.
+
+        :param fps:
+            the maximum rate of frames to be received by this subscriber.
+        :type fps:
+            float
+
+        :returns:
+            the subscription to iterate the received frames, which needs to be closed when not used anymore.
+        :rtype:
+            CameraSubscription
+        """
+        subscription = CameraSubscription(self, fps)
+        with self._subscriptions_lock:
+            self._subscriptions.append(subscription)
+            if self._broadcast_stop is None:
+                self._broadcast_stop = Event()
+                broadcast = Thread(
+                    name=f"{type(self).__name__}-{self.id}-broadcast",
+                    target=self._run_broadcast,
+                    args=(self._broadcast_stop,),
+                    daemon=True,
+                )
+                broadcast.start()
+        return subscription
+
+    def unsubscribe(self, subscription: CameraSubscription) -> None:
+        with self._subscriptions_lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+            if len(self._subscriptions) == 0 and self._broadcast_stop is not None:
+                self._broadcast_stop.set()
+                self._broadcast_stop = None
+                self._broadcast_frame = None
+        subscription.close()
+
+    def _run_broadcast(self, stop: Event) -> None:
+        while not stop.is_set():
+            now = time()
             try:
-                now = time()
+                if self._is_connected():
+                    frame = self._capture_frame()
+
+                    # Frames may be returned repeatedly, if the camera captures slower than broadcast
+                    if frame is not self._broadcast_frame:
+                        self._broadcast_frame = frame
+                        self._broadcast_timestamp = monotonic()
+                        with self._subscriptions_lock:
+                            subscriptions = list(self._subscriptions)
+                        for subscription in subscriptions:
+                            subscription.put(frame)
 
-                if self.is_connected():
-                    yield self.read_frame()
+            except (ConnectionException, ConnectorException) as e:
+                self._logger.warning(f"Unexpected error '{e}' while broadcasting frames of camera '{self.id}'")
+                stop.wait(1)
 
-                seconds = (1 / fps) - (time() - now)
-                if seconds > 0:
-                    sleep(seconds)
+            seconds = (1 / self.fps) - (time() - now)
+            if seconds > 0:
+                stop.wait(seconds)
 
-            except KeyboardInterrupt:
-                pass
-            except ConnectionException as e:
-                self._logger.error(f"Unexpected error '{e}' while streaming")
-                self.disconnect()
+    def stream(self, fps: Optional[float] = None) -> Iterable[bytes]:
+        with self.subscribe(fps) as subscription:
+            yield from subscription
 
     def write(self, data: pd.DataFrame) -> None:
         raise NotImplementedError("Camera connector does not support writing")
@@ -6,14 +6,55 @@ lori.connectors.cameras.opencv
 """
 
 import os
+from threading import Condition, Event, Lock, Thread
+from time import monotonic
+from typing import Optional, Tuple
 
 import cv2
 
+import numpy as np
 from lori.connectors import ConnectionException, ConnectorException, register_connector_type
 from lori.connectors.cameras import CameraConnector
 from lori.core import Configurations, Resources
 
 
+class OpenCVFrame:
+    """
+    Decoded frame of a video capture, scaled and encoded to JPEG only once, when requested first.
+
+    """
+
+    image: np.ndarray
+    timestamp: float
+
+    _buffer: Optional[bytes] = None
+    _lock: Lock
+
+    def __init__(self, image: np.ndarray, quality: int = 90, resolution: Optional[Tuple[int, int]] = None) -> None:
+        self.image = image
+        self.timestamp = monotonic()
+        self.quality = quality
+        self.resolution = resolution
+        self._buffer = None
+        self._lock = Lock()
+
+    @property
+    def age(self) -> float:
+        return monotonic() - self.timestamp
+
+    def encode(self) -> bytes:
+        with self._lock:
+            if self._buffer is None:
+                image = self.image
+                if self.resolution is not None and self.resolution != (image.shape[1], image.shape[0]):
+                    image = cv2.resize(image, self.resolution, interpolation=cv2.INTER_AREA)
+                status, buffer = cv2.imencode(".jpg", image, [int(cv2.IMWRITE_JPEG_QUALITY), self.quality])
+                if not status:
+                    raise cv2.error("Failed to encode JPEG")
+                self._buffer = buffer.tobytes()
+            return self._buffer
+
+
 @register_connector_type("opencv")
 class OpenCV(CameraConnector):
     _capture: cv2.VideoCapture
@@ -23,6 +64,14 @@ class OpenCV(CameraConnector):
     _username: str
     _password: str
 
+    _timeout: float = 3
+
+    _persistent: bool = False
+    _frame: Optional[OpenCVFrame] = None
+    _frame_condition: Condition
+    _capture_thread: Optional[Thread] = None
+    _capture_stop: Event
+
     def configure(self, configs: Configurations) -> None:
         super().configure(configs)
 
@@ -35,25 +84,44 @@ class OpenCV(CameraConnector):
         if not all([self._host, self._port, self._username, self._password]):
             raise ValueError("Camera configuration requires 'host', 'port', 'username' and 'password'")
 
+        self._timeout = configs.get_float("timeout", default=OpenCV._timeout)
+
+        # Keep the stream open and capture frames continuously in the background, instead of opening the stream
+        # for every read. Reads will return the latest captured frame immediately.
+        self._persistent = configs.get_bool("persistent", default=OpenCV._persistent)
+        self._frame = None
+        self._frame_condition = Condition()
+        self._capture_stop = Event()
+
         os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = (
             "rtsp_transport;tcp|"  # use TCP only
             "max_delay;500000"  # 0.5 sec max internal delay
         )
 
-        # TODO: Make timeouts configurable
         self._capture = cv2.VideoCapture()
         self._capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-        self._capture.set(cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, 3000)
-        self._capture.set(cv2.CAP_PROP_READ_TIMEOUT_MSEC, 3000)
+        self._capture.set(cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, int(self._timeout * 1000))
+        self._capture.set(cv2.CAP_PROP_READ_TIMEOUT_MSEC, int(self._timeout * 1000))
 
-    # def is_connected(self) -> bool:
-    #     return self._capture.isOpened()
+    def is_connected(self) -> bool:
+        if not self._persistent:
+            return super().is_connected()
+        frame = self._frame
+        return self._capture_thread is not None and frame is not None and frame.age < self._timeout
 
     def connect(self, resources: Resources) -> None:
         super().connect(resources)
         # Validate connection only to throw ConnectionException when connect is called by the manager
         self._connect()
-        self._disconnect()
+        if not self._persistent:
+            self._disconnect()
+            return
+
+        # Retrieve the first frame already, to be available as soon as the connection is established
+        self._frame = self._retrieve_frame()
+        self._capture_stop.clear()
+        self._capture_thread = Thread(name=f"{type(self).__name__}-{self.id}-capture", target=self._run, daemon=True)
+        self._capture_thread.start()
 
     def _connect(self) -> None:
         auth = f"{self._username}:{self._password}"
@@ -73,31 +141,69 @@ class OpenCV(CameraConnector):
 
     def disconnect(self) -> None:
         super().disconnect()
+        if self._capture_thread is not None:
+            self._capture_stop.set()
+            self._capture_thread.join()
+            self._capture_thread = None
+            self._frame = None
         self._disconnect()
 
     def _disconnect(self) -> None:
         self._capture.release()
         self._logger.debug("Released VideoCapture")
 
+    def _run(self) -> None:
+        while not self._capture_stop.is_set():
+            try:
+                if not self._capture.isOpened():
+                    self._connect()
+
+                # Grab frames continuously, to not let the stream buffer up stale frames
+                if not self._capture.grab():
+                    raise ConnectionException(self, "Failed to grab frame")
+
+                frame = self._retrieve_frame()
+                with self._frame_condition:
+                    self._frame = frame
+                    self._frame_condition.notify_all()
+
+            except (ConnectionException, cv2.error) as e:
+                self._logger.warning(f"Error capturing frames of camera '{self.id}': {e}")
+                self._disconnect()
+                self._capture_stop.wait(self._timeout)
+
+    def _retrieve_frame(self) -> OpenCVFrame:
+        status, image = self._capture.retrieve()
+        if not status or image is None:
+            raise ConnectionException(self, "Failed to retrieve frame")
+        return OpenCVFrame(image, quality=self.quality, resolution=self.resolution)
+
+    def _read_frame(self) -> OpenCVFrame:
+        if not self._persistent:
+            try:
+                self._connect()
+
+                status = self._capture.read()
+                if not status:
+                    raise ConnectionException(self, "Failed to grab frame")
+
+                return self._retrieve_frame()
+            finally:
+                self._disconnect()
+
+        with self._frame_condition:
+            self._frame_condition.wait_for(
+                lambda: self._frame is not None and self._frame.age < self._timeout,
+                timeout=self._timeout,
+            )
+            frame = self._frame
+        if frame is None or frame.age >= self._timeout:
+            raise ConnectionException(self, f"No frame captured for more than {self._timeout} seconds")
+        return frame
+
     def read_frame(self) -> bytes:
         try:
-            self._connect()
-
-            status = self._capture.read()
-            if not status:
-                raise ConnectionException(self, "Failed to grab frame")
-
-            status, frame = self._capture.retrieve()
-            if not status or frame is None:
-                raise ConnectionException(self, "Failed to retrieve frame")
-
-            status, buffer = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), 90])
-            if not status:
-                raise ConnectionException(self, "Failed to encode JPEG")
-
-            return buffer.tobytes()
+            return self._read_frame().encode()
 
         except cv2.error as e:
             raise ConnectorException(self, f"OpenCV error: {e}")
-        finally:
-            self._disconnect()
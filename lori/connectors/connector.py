@@ -12,7 +12,7 @@ import datetime as dt
 from abc import abstractmethod
 from collections import OrderedDict
 from functools import wraps
-from threading import Lock
+from threading import Event, Lock, Thread
 from typing import Any, Dict, Optional
 
 import pandas as pd
@@ -45,6 +45,12 @@ class Connector(_Connector, metaclass=ConnectorMeta):
     _timestamp_disconnect: pd.Timestamp = pd.NaT
     _interval_reconnect: pd.Timedelta = pd.Timedelta(minutes=1)
 
+    _healthy: bool = False
+    _timestamp_health: pd.Timestamp = pd.NaT
+    # Only connections to remote hosts are probed in the background by default, as they may be lost unnoticed
+    _interval_health: pd.Timedelta = pd.Timedelta(0)
+    _health_probe: Optional[Event] = None
+
     __resources: Resources
 
     _lock: Lock
@@ -128,6 +134,9 @@ class Connector(_Connector, metaclass=ConnectorMeta):
     def configure(self, configs: Configurations) -> None:
         super().configure(configs)
         self._connect_type = ConnectType.get(configs.get("connect", default=True))
+        self._interval_health = pd.Timedelta(
+            seconds=configs.get_float("health_ttl", default=type(self)._interval_health.total_seconds())
+        )
 
     def _is_disconnected(self) -> bool:
         return not self._is_connected()
@@ -146,11 +155,63 @@ class Connector(_Connector, metaclass=ConnectorMeta):
         return self._is_disconnected() and self._connect_type == ConnectType.AUTO
 
     def _is_connected(self) -> bool:
-        return self.is_connected() and self._connected
+        # Return the cached health state, to never probe the connection in the hot path
+        return self._connected and self._healthy
 
     def is_connected(self) -> bool:
         return True
 
+    def _set_health(self, healthy: bool) -> None:
+        self._healthy = healthy
+        self._timestamp_health = pd.Timestamp.now(tz.UTC)
+
+    def _probe_health(self) -> bool:
+        try:
+            healthy = bool(self.is_connected())
+        except Exception as e:
+            self._logger.debug(f"Failed probing connection of {type(self).__name__} '{self.id}': {str(e)}")
+            healthy = False
+        if self._healthy and not healthy:
+            self._logger.warning(f"Lost connection of {type(self).__name__} '{self.id}'")
+        self._set_health(healthy)
+        return healthy
+
+    def _start_health_probe(self) -> None:
+        self._stop_health_probe()
+        if self._interval_health <= pd.Timedelta(0):
+            return
+        stop = Event()
+        probe = Thread(
+            name=f"{type(self).__name__}-{self.id}-health",
+            target=self.__run_health_probe,
+            args=(stop,),
+            daemon=True,
+        )
+        probe.start()
+        self._health_probe = stop
+
+    def _stop_health_probe(self) -> None:
+        if self._health_probe is not None:
+            self._health_probe.set()
+            self._health_probe = None
+
+    def __run_health_probe(self, stop: Event) -> None:
+        interval = self._interval_health
+        while not stop.wait(interval.total_seconds()):
+            if not self._connected:
+                break
+            # Skip probing if the health was observed recently, e.g. by a successful read or write
+            if self._timestamp_health + interval > pd.Timestamp.now(tz.UTC):
+                continue
+            # Skip probing while the connector is in use, to not access the connection concurrently
+            if not self._lock.acquire(blocking=False):
+                continue
+            try:
+                if self._connected:
+                    self._probe_health()
+            finally:
+                self._lock.release()
+
     def connect(self, resources: Resources) -> None:
         pass
 
@@ -175,6 +236,8 @@ class Connector(_Connector, metaclass=ConnectorMeta):
                 self._logger.warning(f"{type(self).__name__} '{self.id}' already connected")
 
             self._connected = True
+            self._probe_health()
+            self._start_health_probe()
 
     def _at_connect(self, resources: Resources) -> None:
         pass
@@ -192,12 +255,15 @@ class Connector(_Connector, metaclass=ConnectorMeta):
             self._timestamp_connect = pd.NaT
             self._timestamp_disconnect = pd.Timestamp.now(tz.UTC)
 
-            if not self._is_disconnected():
+            # Release resources of aborted connections as well, that are not healthy anymore
+            if self._connected:
                 self._at_disconnect()
                 self._run_disconnect()
                 self._on_disconnect()
 
+            self._stop_health_probe()
             self._connected = False
+            self._healthy = False
 
     def _at_disconnect(self) -> None:
         pass
@@ -18,6 +18,13 @@ from lori.io import csv
 from lori.typing import TimestampType
 from lori.util import ceil_date, floor_date, parse_freq
 
+# FIXME: Remove this once Python >= 3.9 is a requirement
+try:
+    from typing import Literal
+
+except ImportError:
+    from typing_extensions import Literal
+
 
 # noinspection PyShadowingBuiltins
 @register_connector_type("csv")
@@ -25,6 +32,7 @@ class CsvDatabase(Database):
     _data: Optional[pd.DataFrame] = None
     _data_path: Optional[str] = None
     _data_dir: str
+    _index: Optional[csv.CsvIndex] = None
 
     index_column: str = "timestamp"
     index_type: str = "timestamp"
@@ -39,6 +47,12 @@ class CsvDatabase(Database):
     decimal: str = "."
     separator: str = ","
 
+    engine: Optional[str] = None
+    workers: int = 1
+
+    archive: Optional[str] = None
+    _archived: Optional[pd.Timestamp] = None
+
     columns: Mapping[str, str] = {}
     pretty: bool = False
 
@@ -99,6 +113,29 @@ class CsvDatabase(Database):
         self.decimal = configs.get("decimal", CsvDatabase.decimal)
         self.separator = configs.get("separator", CsvDatabase.separator)
 
+        # Files may be parsed with the multithreaded pyarrow engine, and several files in parallel by workers
+        self.engine = configs.get("engine", default=CsvDatabase.engine)
+        if self.engine is not None:
+            self.engine = self.engine.lower()
+            if self.engine not in ["c", "python", "pyarrow"]:
+                raise ConfigurationException(f"Unknown CSV parser engine: {self.engine}")
+        self.workers = configs.get_int("workers", default=max(int((os.cpu_count() or 1) / 2), 1))
+
+        # Files of closed periods may be compressed with gzip or zstd, or converted to parquet
+        self.archive = configs.get("archive", default=CsvDatabase.archive)
+        if self.archive is not None:
+            self.archive = self.archive.lower()
+            if self.archive not in csv.ARCHIVE_SUFFIXES:
+                raise ConfigurationException(f"Unknown CSV archive format: {self.archive}")
+            if self._data_path is not None:
+                raise ConfigurationException("Unable to archive single CSV file")
+            if self.archive == "zstd":
+                try:
+                    import zstandard  # noqa: F401
+
+                except ImportError:
+                    raise ConfigurationException("Unable to archive CSV files with zstd, 'zstandard' is not installed")
+
         self.pretty = configs.get_bool("pretty", default=False)
         self.columns = configs.get("columns", default=CsvDatabase.columns)
 
@@ -127,16 +164,36 @@ class CsvDatabase(Database):
                     separator=self.separator,
                     decimal=self.decimal,
                     rename=self._build_columns(resources),
+                    engine=self.engine,
                 )
+            else:
+                self._index = csv.CsvIndex(self._data_dir, self.freq, self.format, self.timezone)
+                self._index.refresh()
         except IOError as e:
             raise ConnectionException(self, str(e))
 
     def disconnect(self) -> None:
         self._data = None
+        self._index = None
+        self._archived = None
 
     def is_connected(self) -> bool:
         return True
 
+    def _read_file(self, file: csv.CsvFile, resources: Resources) -> pd.DataFrame:
+        data = csv.read_file(
+            file.path,
+            index_column=self.index_column,
+            index_type=self.index_type,
+            timezone=self.timezone,
+            separator=self.separator,
+            decimal=self.decimal,
+            rename=self._build_columns(resources),
+            engine=self.engine,
+        )
+        file.update(data.index)
+        return data
+
     def read(
         self,
         resources: Resources,
@@ -150,23 +207,29 @@ class CsvDatabase(Database):
                 e = ceil_date(n, timezone=self.timezone, freq=self.freq)
             return s, e
 
+        is_live = self.index_type in ["timestamp", "unix"] and all(pd.isna(d) for d in [start, end])
         try:
             if self._data is not None:
                 data = self._data
             else:
-                data = csv.read_files(
-                    self._data_dir,
-                    self.freq,
-                    self.format,
-                    *_infer_dates(),
-                    index_column=self.index_column,
-                    index_type=self.index_type,
-                    timezone=self.timezone,
-                    separator=self.separator,
-                    decimal=self.decimal,
-                )
-
-            if self.index_type in ["timestamp", "unix"] and all(pd.isna(d) for d in [start, end]):
+                data = self._read_live(*_infer_dates()) if is_live else None
+                if data is None:
+                    data = csv.read_files(
+                        self._data_dir,
+                        self.freq,
+                        self.format,
+                        *_infer_dates(),
+                        index_column=self.index_column,
+                        index_type=self.index_type,
+                        timezone=self.timezone,
+                        separator=self.separator,
+                        decimal=self.decimal,
+                        engine=self.engine,
+                        index=self._index,
+                        workers=self.workers,
+                    )
+
+            if is_live and not data.empty:
                 now = pd.Timestamp.now(tz=self.timezone)
                 index = data.index.tz_convert(self.timezone).get_indexer([now], method="nearest")
                 data = data.iloc[[index[-1]], :]
@@ -186,29 +249,38 @@ class CsvDatabase(Database):
         except IOError as e:
             raise ConnectionException(self, str(e))
 
+    def _read_live(self, start: pd.Timestamp, end: pd.Timestamp) -> Optional[pd.DataFrame]:
+        files = self._index.select(start, end)
+        if len(files) == 0:
+            return pd.DataFrame()
+
+        data = self._read_tail(files[-1])
+        if data.empty or data.index[-1] > pd.Timestamp.now(tz=self.timezone):
+            # The nearest value to now may not be the last one, e.g. for forecasts
+            return None
+        return data
+
+    def _read_tail(self, file: csv.CsvFile, resources: Optional[Resources] = None) -> pd.DataFrame:
+        return csv.read_tail(
+            file.path,
+            index_column=self.index_column,
+            index_type=self.index_type,
+            timezone=self.timezone,
+            separator=self.separator,
+            decimal=self.decimal,
+            rename=self._build_columns(resources) if resources is not None else None,
+        )
+
     # noinspection PyTypeChecker
     def read_first(self, resources: Resources) -> Optional[pd.DataFrame]:
         try:
             if self._data is not None:
                 data = self._data
             else:
-                files = csv.get_files(
-                    self._data_dir,
-                    self.freq,
-                    self.format,
-                    timezone=self.timezone,
-                )
+                files = self._index.refresh()
                 if len(files) == 0:
                     return None
-                data = csv.read_file(
-                    files[0],
-                    index_column=self.index_column,
-                    index_type=self.index_type,
-                    timezone=self.timezone,
-                    separator=self.separator,
-                    decimal=self.decimal,
-                    rename=self._build_columns(resources),
-                )
+                data = self._read_file(files[0], resources)
             if data is None or data.empty:
                 return None
 
@@ -233,23 +305,10 @@ class CsvDatabase(Database):
             if self._data is not None:
                 data = self._data
             else:
-                files = csv.get_files(
-                    self._data_dir,
-                    self.freq,
-                    self.format,
-                    timezone=self.timezone,
-                )
+                files = self._index.refresh()
                 if len(files) == 0:
                     return None
-                data = csv.read_file(
-                    files[-1],
-                    index_column=self.index_column,
-                    index_type=self.index_type,
-                    timezone=self.timezone,
-                    separator=self.separator,
-                    decimal=self.decimal,
-                    rename=self._build_columns(resources),
-                )
+                data = self._read_tail(files[-1], resources)
             if data is None or data.empty:
                 return None
 
@@ -268,6 +327,66 @@ class CsvDatabase(Database):
         except IOError as e:
             raise ConnectionException(self, str(e))
 
+    def read_first_index(self, resources: Resources) -> Optional[pd.Timestamp]:
+        if self.index_type not in ["timestamp", "unix"]:
+            return super().read_first_index(resources)
+        return self._read_boundary_index(resources, "first")
+
+    def read_last_index(self, resources: Resources) -> Optional[pd.Timestamp]:
+        if self.index_type not in ["timestamp", "unix"]:
+            return super().read_last_index(resources)
+        return self._read_boundary_index(resources, "last")
+
+    # noinspection PyTypeChecker
+    def _read_boundary_index(self, resources: Resources, mode: Literal["first", "last"]) -> Optional[pd.Timestamp]:
+        if mode not in ["first", "last"]:
+            raise ValueError(f"Invalid mode '{mode}'")
+
+        def _get_boundary(i: pd.Index) -> Optional[pd.Timestamp]:
+            if len(i) == 0:
+                return None
+            return i.min() if mode == "first" else i.max()
+
+        columns = self._build_columns(resources)
+        try:
+            if self._data is not None:
+                data = self._data[[c for c in columns.values() if c in self._data.columns]]
+                return _get_boundary(data.dropna(axis="index", how="all").index)
+
+            files = self._index.refresh()
+            if mode == "last":
+                files = list(reversed(files))
+            for file in files:
+                if file.columns is None:
+                    file.columns = tuple(csv.read_columns(file.path, separator=self.separator))
+                file_columns = [columns[r.id] for r in resources if columns[r.id] in file.columns]
+                if len(file_columns) == 0:
+                    # Resources may have been added or removed over time, so skip files without any of them
+                    continue
+
+                # Only parse the index of rows with valid values of the resources
+                kwargs = {
+                    "index_column": self.index_column,
+                    "index_type": self.index_type,
+                    "timezone": self.timezone,
+                    "separator": self.separator,
+                    "columns": file_columns,
+                }
+                if mode == "first":
+                    index = csv.read_index(file.path, rows=1, **kwargs)
+                else:
+                    index = self._read_tail(file)[file_columns].dropna(axis="index", how="all").index
+                    if len(index) == 0:
+                        index = csv.read_index(file.path, **kwargs)
+
+                boundary = _get_boundary(index)
+                if boundary is not None:
+                    return boundary
+            return None
+
+        except IOError as e:
+            raise ConnectionException(self, str(e))
+
     def write(self, data: pd.DataFrame) -> None:
         columns = self._build_columns(self.resources)
         kwargs = {
@@ -287,3 +406,30 @@ class CsvDatabase(Database):
         else:
             csv_file = os.path.join(self._data_dir, data.index[0].strftime(self.format) + ".csv")
             csv.write_file(data, csv_file, **kwargs)
+
+        if self.archive is not None:
+            # Archive closed periods once the current period rolled over
+            period = floor_date(pd.Timestamp.now(tz=self.timezone), timezone=self.timezone, freq=self.freq)
+            if self._archived is None or self._archived < period:
+                self._archive()
+                self._archived = period
+
+    def compact(self) -> None:
+        if self.archive is not None and self._index is not None:
+            self._archive()
+
+    def _archive(self) -> None:
+        try:
+            archives = csv.archive_files(
+                self._index,
+                self.archive,
+                index_column=self.index_column,
+                index_type=self.index_type,
+                separator=self.separator,
+                decimal=self.decimal,
+            )
+            for archive in archives:
+                self._logger.debug(f"Archived CSV file: {archive}")
+
+        except IOError as e:
+            raise ConnectionException(self, str(e))
@@ -8,6 +8,7 @@ lori.connectors.entsoe
 
 from __future__ import annotations
 
+import os
 from typing import Optional
 
 # TODO: Add to requirements
@@ -20,6 +21,7 @@ import pandas as pd
 import pytz as tz
 from lori.connectors import ConnectionException, Connector, ConnectorException
 from lori.core import ConfigurationException, Configurations, Resources
+from lori.io.http import HttpSession
 from lori.typing import TimestampType
 from lori.util import parse_freq
 
@@ -42,6 +44,7 @@ class EntsoeConnector(Connector):
     _api_key: str
 
     _client: Optional[EntsoePandasClient] = None
+    _session: HttpSession
 
     def configure(self, configs: Configurations) -> None:
         super().configure(configs)
@@ -51,6 +54,15 @@ class EntsoeConnector(Connector):
         if self._api_key is None:
             raise ConfigurationException("Missing security token")
 
+        # Share pooled connections and cached responses with all ENTSO-E connectors. Day-ahead prices are
+        # published once a day, so identical queries of several components are answered from the cache.
+        self._session = HttpSession.get_shared(
+            "entsoe",
+            cache_dir=os.path.join(configs.dirs.tmp, "http", "entsoe"),
+            ttl=configs.get_float("cache_ttl", default=3600),
+            timeout=configs.get_float("timeout", default=30),
+        )
+
     # noinspection PyTypeChecker
     def _validate_resolution(self, resolution: str) -> Literal["60min", "30min", "15min"]:
         resolution = parse_freq(resolution)
@@ -67,7 +79,7 @@ class EntsoeConnector(Connector):
         return country_code
 
     def connect(self, resources: Resources) -> None:
-        self._client = EntsoePandasClient(api_key=self._api_key)
+        self._client = EntsoePandasClient(api_key=self._api_key, session=self._session)
 
     def disconnect(self) -> None:
         if self._client is not None:
@@ -9,19 +9,25 @@ lori.connectors.influx
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
-from influxdb_client import BucketRetentionRules, InfluxDBClient
+from influxdb_client import BucketRetentionRules, Dialect, InfluxDBClient, WriteApi, WriteOptions, WritePrecision
 from influxdb_client.client.exceptions import InfluxDBError
-from influxdb_client.client.write_api import SYNCHRONOUS
+from influxdb_client.client.write.retry import WritesRetry
+from influxdb_client.client.write_api import WriteType
 from influxdb_client.rest import ApiException
+from influxdb_client.service.write_service import WriteService
 from urllib3.exceptions import HTTPError, NewConnectionError
 
+import numpy as np
 import pandas as pd
+import pytz as tz
 from lori.connectors import ConnectionException, Database, DatabaseException, register_connector_type
 from lori.core import ConfigurationException, Configurations, Resource, Resources
 from lori.data.util import hash_value
 from lori.typing import TimestampType
+from lori.util import parse_freq, to_timedelta
 
 # FIXME: Remove this once Python >= 3.9 is a requirement
 try:
@@ -30,6 +36,62 @@ try:
 except ImportError:
     from typing_extensions import Literal
 
+# Only the datatype annotation is necessary to parse the raw CSV stream of query results
+_CSV_DIALECT = Dialect(header=True, delimiter=",", annotations=["datatype"], comment_prefix="#")
+
+
+_HASH_IMPORTS = """
+        import "types"
+        import "array"
+        import "strings"
+        import "math"
+        import "contrib/qxip/hash"
+"""
+
+# Format floats like "%.10g", to generate the same hashes as lori.data.util.hash_data
+_HASH_FUNCTIONS = """
+        formatFloat = (v) => {
+            a = math.abs(x: v)
+            b = if a == 0.0 then 1.0 else a
+            e0 = int(v: math.floor(x: math.log10(x: b)))
+            m0 = math.round(x: b / math.pow10(n: e0 - 9))
+            e1 = if m0 >= 10000000000.0 then e0 + 1 else if m0 < 1000000000.0 then e0 - 1 else e0
+            m1 = if e1 == e0 then m0 else math.round(x: b / math.pow10(n: e1 - 9))
+            e = if m1 >= 10000000000.0 then e1 + 1 else e1
+            m = if m1 >= 10000000000.0 then math.round(x: b / math.pow10(n: e - 9)) else m1
+            digits = string(v: int(v: m))
+            sign = if v < 0.0 then "-" else ""
+            exponent = if e < 0 then 0 - e else e
+            mantissa = strings.trimRight(v: strings.substring(v: digits, start: 1, end: 10), cutset: "0")
+            fraction = strings.trimRight(
+                v: strings.substring(v: digits, start: if e >= 0 and e < 9 then e + 1 else 9, end: 10),
+                cutset: "0",
+            )
+            return if a == 0.0 then
+                    "0"
+                else if e < -4 or e >= 10 then
+                    sign + strings.substring(v: digits, start: 0, end: 1)
+                        + (if mantissa != "" then "." + mantissa else "")
+                        + "e" + (if e < 0 then "-" else "+")
+                        + (if exponent < 10 then "0" else "") + string(v: exponent)
+                else if e >= 0 then
+                    sign + strings.substring(v: digits, start: 0, end: e + 1)
+                        + (if e < 9 and fraction != "" then "." + fraction else "")
+                else
+                    sign + "0." + strings.repeat(v: "0", i: 0 - e - 1) + strings.trimRight(v: digits, cutset: "0")
+        }
+
+        formatValue = (n) =>
+            if not exists n then
+                ""
+            else if types.isType(v: n, type: "float") then
+                "," + formatFloat(v: float(v: n))
+            else if types.isType(v: n, type: "bool") then
+                "," + (if string(v: n) == "true" then "True" else "False")
+            else
+                "," + string(v: n)
+"""
+
 
 @register_connector_type("influx", "influxdb")
 class InfluxDatabase(Database):
@@ -44,7 +106,24 @@ class InfluxDatabase(Database):
     ssl_verify: bool
     timeout: int
 
+    query_groups: Optional[int] = None
+    query_workers: int = 1
+
+    gzip: bool
+    batching: bool
+    batch_size: int
+    flush_interval: float
+    jitter_interval: float
+    retry_interval: float
+    max_retries: int
+    max_retry_time: float
+
+    _interval_health: pd.Timedelta = pd.Timedelta(seconds=30)
+
     _client: Optional[InfluxDBClient] = None
+    _write_service: Optional[WriteService] = None
+    _write_api: Optional[WriteApi] = None
+    _write_error: Optional[Exception] = None
 
     # noinspection PyShadowingBuiltins
     def _get_vars(self) -> Dict[str, Any]:
@@ -85,22 +164,32 @@ class InfluxDatabase(Database):
         self.ssl = configs.get_bool("ssl", default=False)
         self.ssl_verify = configs.get_bool("ssl_verify", default=True)
 
+        # Maximum number of (measurement, tag) groups per query, to fan out very large requests in parallel
+        self.query_groups = configs.get_int("query_groups", default=None)
+        self.query_workers = configs.get_int("query_workers", default=1)
+
+        # Optionally compress requests and responses, which only pays off for constrained links.
+        # Line protocol will be written in batches of a maximum number of lines.
+        # Batching writes will be done in the background and flushed at least every flush interval (in seconds).
+        self.gzip = configs.get_bool("gzip", default=False)
+        self.batching = configs.get_bool("batching", default=False)
+        self.batch_size = configs.get_int("batch_size", default=5000)
+        self.flush_interval = configs.get_float("flush_interval", default=1)
+
+        # Failed writes will be retried with an exponential delay (in seconds) and a random jitter.
+        # Synchronous writes block the connector while retrying, so stop retrying after a maximum time (in seconds).
+        self.jitter_interval = configs.get_float("jitter_interval", default=1)
+        self.retry_interval = configs.get_float("retry_interval", default=5)
+        self.max_retries = configs.get_int("max_retries", default=3)
+        self.max_retry_time = configs.get_float("max_retry_time", default=10)
+
     def connect(self, resources: Resources) -> None:
         self._logger.debug(f"Connecting to InfluxDB ({self.host}:{self.port}) at {self.bucket}")
 
-        ssl = {
-            "verify_ssl": self.ssl_verify,
-        }
-        url = f"{'https' if self.ssl else 'http'}://{self.host}:{self.port}"
-
-        self._client = InfluxDBClient(
-            url=url,
-            org=self.org,
-            token=self.token,
-            timeout=self.timeout,
-            debug=self._logger.getEffectiveLevel() <= logging.DEBUG,
-            **ssl,
-        )
+        self._client = self._build_client()
+        self._write_service = None
+        self._write_api = None
+        self._write_error = None
 
         # Check if bucket exists and create
         buckets_api = self._client.buckets_api()
@@ -115,11 +204,32 @@ class InfluxDatabase(Database):
             self._raise(e)
 
     def disconnect(self) -> None:
-        # TODO: Check if "and ping" is necessary
-        if self._client is not None and self._client.ping():
+        if self._write_api is not None:
+            # Flush all pending batches
+            self._write_api.close()
+            self._write_api = None
+        self._write_service = None
+
+        if self._client is not None:
             self._client.close()
             self._client = None
 
+    def _build_client(self) -> InfluxDBClient:
+        ssl = {
+            "verify_ssl": self.ssl_verify,
+        }
+        url = f"{'https' if self.ssl else 'http'}://{self.host}:{self.port}"
+
+        return InfluxDBClient(
+            url=url,
+            org=self.org,
+            token=self.token,
+            timeout=self.timeout,
+            debug=self._logger.getEffectiveLevel() <= logging.DEBUG,
+            enable_gzip=self.gzip,
+            **ssl,
+        )
+
     def hash(
         self,
         resources: Resources,
@@ -130,91 +240,140 @@ class InfluxDatabase(Database):
     ) -> Optional[str]:
         if method.lower() not in ["md5", "sha1", "sha256"]:
             raise ValueError(f"Invalid checksum method '{method}'")
-        hashes = []
 
-        imports = """
-        import "types" // = [string, bytes, int, uint, !(float), bool, time, duration, regexp]
-        import "array"
-        import "strings"
-        import "math"
-        import "contrib/qxip/hash"
-        """
+        def _query_hashes(groups: List[Tuple[int, str, Optional[str], Resources]]) -> pd.DataFrame:
+            # Hash every (measurement, tag) group in a separate stream and union them to a single result.
+            # Rows are joined as an array instead of reducing them, as concatenating every row grows quadratically.
+            streams = []
+            for index, measurement, tag, tagged_resources in groups:
+                streams.append(
+                    f"""
+                rows_{index} = {self._build_hash_rows(measurement, tag, tagged_resources, start, end)}
+                    |> group()
+                    |> sort(columns: ["_time"])
+                    |> findColumn(fn: (key) => true, column: "row")
+
+                hash_{index} = array.from(rows: [{{
+                        index: {index},
+                        rows: length(arr: rows_{index}),
+                        hash: hash.{method.lower()}(v: strings.joinStr(arr: rows_{index}, v: ","))
+                    }}])
+                    |> filter(fn: (r) => r.rows > 0)
+                """
+                )
+            query = f"""
+                {_HASH_IMPORTS}
 
-        # functions = f"""
-        # roundDigits = (n, dig) =>
-        #     string(v: math.round(x: float(v: n)
-        #     * float(v: math.pow10(n: dig)))
-        #     / float(v: math.pow10(n: dig)))
-        #
-        # formatValue = (n, dig) =>
-        #     if exists n then
-        #         if types.isType(v: n, type: "float") then
-        #             roundDigits(n: n, dig: dig) + ","
-        #             // if strings.containsStr(substr: ".", v: roundDigits(n: n, dig: dig)) then
-        #             //     roundDigits(n: n, dig: dig) + ","
-        #             // else
-        #             //     roundDigits(n: n, dig: dig) + ".000" + ","
-        #         else
-        #             string(v: n) + ","
-        #     else
-        #         ""
-        # """
-        functions = """
-        formatValue = (n) =>
-            if exists n then
-                string(v: n) + ","
-            else
-                ""
-        """
+                {_HASH_FUNCTIONS}
 
-        query_api = self._client.query_api()
-        for measurement, measurement_resources in resources.groupby(lambda r: r.get("measurement", default=r.group)):
-            for tag, tagged_resources in measurement_resources.groupby("tag"):
-                # decimals = 3
-                # concat = "            + ".join(
-                #     f"formatValue(n: r.{_get_field(r)}, dig: {r.get('decimals', default=decimals)})"
-                #     for r in tagged_resources
-                # )
-                concat = " + ".join(f"formatValue(n: r.{_get_field(r)})" for r in tagged_resources)
+                {"".join(streams)}
 
-                query = f"""
-                {imports}
+                union(tables: [{", ".join(f"hash_{g[0]}" for g in groups)}])
+                    |> group()
+            """
+            return self._query_csv(query, ["index", "hash"])
 
-                {functions}
+        groups = [(i, *g) for i, g in enumerate(self._groupby(resources))]
+        hashes = self._query_groups(_query_hashes, groups)
+        if hashes.empty:
+            return None
 
-                {self._build_query(tagged_resources, measurement, tag, *_to_isoformat(start, end))}
-                    |> pivot(rowKey:["_time"], columnKey: ["_field"], valueColumn: "_value")
+        hashes = hashes.drop_duplicates(subset=["index"], keep="first").sort_values("index")["hash"].to_list()
+        if len(hashes) == 1:
+            return hashes[0]
+        else:
+            return hash_value(",".join(hashes), method, encoding)
+
+    def hash_buckets(
+        self,
+        resources: Resources,
+        start: Optional[TimestampType] = None,
+        end: Optional[TimestampType] = None,
+        freq: str = "h",
+        method: Literal["MD5", "SHA1", "SHA256", "SHA512"] = "MD5",
+        encoding: str = "UTF-8",
+    ) -> Optional[pd.Series]:
+        if method.lower() not in ["md5", "sha1", "sha256"]:
+            raise ValueError(f"Invalid checksum method '{method}'")
+
+        bucket_freq = to_timedelta(parse_freq(freq))
+        if not isinstance(bucket_freq, pd.Timedelta):
+            raise ValueError(f"Invalid hash bucket frequency of variable length: {freq}")
+        bucket_seconds = int(bucket_freq.total_seconds())
+
+        def _query_hashes(groups: List[Tuple[int, str, Optional[str], Resources]]) -> pd.DataFrame:
+            # Buckets are floored to the unix epoch, instead of windows starting with the queried range.
+            # Rows will only be concatenated per bucket, which keeps the string and server memory bounded.
+            streams = []
+            for index, measurement, tag, tagged_resources in groups:
+                streams.append(
+                    f"""
+                hash_{index} = {self._build_hash_rows(measurement, tag, tagged_resources, start, end)}
                     |> map(fn: (r) => ({{
                         r with
-                        row_strings: string(v: int(v: r._time) / 1000000000) + ","
-                            + {concat}
+                        bucket: int(v: r._time) / 1000000000 / {bucket_seconds} * {bucket_seconds}
                         }}))
-                    |> reduce(identity: {{column_string: ""}},
+                    |> group(columns: ["bucket"])
+                    |> sort(columns: ["_time"])
+                    |> reduce(identity: {{rows: ""}},
                         fn: (r, accumulator) => ({{
-                            column_string: accumulator.column_string + r.row_strings
+                            rows: if accumulator.rows == "" then r.row else accumulator.rows + "," + r.row
                         }}))
                     |> map(fn: (r) => ({{
-                        r with
-                        hash: hash.{method.lower()}(v: r.column_string)
-                        // hash: strings.substring(v: r.column_string, start: 0, end: 300)
+                        bucket: r.bucket,
+                        hash: hash.{method.lower()}(v: r.rows),
+                        index: {index}
                         }}))
-                    |> keep(columns: ["hash"])
                 """
-                try:
-                    result = query_api.query_data_frame(query)
-                    if result.empty:
-                        continue
-                    hashes.append(result["hash"].iloc[0])
+                )
+            query = f"""
+                {_HASH_IMPORTS}
 
-                except (ApiException, InfluxDBError, HTTPError) as e:
-                    self._raise(e)
+                {_HASH_FUNCTIONS}
+
+                {"".join(streams)}
 
-        if len(hashes) == 0:
+                union(tables: [{", ".join(f"hash_{g[0]}" for g in groups)}])
+                    |> group()
+            """
+            return self._query_csv(query, ["index", "bucket", "hash"])
+
+        groups = [(i, *g) for i, g in enumerate(self._groupby(resources))]
+        hashes = self._query_groups(_query_hashes, groups)
+        if hashes is None or hashes.empty:
             return None
-        elif len(hashes) == 1:
-            return hashes[0]
-        else:
-            return hash_value(",".join(hashes), method, encoding)
+
+        # Combine the bucket hashes of several groups on the client, in order of the groups
+        def _combine(bucket: pd.DataFrame) -> str:
+            bucket_hashes = bucket.sort_values("index")["hash"].to_list()
+            if len(bucket_hashes) == 1:
+                return bucket_hashes[0]
+            return hash_value(",".join(bucket_hashes), method, encoding)
+
+        hashes = pd.Series(
+            {pd.Timestamp(int(b), unit="s", tz=tz.UTC): _combine(h) for b, h in hashes.groupby("bucket")},
+            name="hash",
+            dtype=object,
+        )
+        hashes.index.name = "timestamp"
+        return hashes.sort_index()
+
+    def _build_hash_rows(
+        self,
+        measurement: str,
+        tag: Optional[str],
+        resources: Resources,
+        start: Optional[TimestampType] = None,
+        end: Optional[TimestampType] = None,
+    ) -> str:
+        # Format every row the way lori.data.util.hash_data does, as unix seconds and values, skipping missing ones
+        concat = " + ".join(f"formatValue(n: r.{_get_field(r)})" for r in resources)
+        return f"""{self._build_query([(measurement, tag, resources)], start, end)}
+                    |> pivot(rowKey:["_time"], columnKey: ["_field"], valueColumn: "_value")
+                    |> map(fn: (r) => ({{
+                        r with
+                        row: string(v: int(v: r._time) / 1000000000) + {concat}
+                        }}))"""
 
     def exists(
         self,
@@ -222,23 +381,20 @@ class InfluxDatabase(Database):
         start: Optional[TimestampType] = None,
         end: Optional[TimestampType] = None,
     ) -> bool:
-        query_api = self._client.query_api()
-        for measurement, measurement_resources in resources.groupby(lambda r: r.get("measurement", default=r.group)):
-            for tag, tagged_resources in measurement_resources.groupby("tag"):
-                fields = [_get_field(r) for r in tagged_resources]
-                query = f"""
-                {self._build_query(tagged_resources, measurement, tag, *_to_isoformat(start, end))}
-                    |> keep(columns: ["_field"])
-                    |> distinct(column: "_field")
-                """
-                try:
-                    data = query_api.query_data_frame(query, data_frame_index=["_time"])
-                    if sorted(data["_fields"]) != sorted(fields):
-                        return False
+        def _query_series(groups: List[Tuple[str, Optional[str], Resources]]) -> pd.DataFrame:
+            query = f"""
+                {self._build_query(groups, start, end)}
+                    |> first()
+                    |> keep(columns: ["_measurement", "tag", "_field"])
+            """
+            return self._query_csv(query, ["_measurement", "tag", "_field"])
 
-                except (ApiException, InfluxDBError, HTTPError) as e:
-                    self._raise(e)
-        return True
+        groups = self._groupby(resources)
+        series = self._query_groups(_query_series, groups)
+        if series.empty:
+            return False
+        series_ids = set(_to_ids(series, groups).dropna())
+        return all(r.id in series_ids for r in resources)
 
     # noinspection PyUnresolvedReferences, PyTypeChecker
     def read(
@@ -259,40 +415,51 @@ class InfluxDatabase(Database):
         last = self._read_boundaries(resources, "last")
         return last
 
-    # noinspection PyUnresolvedReferences, PyTypeChecker
-    def _read_boundaries(self, resources: Resources, mode: Literal["first", "last"]) -> pd.DataFrame:
+    def read_first_index(self, resources: Resources) -> Optional[pd.Timestamp]:
+        indexes = self._read_boundary_indexes(resources, "first")
+        if len(indexes) == 0:
+            return None
+        return min(indexes)
+
+    def read_last_index(self, resources: Resources) -> Optional[pd.Timestamp]:
+        indexes = self._read_boundary_indexes(resources, "last")
+        if len(indexes) == 0:
+            return None
+        return max(indexes)
+
+    def _read_boundary_indexes(self, resources: Resources, mode: Literal["first", "last"]) -> List[pd.Timestamp]:
         if mode not in ["first", "last"]:
             raise ValueError(f"Invalid mode '{mode}'")
-        results = []
 
-        query_api = self._client.query_api()
-        for measurement, measurement_resources in resources.groupby(lambda r: r.get("measurement", default=r.group)):
-            for tag, tagged_resources in measurement_resources.groupby("tag"):
-                query = f"""
-                {self._build_query(tagged_resources, measurement, tag, *_to_isoformat(None, None))}
-                    |> group(columns: ["_field"])
+        def _query_indexes(groups: List[Tuple[str, Optional[str], Resources]]) -> pd.DataFrame:
+            # Series are sorted by time, so select only the boundary timestamp of every field
+            query = f"""
+                {self._build_query(groups)}
                     |> {mode}(column: "_time")
-                    |> pivot(rowKey:["_time"], columnKey: ["_field"], valueColumn: "_value")
-                """
-                try:
-                    data = query_api.query_data_frame(query, data_frame_index=["_time"])
-                    if not data.empty:
-                        results.append(
-                            data.rename(
-                                columns={_get_field(r): r.id for r in tagged_resources},
-                            )
-                        )
+                    |> keep(columns: ["_time"])
+            """
+            return self._query_csv(query, ["_time"])
 
-                except (ApiException, InfluxDBError, HTTPError) as e:
-                    self._raise(e)
+        indexes = self._query_groups(_query_indexes, self._groupby(resources))
+        if indexes.empty:
+            return []
+        return [pd.Timestamp(i) for i in indexes["_time"]]
 
-        if len(results) == 0:
-            return pd.DataFrame(columns=[r.id for r in resources])
+    # noinspection PyUnresolvedReferences, PyTypeChecker
+    def _read_boundaries(self, resources: Resources, mode: Literal["first", "last"]) -> pd.DataFrame:
+        if mode not in ["first", "last"]:
+            raise ValueError(f"Invalid mode '{mode}'")
 
-        results = pd.concat(results, axis="columns")
-        results.sort_index(inplace=True)
-        results = results.loc[:, [r.id for r in resources if r.id in results.columns]]
-        return results
+        def _query_boundaries(groups: List[Tuple[str, Optional[str], Resources]]) -> pd.DataFrame:
+            query = f"""
+                {self._build_query(groups)}
+                    |> {mode}(column: "_time")
+                    |> keep(columns: ["_time", "_measurement", "tag", "_field", "_value"])
+            """
+            return self._query_csv(query, ["_time", "_measurement", "tag", "_field", "_value"])
+
+        groups = self._groupby(resources)
+        return self._pivot(resources, groups, self._query_groups(_query_boundaries, groups))
 
     # noinspection PyUnresolvedReferences, PyTypeChecker
     def _read(
@@ -301,63 +468,148 @@ class InfluxDatabase(Database):
         start: Optional[TimestampType] = None,
         end: Optional[TimestampType] = None,
     ) -> pd.DataFrame:
-        results = []
-
-        query_api = self._client.query_api()
-        for measurement, measurement_resources in resources.groupby(lambda r: r.get("measurement", default=r.group)):
-            for tag, tagged_resources in measurement_resources.groupby("tag"):
-                query = f"""
-                    {self._build_query(tagged_resources, measurement, tag, *_to_isoformat(start, end))}
-                    |> pivot(rowKey:["_time"], columnKey: ["_field"], valueColumn: "_value")
-                """
-                try:
-                    data = query_api.query_data_frame(query, data_frame_index=["_time"])
-
-                    if not data.empty:
-                        results.append(
-                            data.rename(
-                                columns={_get_field(r): r.id for r in tagged_resources},
-                            )
-                        )
+        def _query_values(groups: List[Tuple[str, Optional[str], Resources]]) -> pd.DataFrame:
+            query = f"""
+                {self._build_query(groups, start, end)}
+                    |> keep(columns: ["_time", "_measurement", "tag", "_field", "_value"])
+            """
+            return self._query_csv(query, ["_time", "_measurement", "tag", "_field", "_value"])
 
-                except (ApiException, InfluxDBError, HTTPError) as e:
-                    self._raise(e)
+        groups = self._groupby(resources)
+        return self._pivot(resources, groups, self._query_groups(_query_values, groups))
 
-        if len(results) == 0:
+    # noinspection PyMethodMayBeStatic
+    def _pivot(
+        self,
+        resources: Resources,
+        groups: List[Tuple[str, Optional[str], Resources]],
+        data: pd.DataFrame,
+    ) -> pd.DataFrame:
+        if data.empty:
             return pd.DataFrame(columns=[r.id for r in resources])
 
-        results = pd.concat(results, axis="columns")
+        data["_id"] = _to_ids(data, groups)
+        data = data.dropna(subset=["_id"]).drop_duplicates(subset=["_time", "_id"], keep="last")
+        results = data.pivot(index="_time", columns="_id", values="_value").infer_objects()
+        results.columns.name = None
         results.sort_index(inplace=True)
         results = results.loc[:, [r.id for r in resources if r.id in results.columns]]
         return results
 
+    def _groupby(self, resources: Resources) -> List[Tuple[str, Optional[str], Resources]]:
+        groups = []
+        for measurement, measurement_resources in resources.groupby(lambda r: r.get("measurement", default=r.group)):
+            for tag, tagged_resources in measurement_resources.groupby("tag"):
+                groups.append((measurement, tag, tagged_resources))
+        return groups
+
+    def _query_groups(self, query: Callable[[List[Any]], pd.DataFrame], groups: List[Any]) -> pd.DataFrame:
+        """
+        Queries all (measurement, tag) groups at once, or fans out queries of a configured number of groups each
+        for very large requests.
+
+        """
+        if len(groups) == 0:
+            return pd.DataFrame()
+        if self.query_groups is None or len(groups) <= self.query_groups:
+            return query(groups)
+
+        batches = [groups[i : i + self.query_groups] for i in range(0, len(groups), self.query_groups)]
+        if self.query_workers > 1:
+            with ThreadPoolExecutor(max_workers=self.query_workers, thread_name_prefix=self.id) as executor:
+                results = list(executor.map(query, batches))
+        else:
+            results = [query(batch) for batch in batches]
+        results = [r for r in results if not r.empty]
+        if len(results) == 0:
+            return pd.DataFrame()
+        return pd.concat(results, ignore_index=True)
+
+    def _query_csv(self, query: str, columns: List[str]) -> pd.DataFrame:
+        try:
+            query_api = self._client.query_api()
+            return _parse_csv(query_api.query_csv(query, dialect=_CSV_DIALECT), columns)
+
+        except (ApiException, InfluxDBError, HTTPError) as e:
+            self._raise(e)
+
     # noinspection PyTypeChecker
     def write(self, data: pd.DataFrame) -> None:
-        write_api = self._client.write_api(write_options=SYNCHRONOUS)
+        lines = []
         for measurement, group_resources in self.resources.groupby(lambda r: r.get("measurement", default=r.group)):
             if measurement is None:
                 measurement = "None"
             for tag, tagged_resources in group_resources.groupby("tag"):
-                tagged_data = data.loc[:, [r.id for r in tagged_resources if r.id in data.columns]]
-                tagged_data = tagged_data.dropna(axis="index", how="all").dropna(axis="columns", how="all")
+                tagged_resources = tagged_resources.filter(lambda r: r.id in data.columns)
+                if len(tagged_resources) == 0:
+                    continue
+                tagged_data = data.loc[:, tagged_resources.ids].dropna(axis="index", how="all")
                 if tagged_data.empty:
                     continue
+                lines.extend(_to_line_protocol(tagged_data, tagged_resources, measurement, tag))
+        if len(lines) == 0:
+            return
 
-                if tag is not None:
-                    tagged_data["tag"] = tag
+        try:
+            if self.batching:
+                # Batches of lines will be collected and flushed in the background
+                self._get_write_api().write(bucket=self.bucket, record=lines, write_precision=WritePrecision.NS)
+
+                # Raise errors of batches that failed in the background since the last write
+                error = self._write_error
+                if error is not None:
+                    self._write_error = None
+                    self._raise(error)
+                return
+
+            if self._write_service is None:
+                self._write_service = WriteService(self._client.api_client)
+            for batch_start in range(0, len(lines), self.batch_size):
+                self._write_service.post_write(
+                    org=self.org,
+                    bucket=self.bucket,
+                    body="\n".join(lines[batch_start : batch_start + self.batch_size]).encode("utf-8"),
+                    precision=WritePrecision.NS,
+                    content_type="text/plain; charset=utf-8",
+                    # The maximum retry time starts with the creation of retries, so they need to be built per request
+                    urlopen_kw={"retries": self._build_retries()},
+                )
 
-                try:
-                    tagged_data = tagged_data.rename(columns={r.id: _get_field(r) for r in tagged_resources})
-                    write_api.write(
-                        bucket=self.bucket,
-                        record=tagged_data,
-                        data_frame_measurement_name=measurement,
-                        data_frame_tag_columns=["tag"] if tag is not None else None,
-                    )
-                    write_api.flush()
+        except (ApiException, InfluxDBError, HTTPError) as e:
+            self._raise(e)
 
-                except (ApiException, InfluxDBError, HTTPError) as e:
-                    self._raise(e)
+    def _build_retries(self) -> WritesRetry:
+        # Only writes will be retried, as queries would block the connector while waiting
+        return WritesRetry(
+            total=self.max_retries,
+            retry_interval=self.retry_interval,
+            jitter_interval=self.jitter_interval,
+            max_retry_delay=self.max_retry_time,
+            max_retry_time=self.max_retry_time,
+            allowed_methods=["POST"],
+        )
+
+    def _get_write_api(self) -> WriteApi:
+        if self._write_api is None:
+            self._write_api = self._client.write_api(
+                write_options=WriteOptions(
+                    write_type=WriteType.batching,
+                    batch_size=self.batch_size,
+                    flush_interval=int(self.flush_interval * 1000),
+                    jitter_interval=int(self.jitter_interval * 1000),
+                    retry_interval=int(self.retry_interval * 1000),
+                    max_retries=self.max_retries,
+                    max_retry_time=int(self.max_retry_time * 1000),
+                ),
+                error_callback=self._on_write_error,
+            )
+        return self._write_api
+
+    # noinspection PyUnusedLocal
+    def _on_write_error(self, configuration: Tuple[str, str, str], data: bytes, error: Exception) -> None:
+        lines = data.count(b"\n") + 1
+        self._logger.warning(f"Error writing batch of {lines} lines to InfluxDB: {str(error)}")
+        self._write_error = error
 
     def delete(
         self,
@@ -386,23 +638,26 @@ class InfluxDatabase(Database):
 
     def _build_query(
         self,
-        resources: Resources,
-        measurement: str,
-        tag: Optional[str],
-        start: str = "0",
-        end: str = "now()",
+        groups: List[Tuple[str, Optional[str], Resources]],
+        start: Optional[TimestampType] = None,
+        end: Optional[TimestampType] = None,
     ) -> str:
-        if measurement is None:
-            raise DatabaseException(self, f"Measurement is None for following resources: {resources}")
+        predicates = []
+        for measurement, tag, resources in groups:
+            if measurement is None:
+                raise DatabaseException(self, f"Measurement is None for following resources: {resources}")
+            predicate = f'r["_measurement"] == "{measurement}"'
+            if tag is not None:
+                predicate += f' and r["tag"] == "{tag}"'
+            fields = " or ".join(f'r["_field"] == "{_get_field(r)}"' for r in resources)
+            predicate += f" and ({fields})"
+            predicates.append(f"({predicate})")
+
+        start, end = _to_isoformat(start, end)
         query = f"""
             from(bucket: "{self.bucket}")
                 |> range(start: {start}, stop: {end})
-                |> filter(fn: (r) => r["_measurement"] == "{measurement}")
-                |> filter(fn: (r) => {" or ".join([f'r["_field"] == "{_get_field(r)}"' for r in resources])})
-            """
-        if tag is not None:
-            query += f"""
-                |> filter(fn: (r) => r["tag"] == "{tag}")
+                |> filter(fn: (r) => {" or ".join(predicates)})
             """
         return query
 
@@ -444,5 +699,128 @@ def _to_isoformat(
     return start, end
 
 
+# noinspection PyTypeChecker
+def _to_line_protocol(data: pd.DataFrame, resources: Resources, measurement: str, tag: Optional[str]) -> List[str]:
+    # Serialize all fields column by column, to build the line protocol of every row with vectorized operations
+    fields = np.full(len(data.index), "", dtype=object)
+    for resource in resources:
+        values = data[resource.id]
+        if values.dtype == object:
+            values = values.infer_objects()
+        values_array = values.to_numpy()
+
+        if values.dtype.kind == "f":
+            valid = np.isfinite(values_array)
+            text = list(map(repr, values_array[valid].tolist()))
+        elif values.dtype.kind in ["i", "u"]:
+            valid = np.full(len(values_array), True)
+            text = [f"{v}{values.dtype.kind}" for v in values_array.tolist()]
+        elif values.dtype.kind == "b":
+            valid = np.full(len(values_array), True)
+            text = np.where(values_array, "true", "false").tolist()
+        else:
+            valid = values.notna().to_numpy()
+            text = [_to_field_value(v) for v in values_array[valid]]
+        if len(text) == 0:
+            continue
+        field = "," + _escape(_get_field(resource), ",= ") + "="
+        fields[valid] += field + np.array(text, dtype=object)
+
+    valid = fields != ""
+    if not valid.any():
+        return []
+
+    prefix = _escape(measurement, ", ")
+    if tag is not None:
+        prefix += ",tag=" + _escape(str(tag), ",= ")
+    timestamps = data.index.tz_convert(tz.UTC).tz_localize(None).values.astype("datetime64[ns]").astype(np.int64)
+
+    # Remove the leading field separator of every line
+    return [f"{prefix} {f[1:]} {t}" for f, t in zip(fields[valid].tolist(), timestamps[valid].tolist())]
+
+
+def _to_field_value(value: Any) -> str:
+    if isinstance(value, (bool, np.bool_)):
+        return "true" if value else "false"
+    if isinstance(value, (int, np.integer)):
+        return f"{value}i"
+    if isinstance(value, (float, np.floating)):
+        return repr(float(value))
+    return '"' + _escape(str(value), '"\\') + '"'
+
+
+def _escape(value: str, characters: str) -> str:
+    if "\\" in characters:
+        value = value.replace("\\", "\\\\")
+    for character in characters:
+        if character != "\\":
+            value = value.replace(character, "\\" + character)
+    return value
+
+
 def _get_field(resource: Resource) -> str:
     return resource.get("field", default=resource.get("column", default=resource.key))
+
+
+# noinspection PyTypeChecker
+def _parse_csv(rows: Iterable[List[str]], columns: List[str]) -> pd.DataFrame:
+    # Collect the raw values of all tables into columnar lists, separated by their datatypes
+    tables: Dict[Tuple[str, ...], Dict[str, List[Optional[str]]]] = {}
+    table = None
+    indexes = []
+    datatypes = []
+    for row in rows:
+        if len(row) < 3:
+            continue
+        if row[0] == "#datatype":
+            datatypes = row
+            continue
+        if row[0].startswith("#"):
+            continue
+        if row[1] == "result" and row[2] == "table":
+            indexes = [row.index(c) if c in row else None for c in columns]
+            table_types = tuple(datatypes[i] if i is not None and i < len(datatypes) else "string" for i in indexes)
+            table = tables.setdefault(table_types, {c: [] for c in columns})
+            continue
+        if table is None:
+            continue
+        for column, index in zip(columns, indexes):
+            table[column].append(row[index] if index is not None else None)
+
+    results = []
+    for table_types, table in tables.items():
+        results.append(pd.DataFrame({c: _parse_values(table[c], t) for c, t in zip(columns, table_types)}))
+    if len(results) == 0:
+        return pd.DataFrame(columns=columns)
+    if len(results) == 1:
+        return results[0]
+    return pd.concat(results, ignore_index=True)
+
+
+def _parse_values(values: List[Optional[str]], datatype: str) -> Any:
+    if datatype.startswith("dateTime"):
+        return pd.to_datetime(pd.Series(values, dtype=object).replace("", None), utc=True)
+    if datatype in ["double", "long", "unsignedLong"]:
+        return pd.to_numeric(pd.Series(values, dtype=object).replace("", None), errors="coerce")
+    if datatype == "boolean":
+        values = np.array(values, dtype=object)
+        return pd.Series(np.where(values == "", None, values == "true"), dtype=object)
+    return pd.Series(values, dtype=object)
+
+
+def _to_ids(data: pd.DataFrame, groups: List[Tuple[str, Optional[str], Resources]]) -> pd.Series:
+    ids = {}
+    for measurement, tag, resources in groups:
+        for resource in resources:
+            ids[(measurement, tag if tag is not None else "", _get_field(resource))] = resource.id
+
+    measurements = data["_measurement"].astype(str).to_list()
+    fields = data["_field"].astype(str).to_list()
+    tags = data["tag"].fillna("").astype(str).to_list()
+
+    # Fall back to untagged groups, as they do not filter for any tag
+    return pd.Series(
+        [ids.get((m, t, f), ids.get((m, "", f), None)) for m, t, f in zip(measurements, tags, fields)],
+        index=data.index,
+        dtype=object,
+    )
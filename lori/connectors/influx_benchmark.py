@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+lori.connectors.influx_benchmark
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Benchmark writing a number of channels to a local stand-in for the InfluxDB HTTP API, to tune the batching and
+compression of InfluxDB connectors without any server. See "python -m lori.connectors.influx_benchmark --help".
+
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import tempfile
+import time
+from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser
+from collections import Counter, OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+import pytz as tz
+from lori.connectors.influx import InfluxDatabase, _to_line_protocol
+from lori.core import Configurations, Directories, Resource, Resources
+from lori.data.manager import DataManager
+
+
+class InfluxStandIn(ThreadingHTTPServer):
+    """
+    Local HTTP server, answering the requests of InfluxDB clients necessary to connect and write line protocol.
+    Written lines are counted and dropped.
+
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, bucket: str = "benchmark", latency: float = 0) -> None:
+        super().__init__((host, port), _InfluxHandler)
+        self.bucket = bucket
+        self.latency = latency
+        self.results = Counter()
+        self._lock = Lock()
+
+    def count(self, **results: int) -> None:
+        with self._lock:
+            self.results.update(results)
+
+
+class _InfluxHandler(BaseHTTPRequestHandler):
+    server: InfluxStandIn
+
+    # noinspection PyShadowingBuiltins
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    # noinspection PyPep8Naming
+    def do_GET(self) -> None:
+        if self.path.startswith("/api/v2/buckets"):
+            self._respond(200, json.dumps({"buckets": [{"name": self.server.bucket, "retentionRules": []}]}).encode())
+        else:
+            self._respond(204)
+
+    do_HEAD = do_GET
+
+    # noinspection PyPep8Naming
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.server.latency > 0:
+            time.sleep(self.server.latency)
+        size = len(body)
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        self.server.count(requests=1, bytes=size, lines=body.count(b"\n") + 1)
+        self._respond(204)
+
+    def _respond(self, status: int, body: bytes = b"") -> None:
+        self.send_response(status)
+        if len(body) > 0:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def build_resources(groups: int, fields: int) -> Resources:
+    """
+    Builds the channels of a number of measurements, the same way as channels of a database would be configured.
+
+    :returns:
+        the resources to be written.
+    :rtype:
+        :class:`lori.core.Resources`
+    """
+    return Resources(
+        [
+            Resource(id=f"group{g}.field{f}", key=f"field{f}", group=f"group{g}", type=float)
+            for g in range(groups)
+            for f in range(fields)
+        ]
+    )
+
+
+def build_data(resources: Resources, rows: int = 1440, missing: float = 1 / 7) -> pd.DataFrame:
+    index = pd.date_range("2024-01-01", periods=rows, freq="1min", tz=tz.UTC)
+    data = pd.DataFrame(np.random.rand(rows, len(resources)), index=index, columns=resources.ids)
+    if missing > 0:
+        data = data.mask(np.random.rand(*data.shape) < missing)
+    return data
+
+
+# noinspection PyProtectedMember
+def benchmark(
+    groups: int = 20,
+    fields: int = 10,
+    rows: int = 1440,
+    missing: float = 1 / 7,
+    writes: int = 1,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    latency: float = 0,
+    gzip: bool = False,
+    batching: bool = False,
+    batch_size: int = 5000,
+) -> Dict[str, Any]:
+    """
+    Writes the values of a number of channels and measures the wall time of each write, as well as the time to
+    serialize the line protocol and the number and size of requests received by the stand-in server.
+
+    :returns:
+        the measured results of the benchmark.
+    :rtype:
+        Dict[str, Any]
+    """
+    resources = build_resources(groups, fields)
+    data = build_data(resources, rows, missing)
+
+    serialize_start = time.perf_counter()
+    for group, group_resources in resources.groupby("group"):
+        _to_line_protocol(data[group_resources.ids], group_resources, group, None)
+    serialize_time = time.perf_counter() - serialize_start
+
+    server = InfluxStandIn(host, port)
+    Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            dirs = Directories(data_dir=tmp, conf_dir=tmp, tmp_dir=tmp, log_dir=tmp, lib_dir=tmp)
+            manager = DataManager(Configurations("settings.conf", dirs, {}), "benchmark")
+            configs = Configurations(
+                "influx.conf",
+                dirs,
+                {
+                    "key": "influx",
+                    "host": host,
+                    "port": server.server_port,
+                    "org": "benchmark",
+                    "bucket": server.bucket,
+                    "token": "benchmark",
+                    "gzip": gzip,
+                    "batching": batching,
+                    "batch_size": batch_size,
+                },
+            )
+            database = InfluxDatabase(manager.connectors, configs=configs)
+            database.configure(configs)
+            database.connect(resources)
+
+            server.results.clear()
+            latencies = []
+            wall_start = time.perf_counter()
+            try:
+                for _ in range(writes):
+                    write_start = time.perf_counter()
+                    database.write(data)
+                    latencies.append(time.perf_counter() - write_start)
+            finally:
+                # Flushes pending batches in the background as well
+                database.disconnect()
+            wall_time = time.perf_counter() - wall_start
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    results = server.results
+    return OrderedDict(
+        channels=len(resources),
+        rows=rows,
+        writes=writes,
+        values=int(data.count().sum()) * writes,
+        write_mean=sum(latencies) / len(latencies),
+        write_max=max(latencies),
+        wall_time=wall_time,
+        serialize_time=serialize_time,
+        requests=results["requests"],
+        lines=results["lines"],
+        bytes=results["bytes"],
+    )
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__, formatter_class=ArgumentDefaultsHelpFormatter)
+    parser.add_argument("-n", "--groups", type=int, default=20, help="number of measurements")
+    parser.add_argument("-m", "--fields", type=int, default=10, help="number of fields per measurement")
+    parser.add_argument("-r", "--rows", type=int, default=1440, help="number of rows written per write")
+    parser.add_argument("--missing", type=float, default=1 / 7, help="fraction of missing values")
+    parser.add_argument("-w", "--writes", type=int, default=1, help="number of writes of all channels")
+    parser.add_argument("--host", default="127.0.0.1", help="address to serve the stand-in server at")
+    parser.add_argument("--port", type=int, default=0, help="port of the stand-in server, 0 for any free port")
+    parser.add_argument("--latency", type=float, default=0, help="seconds to respond to a write request")
+    parser.add_argument("--gzip", action="store_true", help="compress the written line protocol")
+    parser.add_argument("--batching", action="store_true", help="write batches in the background")
+    parser.add_argument("--batch-size", type=int, default=5000, help="maximum lines written with one request")
+
+    results = benchmark(**vars(parser.parse_args()))
+    for key, value in results.items():
+        if key.startswith("write_") or key.endswith("_time"):
+            value = f"{value * 1000:.1f} ms"
+        elif isinstance(value, float):
+            value = f"{value:.1f}"
+        print(f"{key.replace('_', ' '):<22}{value}")
+
+
+if __name__ == "__main__":
+    main()
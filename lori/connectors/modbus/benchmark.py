@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""
+lori.connectors.modbus.benchmark
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Benchmark polling a number of simulated modbus devices, to tune the request batching and pacing of modbus clients
+without any hardware. See "python -m lori.connectors.modbus.benchmark --help".
+
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import statistics
+import time
+from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymodbus import FramerType
+from pymodbus.client import AsyncModbusTcpClient
+
+from lori.connectors.modbus import ModbusRegister
+from lori.connectors.modbus.block import ModbusBlock, build_blocks, read_block
+from lori.connectors.modbus.poller import ModbusBus, ModbusPoller
+from lori.connectors.modbus.simulator import ModbusSimulator
+from lori.core import Resource, Resources
+
+
+# noinspection PyShadowingBuiltins
+def build_resources(
+    devices: int,
+    registers: int,
+    data_type: str = "uint16",
+    spacing: int = 0,
+    gateway: bool = False,
+) -> Dict[int, Resources]:
+    """
+    Builds the register definitions of the simulated devices, the same way as channels of a modbus client would be
+    configured. Registers are placed at adjacent addresses, separated by the passed number of unused addresses.
+
+    :returns:
+        the resources to be simulated, by port offset. All devices share the same port if simulating a gateway.
+    :rtype:
+        Dict[int, Resources]
+    """
+    length = ModbusRegister.from_resource(
+        Resource(id="register", key="register", type=float, address=0, data_type=data_type)
+    )
+    length = max(length.length, 1)
+    simulated = OrderedDict()
+    for device in range(1, devices + 1):
+        resources = [
+            Resource(
+                id=f"device{device}.register{register}",
+                key=f"register{register}",
+                group=f"device{device}",
+                type=float,
+                address=register * (length + spacing),
+                device=device if gateway else 1,
+                data_type=data_type,
+                value=register,
+            )
+            for register in range(registers)
+        ]
+        offset = 0 if gateway else device - 1
+        simulated[offset] = Resources([*simulated.get(offset, []), *resources])
+    return simulated
+
+
+def _simulate(
+    host: str,
+    port: int,
+    resources: Dict[int, Resources],
+    started: multiprocessing.Event,
+    stopped: multiprocessing.Event,
+    **kwargs,
+) -> None:
+    simulators = [ModbusSimulator(r, host=host, port=port + o, **kwargs) for o, r in resources.items()]
+    for simulator in simulators:
+        simulator.start()
+    started.set()
+    stopped.wait()
+    for simulator in simulators:
+        simulator.stop()
+
+
+async def _read_device(bus: ModbusBus, blocks: List[ModbusBlock], results: Counter) -> None:
+    def _split_block(block: ModbusBlock, split_blocks: List[ModbusBlock]) -> None:
+        # Keep the registers of rejected blocks split for following polls, the same way as the modbus client
+        results["requests"] += len(split_blocks)
+        results["splits"] += 1
+        if block in blocks:
+            index = blocks.index(block)
+            blocks[index : index + 1] = split_blocks
+
+    for block in list(blocks):
+        results["requests"] += 1
+        try:
+            values = await read_block(bus, block, _split_block)
+        except TimeoutError:
+            results["timeouts"] += 1
+            continue
+        if values is None:
+            results["errors"] += 1
+            continue
+        for key, register_values in block.extract(values).items():
+            if None in register_values:
+                results["errors"] += 1
+                continue
+            bus.client.convert_from_registers(list(register_values), block.registers[key].type)
+            results["values"] += 1
+
+
+async def _read(plans: List[Tuple[ModbusBus, List[ModbusBlock]]], results: Counter) -> None:
+    await asyncio.gather(*[_read_device(bus, blocks, results) for bus, blocks in plans])
+
+
+# noinspection PyShadowingBuiltins
+def benchmark(
+    devices: int = 10,
+    registers: int = 50,
+    polls: int = 20,
+    interval: float = 0,
+    host: str = "127.0.0.1",
+    port: int = 5020,
+    gateway: bool = False,
+    data_type: str = "uint16",
+    spacing: int = 0,
+    latency: float = 0.01,
+    jitter: float = 0,
+    exception_rate: float = 0,
+    dropout_rate: float = 0,
+    strict: bool = False,
+    block_gap: int = 4,
+    block_length: Optional[int] = None,
+    frame_delay: float = 0,
+    timeout: float = 1,
+    retries: int = 0,
+) -> Dict[str, Any]:
+    """
+    Polls the registers of a number of simulated devices and measures the latency of each poll of all devices,
+    the throughput of requests and values, as well as the CPU time used by the polling process.
+
+    The simulated devices are served by a separate process, to not be accounted in the measured CPU time. Each device
+    is simulated with its own server port, or as slave of a single gateway port.
+
+    :returns:
+        the measured results of the benchmark.
+    :rtype:
+        Dict[str, Any]
+    """
+    simulated = build_resources(devices, registers, data_type=data_type, spacing=spacing, gateway=gateway)
+
+    started = multiprocessing.Event()
+    stopped = multiprocessing.Event()
+    simulator = multiprocessing.Process(
+        target=_simulate,
+        args=(host, port, simulated, started, stopped),
+        kwargs={
+            "latency": latency,
+            "jitter": jitter,
+            "exception_rate": exception_rate,
+            "dropout_rate": dropout_rate,
+            "strict": strict,
+        },
+        daemon=True,
+    )
+    simulator.start()
+    poller = ModbusPoller.acquire()
+    try:
+        if not started.wait(timeout=30):
+            raise ConnectionError("Unable to start simulated modbus devices")
+
+        def _build_bus(bus_port: int) -> ModbusBus:
+            client = AsyncModbusTcpClient(
+                host=host,
+                port=bus_port,
+                framer=FramerType.SOCKET,
+                timeout=timeout,
+                retries=retries,
+                reconnect_delay=0,
+            )
+            return ModbusBus(("tcp", host, str(bus_port)), client, frame_delay, timeout)
+
+        buses = []
+        plans = []
+        for offset, resources in simulated.items():
+            bus_port = port + offset
+            bus = poller.run(poller.open(("tcp", host, str(bus_port)), lambda p=bus_port: _build_bus(p)))
+            blocks = build_blocks(
+                [(r.id, r.get("device"), ModbusRegister.from_resource(r)) for r in resources],
+                gap=block_gap,
+                length=block_length,
+            )
+            buses.append(bus)
+
+            # Blocks of each device will be read concurrently to the other devices of a bus
+            device_blocks = OrderedDict()
+            for block in blocks:
+                device_blocks.setdefault(block.device, []).append(block)
+            plans.extend((bus, b) for b in device_blocks.values())
+
+        results = Counter()
+        latencies = []
+        missed = 0
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        for _ in range(polls):
+            poll_start = time.perf_counter()
+            poller.run(_read(plans, results))
+            poll_latency = time.perf_counter() - poll_start
+            latencies.append(poll_latency)
+            if interval > 0:
+                if poll_latency > interval:
+                    missed += 1
+                else:
+                    time.sleep(interval - poll_latency)
+        wall_time = time.perf_counter() - wall_start
+        cpu_time = time.process_time() - cpu_start
+
+        for bus in buses:
+            poller.run(poller.close(bus))
+    finally:
+        poller.release()
+        stopped.set()
+        simulator.join(timeout=10)
+
+    latencies = sorted(latencies)
+    return OrderedDict(
+        devices=devices,
+        registers=registers,
+        polls=polls,
+        requests_per_poll=sum(len(b) for _, b in plans),
+        latency_mean=statistics.mean(latencies),
+        latency_p50=latencies[int(0.50 * (len(latencies) - 1))],
+        latency_p95=latencies[int(0.95 * (len(latencies) - 1))],
+        latency_max=latencies[-1],
+        requests_per_second=results["requests"] / wall_time,
+        values_per_second=results["values"] / wall_time,
+        cpu_time=cpu_time,
+        cpu_load=cpu_time / wall_time,
+        cpu_per_value=cpu_time / max(results["values"], 1),
+        timeouts=results["timeouts"],
+        errors=results["errors"],
+        splits=results["splits"],
+        missed=missed,
+    )
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__, formatter_class=ArgumentDefaultsHelpFormatter)
+    parser.add_argument("-n", "--devices", type=int, default=10, help="number of simulated devices")
+    parser.add_argument("-m", "--registers", type=int, default=50, help="number of registers per device")
+    parser.add_argument("-p", "--polls", type=int, default=20, help="number of polls of all devices")
+    parser.add_argument("--interval", type=float, default=0, help="seconds between polls, 0 to poll continuously")
+    parser.add_argument("--host", default="127.0.0.1", help="address to simulate the devices at")
+    parser.add_argument("--port", type=int, default=5020, help="first port of the simulated devices")
+    parser.add_argument("--gateway", action="store_true", help="simulate all devices as slaves of a single port")
+    parser.add_argument("--data-type", default="uint16", help="data type of the simulated registers")
+    parser.add_argument("--spacing", type=int, default=0, help="number of unused addresses between registers")
+    parser.add_argument("--latency", type=float, default=0.01, help="seconds to respond to a request")
+    parser.add_argument("--jitter", type=float, default=0, help="standard deviation of the latency")
+    parser.add_argument("--exception-rate", type=float, default=0, help="fraction of requests failing")
+    parser.add_argument("--dropout-rate", type=float, default=0, help="fraction of requests not answered")
+    parser.add_argument("--strict", action="store_true", help="reject requests of unused addresses")
+    parser.add_argument("--block-gap", type=int, default=4, help="unused addresses to be read in between registers")
+    parser.add_argument("--block-length", type=int, default=None, help="maximum registers read with one request")
+    parser.add_argument("--frame-delay", type=float, default=0, help="seconds in between requests of a device")
+    parser.add_argument("--timeout", type=float, default=1, help="seconds to wait for a response")
+    parser.add_argument("--retries", type=int, default=0, help="number of retries of requests")
+
+    results = benchmark(**vars(parser.parse_args()))
+    for key, value in results.items():
+        if key.startswith("latency") or key.startswith("cpu_time"):
+            value = f"{value * 1000:.1f} ms"
+        elif key == "cpu_per_value":
+            value = f"{value * 1e6:.1f} us"
+        elif key == "cpu_load":
+            value = f"{value:.1%}"
+        elif isinstance(value, float):
+            value = f"{value:.1f}"
+        print(f"{key.replace('_', ' '):<22}{value}")
+
+
+if __name__ == "__main__":
+    main()
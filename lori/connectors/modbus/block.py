@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+lori.connectors.modbus.block
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from lori.connectors.modbus import ModbusRegister
+from lori.connectors.modbus.poller import ModbusBus
+from lori.connectors.modbus.register import FunctionType
+
+# Maximum number of registers or coils, that can be read or written with a single request
+MAX_READ_LENGTH = {
+    "holding_register": 125,
+    "input_register": 125,
+    "coil": 2000,
+}
+MAX_WRITE_LENGTH = {
+    "holding_register": 123,
+    "coil": 1968,
+}
+
+
+class ModbusBlock:
+    """
+    Range of adjacent registers of the same device and function, to be read or written with a single request.
+
+    """
+
+    device: int
+    function: FunctionType
+
+    address: int
+    count: int
+
+    registers: Dict[str, ModbusRegister]
+
+    def __init__(self, device: int, function: FunctionType, address: int) -> None:
+        self.device = device
+        self.function = function
+        self.address = address
+        self.count = 0
+        self.registers = OrderedDict()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.device}: {self.function} {self.address}-{self.end - 1})"
+
+    def __len__(self) -> int:
+        return len(self.registers)
+
+    @property
+    def end(self) -> int:
+        return self.address + self.count
+
+    def add(self, key: str, register: ModbusRegister) -> None:
+        self.registers[key] = register
+        self.count = max(self.end, register.address + get_length(register)) - self.address
+
+    def split(self) -> List[ModbusBlock]:
+        """
+        Splits the block into ranges of strictly adjacent registers, or into single registers if already adjacent.
+
+        """
+        blocks = build_blocks([(k, self.device, r) for k, r in self.registers.items()], gap=0)
+        if len(blocks) > 1:
+            return blocks
+
+        blocks = []
+        for key, register in self.registers.items():
+            block = ModbusBlock(self.device, self.function, register.address)
+            block.add(key, register)
+            blocks.append(block)
+        return blocks
+
+    def extract(self, values: Sequence[Any]) -> Dict[str, Sequence[Any]]:
+        """
+        Extracts the raw values of each register from the response to a request of the whole block.
+
+        """
+        results = {}
+        for key, register in self.registers.items():
+            offset = register.address - self.address
+            results[key] = values[offset : offset + get_length(register)]
+        return results
+
+
+async def read_block(
+    bus: ModbusBus,
+    block: ModbusBlock,
+    on_split: Optional[Callable[[ModbusBlock, List[ModbusBlock]], None]] = None,
+) -> Optional[Sequence[int | bool]]:
+    """
+    Reads the raw values of a block with a single request. Devices may reject requests of unused addresses in between
+    registers, in which case the block will be split and its registers read separately.
+
+    :param bus:
+        the bus to execute the requests with.
+    :type bus:
+        :class:`lori.connectors.modbus.poller.ModbusBus`
+
+    :param block:
+        the block of registers to read.
+    :type block:
+        ModbusBlock
+
+    :param on_split:
+        the function to be called with a rejected block and the blocks it was split into, e.g. to keep the block
+        split for following reads.
+    :type on_split:
+        Callable[[ModbusBlock, List[ModbusBlock]], None]
+
+
+    :returns:
+        the raw values of the whole block, with None for the addresses of registers that could not be read,
+        or None if the block could not be read at all.
+    :rtype:
+        Optional[Sequence[int | bool]]
+
+    :raises TimeoutError:
+        if the slave device did not respond.
+    """
+    function = f"read_{block.function}s"
+    result = await bus.execute(block.device, function, block.address, count=block.count)
+    if not result.isError():
+        return result.bits if block.function == "coil" else result.registers
+    if len(block) < 2:
+        return None
+
+    blocks = block.split()
+    if on_split is not None:
+        on_split(block, blocks)
+    values = [None] * block.count
+    for register_block in blocks:
+        register_values = await read_block(bus, register_block, on_split)
+        if register_values is None:
+            continue
+        offset = register_block.address - block.address
+        values[offset : offset + register_block.count] = register_values[: register_block.count]
+    return values
+
+
+def get_length(register: ModbusRegister) -> int:
+    if register.function == "coil":
+        return 1
+    return register.length
+
+
+def build_blocks(
+    registers: Iterable[Tuple[str, int, ModbusRegister]],
+    gap: int = 0,
+    length: Optional[int] = None,
+) -> List[ModbusBlock]:
+    """
+    Plans the requests to read the passed registers, by merging registers of the same device and function into
+    blocks of adjacent addresses. Registers may be merged across unused addresses of up to the specified gap, as long
+    as the block does not exceed the specified or the maximum length of a request.
+
+    :param registers:
+        the registers to read, as tuples of their key, device ID and register.
+    :type registers:
+        Iterable[Tuple[str, int, ModbusRegister]]
+
+    :param gap:
+        the maximum number of unused addresses between two registers to be merged.
+    :type gap:
+        int
+
+    :param length:
+        the maximum number of registers to be read with a single request.
+    :type length:
+        int
+
+
+    :returns:
+        the planned blocks of registers to read
+    :rtype:
+        List[ModbusBlock]
+    """
+    groups = OrderedDict()
+    for key, device, register in registers:
+        groups.setdefault((device, register.function), []).append((key, register))
+
+    blocks = []
+    for (device, function), group_registers in groups.items():
+        block_length = MAX_READ_LENGTH[function]
+        if length is not None:
+            block_length = min(length, block_length)
+
+        block = None
+        for key, register in sorted(group_registers, key=lambda r: r[1].address):
+            register_length = get_length(register)
+            if register_length < 1:
+                # Registers of variable length, like strings, can not be merged
+                blocks.append(ModbusBlock(device, function, register.address))
+                blocks[-1].add(key, register)
+                continue
+            if (
+                block is None
+                or register.address - block.end > gap
+                or register.address + register_length - block.address > block_length
+            ):
+                block = ModbusBlock(device, function, register.address)
+                blocks.append(block)
+            block.add(key, register)
+    return blocks
@@ -8,17 +8,22 @@ lori.connectors.modbus.client
 
 from __future__ import annotations
 
-from typing import Mapping
+import asyncio
+from collections import OrderedDict
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple
 
 from pymodbus import FramerType, ModbusException
-from pymodbus.client import ModbusBaseSyncClient, ModbusSerialClient, ModbusTcpClient, ModbusUdpClient
+from pymodbus.client import AsyncModbusSerialClient, AsyncModbusTcpClient, AsyncModbusUdpClient, ModbusBaseClient
 
 import pandas as pd
 import pytz as tz
 from lori.connectors import ConnectionException, Connector, ConnectorException, register_connector_type
 from lori.connectors.modbus import ModbusRegister
-from lori.core import ConfigurationException, Configurations, Resources
-from lori.data import ChannelState
+from lori.connectors.modbus.block import MAX_WRITE_LENGTH, ModbusBlock, build_blocks, read_block
+from lori.connectors.modbus.poller import ModbusBus, ModbusPoller
+from lori.core import ConfigurationException, Configurations, Resource, Resources
+from lori.data import Channel, ChannelState
+from lori.util import floor_date, to_timedelta
 
 # FIXME: Remove this once Python >= 3.9 is a requirement
 try:
@@ -30,11 +35,25 @@ except ImportError:
 
 @register_connector_type("modbus")
 class ModbusClient(Connector):
-    __client: ModbusBaseSyncClient
+    __poller: Optional[ModbusPoller] = None
+    __bus: Optional[ModbusBus] = None
+    __bus_key: Tuple[str, ...]
+    __bus_factory: Callable[[], ModbusBus]
+
     __registers: Mapping[str, ModbusRegister]
+    __blocks: Dict[Tuple[str, ...], List[ModbusBlock]]
+    __polls: Dict[str, Tuple[pd.Timestamp, asyncio.Future]]
+    __prefetchers: List[asyncio.Task]
 
     _endian: Literal["big", "little"]
 
+    block_gap: int = 4
+    block_length: Optional[int] = None
+
+    prefetch: bool = True
+
+    _interval_health: pd.Timedelta = pd.Timedelta(seconds=30)
+
     # noinspection SpellCheckingInspection
     def configure(self, configs: Configurations) -> None:
         super().configure(configs)
@@ -43,129 +62,332 @@ class ModbusClient(Connector):
             raise ConnectorException(self, f"Invalid modbus word order '{_endian}'")
         self._endian = _endian
 
-        timeout = configs.get_int("timeout", default=3)
+        # Adjacent registers will be read with a single request, across unused addresses of up to the configured gap
+        self.block_gap = configs.get_int("block_gap", default=ModbusClient.block_gap)
+        self.block_length = configs.get_int("block_length", default=ModbusClient.block_length)
+        if self.block_gap < 0 or (self.block_length is not None and self.block_length < 1):
+            raise ConfigurationException(f"Invalid modbus block limits: {self.block_gap}, {self.block_length}")
+
+        # Channels with a reading frequency will be polled by the shared event loop at the start of each interval,
+        # concurrently to all other clients, and only be collected when read.
+        self.prefetch = configs.get_bool("prefetch", default=ModbusClient.prefetch)
+
+        timeout = configs.get_float("timeout", default=3)
+        timeouts = {int(d): float(t) for d, t in configs.get_section("timeouts", defaults={}).items()}
         retries = configs.get_int("retries", default=3)
 
         protocol = configs.get("protocol").lower()
-        if protocol == "tcp":
-            self.__client = ModbusTcpClient(
-                host=configs.get("host"),
-                port=configs.get_int("port", 502),
-                framer=FramerType.SOCKET,
-                timeout=timeout,
-                retries=retries,
-                # source_address=("localhost", 0),
-            )
-        elif protocol == "udp":
-            self.__client = ModbusUdpClient(
-                host=configs.get("host"),
-                port=configs.get_int("port", 502),
-                framer=FramerType.SOCKET,
-                timeout=timeout,
-                retries=retries,
-                # source_address=None,
-            )
+        if protocol in ["tcp", "udp"]:
+            host = configs.get("host")
+            port = configs.get_int("port", 502)
+            frame_delay = configs.get_float("frame_delay", default=0)
+
+            if protocol == "tcp":
+
+                def _build_client() -> ModbusBaseClient:
+                    return AsyncModbusTcpClient(
+                        host=host,
+                        port=port,
+                        framer=FramerType.SOCKET,
+                        timeout=timeout,
+                        retries=retries,
+                        reconnect_delay=0,
+                        # source_address=("localhost", 0),
+                    )
+
+            else:
+
+                def _build_client() -> ModbusBaseClient:
+                    return AsyncModbusUdpClient(
+                        host=host,
+                        port=port,
+                        framer=FramerType.SOCKET,
+                        timeout=timeout,
+                        retries=retries,
+                        reconnect_delay=0,
+                        # source_address=None,
+                    )
+
+            self.__bus_key = (protocol, host, str(port))
+
         elif protocol in ["rtu", "serial"]:
-            self.__client = ModbusSerialClient(
-                port=configs.get("port"),
-                framer=FramerType.RTU,
-                timeout=timeout,
-                retries=retries,
-                baudrate=configs.get_int("baudrate"),
-                bytesize=configs.get_int("bytesize", default=8),
-                stopbits=configs.get_int("stopbits", default=1),
-                parity=configs.get("parity", default="N"),
-                # handle_local_echo=False,
-            )
+            port = configs.get("port")
+            baudrate = configs.get_int("baudrate")
+            bytesize = configs.get_int("bytesize", default=8)
+            stopbits = configs.get_int("stopbits", default=1)
+            parity = configs.get("parity", default="N")
+
+            # Frames need to be separated by a silent interval of at least 3.5 characters,
+            # with a fixed minimum of 1.75 ms for baud rates above 19200.
+            frame_delay = configs.get_float("frame_delay", default=max(3.5 * 11 / baudrate, 0.00175))
+
+            def _build_client() -> ModbusBaseClient:
+                return AsyncModbusSerialClient(
+                    port=port,
+                    framer=FramerType.RTU,
+                    timeout=timeout,
+                    retries=retries,
+                    reconnect_delay=0,
+                    baudrate=baudrate,
+                    bytesize=bytesize,
+                    stopbits=stopbits,
+                    parity=parity,
+                    # handle_local_echo=False,
+                )
+
+            self.__bus_key = ("serial", port)
         else:
             raise ConnectorException(self, f"Unknown modbus protocol type '{protocol}'")
 
+        if frame_delay < 0 or timeout <= 0 or any(t <= 0 for t in timeouts.values()):
+            raise ConfigurationException(f"Invalid modbus timing: {frame_delay}, {timeout}, {timeouts}")
+
+        def _build_bus() -> ModbusBus:
+            return ModbusBus(self.__bus_key, _build_client(), frame_delay, timeout, timeouts)
+
+        self.__bus_factory = _build_bus
+
     # noinspection PyUnresolvedReferences
     def is_connected(self) -> bool:
-        return self.__client.connected
+        return self.__bus is not None and self.__bus.connected
 
     def connect(self, resources: Resources) -> None:
         super().connect(resources)
+        if self.__poller is None:
+            self.__poller = ModbusPoller.acquire()
         try:
-            self._logger.info(f"Connecting to '{self.__client}'")
-            self.__client.connect()
+            self._logger.info(f"Connecting to '{' '.join(self.__bus_key)}'")
+            self.__bus = self.__poller.run(self.__poller.open(self.__bus_key, self.__bus_factory))
             self.__registers = {r.id: ModbusRegister.from_resource(r) for r in resources}
+            self.__blocks = {}
+            self.__polls = {}
+            self.__prefetchers = []
+            if self.prefetch:
+                self.__poller.run(self._schedule(resources))
 
         except ModbusException as e:
-            self._logger.warning(f"Error connecting to '{self.__client}': {e}")
+            self._logger.warning(f"Error connecting to '{' '.join(self.__bus_key)}': {e}")
             raise ConnectionException(self, e)
         except IOError as e:
             raise ConnectorException(self, e)
 
     def disconnect(self) -> None:
         super().disconnect()
-        self.__client.close()
+        if self.__poller is None:
+            return
+        if self.__bus is not None:
+            self.__poller.run(self._close())
+            self.__bus = None
+        self.__poller.release()
+        self.__poller = None
+
+    async def _close(self) -> None:
+        tasks = [*self.__prefetchers, *[p for _, p in self.__polls.values()]]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.__prefetchers = []
+        self.__polls = {}
+        await self.__poller.close(self.__bus)
+
+    async def _schedule(self, resources: Resources) -> None:
+        for freq, freq_resources in resources.groupby(_get_freq):
+            if freq is None:
+                continue
+            self.__prefetchers.append(asyncio.create_task(self._prefetch(freq, freq_resources)))
+
+    async def _prefetch(self, freq: str, resources: Resources) -> None:
+        while True:
+            now = pd.Timestamp.now(tz.UTC)
+            timestamp = floor_date(now, freq=freq)
+            while timestamp <= now:
+                timestamp += to_timedelta(freq)
+            await asyncio.sleep((timestamp - now).total_seconds())
+
+            poll = asyncio.ensure_future(self._read(resources, timestamp))
+            poll.add_done_callback(_discard_exception)
+            self.__polls[freq] = (timestamp, poll)
 
     # noinspection PyTypeChecker, PyShadowingBuiltins
     def read(self, resources: Resources) -> pd.DataFrame:
-        timestamp = pd.Timestamp.now(tz.UTC).floor(freq="s")
-        data = pd.DataFrame(index=[timestamp], columns=resources.ids)
         try:
+            return self.__poller.run(self._collect(resources))
+
+        except ModbusException as e:
+            raise ConnectionException(self, e)
+        except IOError as e:
+            raise ConnectorException(self, e)
+
+    async def _collect(self, resources: Resources) -> pd.DataFrame:
+        now = pd.Timestamp.now(tz.UTC)
+        results = []
+        for freq, (timestamp, poll) in list(self.__polls.items()):
+            if not timestamp <= now < timestamp + to_timedelta(freq):
+                continue
+            if not any(_get_freq(r) == freq for r in resources):
+                continue
+            poll_data = await asyncio.shield(poll)
+            poll_ids = [r.id for r in resources if _get_freq(r) == freq and r.id in poll_data.columns]
+            results.append(poll_data[poll_ids])
+            resources = resources.filter(lambda r: r.id not in poll_ids)
+
+        if len(resources) > 0 or len(results) == 0:
+            results.append(await self._read(resources))
+        if len(results) == 1:
+            return results[0]
+        return pd.concat(results, axis="columns")
+
+    # noinspection PyTypeChecker
+    async def _read(self, resources: Resources, timestamp: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        if timestamp is None:
+            timestamp = pd.Timestamp.now(tz.UTC).floor(freq="s")
+        data = pd.DataFrame(index=[timestamp], columns=resources.ids)
+        for resource in resources:
+            if resource.id not in self.__registers:
+                data.at[timestamp, resource.id] = ChannelState.NOT_AVAILABLE
+
+        blocks = OrderedDict()
+        for block in self._get_blocks(resources):
+            blocks.setdefault(block.device, []).append(block)
+
+        # Poll all slave devices concurrently, so that the requests of one device do not need to wait for all
+        # requests of another to finish, if the bus is available.
+        await asyncio.gather(*[self._read_device(data, timestamp, b) for b in blocks.values()])
+
+        if not self.__bus.connected:
+            raise ModbusException(f"Lost connection to '{self.__bus}'")
+        return data
+
+    async def _read_device(self, data: pd.DataFrame, timestamp: pd.Timestamp, blocks: List[ModbusBlock]) -> None:
+        for block in blocks:
+            try:
+                values = await self._read_block(block)
+
+            except TimeoutError as e:
+                data.loc[timestamp, list(block.registers.keys())] = ChannelState.TIMEOUT
+                self._logger.warning(f"Timed out reading registers '{', '.join(block.registers.keys())}': {e}")
+                continue
+
+            if values is None:
+                data.loc[timestamp, list(block.registers.keys())] = ChannelState.UNKNOWN_ERROR
+                self._logger.warning(f"Error reading registers '{', '.join(block.registers.keys())}'")
+                continue
+
+            for resource_id, resource_values in block.extract(values).items():
+                register = block.registers[resource_id]
+                try:
+                    if resource_values is None or None in resource_values:
+                        data.at[timestamp, resource_id] = ChannelState.UNKNOWN_ERROR
+                        continue
+                    if register.function == "coil":
+                        value = bool(resource_values[0])
+                    else:
+                        value = self.__bus.client.convert_from_registers(
+                            list(resource_values), register.type, word_order=self._endian
+                        )
+                    data.at[timestamp, resource_id] = value
+
+                    self._logger.debug(f"Read {register.type} value of register {register.address}: {value}")
+
+                except (ConfigurationException, ModbusException, ValueError) as e:
+                    data.at[timestamp, resource_id] = ChannelState.ARGUMENT_SYNTAX_ERROR
+                    self._logger.warning(f"Invalid register configuration for resource '{resource_id}': {e}")
+                    continue
+
+    def _get_blocks(self, resources: Resources) -> List[ModbusBlock]:
+        key = tuple(resources.ids)
+        if key not in self.__blocks:
+            registers = []
             for device, device_resources in resources.groupby("device"):
                 if device is None:
                     device = 1
-
-                # TODO: Implement reading adjacent blocks of registers of same device ID
                 for resource in device_resources:
-                    try:
-                        register = self.__registers[resource.id]
-                        function = getattr(self.__client, f"read_{register.function}s")
-                        result = function(register.address, count=register.length, slave=device)
-                        if result.isError():
-                            data.at[timestamp, resource.id] = ChannelState.UNKNOWN_ERROR
-                            self._logger.warning(f"Error reading register '{resource.id}'")
-                            continue
-
-                        value = self.__client.convert_from_registers(
-                            result.registers, register.type, word_order=self._endian
-                        )
-                        data.at[timestamp, resource.id] = value
+                    if resource.id in self.__registers:
+                        registers.append((resource.id, device, self.__registers[resource.id]))
+            self.__blocks[key] = build_blocks(registers, gap=self.block_gap, length=self.block_length)
+        return list(self.__blocks[key])
 
-                        self._logger.debug(f"Read {register.type} value of register {register.address}: {value}")
+    async def _read_block(self, block: ModbusBlock) -> Optional[Sequence[int | bool]]:
+        return await read_block(self.__bus, block, self._split_block)
 
-                    except ConfigurationException as e:
-                        data.at[timestamp, resource.id] = ChannelState.ARGUMENT_SYNTAX_ERROR
-                        self._logger.warning(f"Invalid register configuration for resource '{resource.id}': {e}")
-                        continue
-                    except KeyError:
-                        data.at[timestamp, resource.id] = ChannelState.NOT_AVAILABLE
-                        continue
-            return data
+    def _split_block(self, block: ModbusBlock, blocks: List[ModbusBlock]) -> None:
+        # Keep the registers of rejected blocks split for following reads
+        self._logger.debug(f"Error reading {block}, splitting block into {len(blocks)} requests")
+        for plan in self.__blocks.values():
+            if block in plan:
+                index = plan.index(block)
+                plan[index : index + 1] = blocks
 
+    def write(self, data: pd.DataFrame) -> None:
+        try:
+            self.__poller.run(self._write(data))
+
+        except TimeoutError as e:
+            raise ConnectorException(self, e)
         except ModbusException as e:
             raise ConnectionException(self, e)
         except IOError as e:
             raise ConnectorException(self, e)
 
-    def write(self, data: pd.DataFrame) -> None:
-        try:
-            for device, device_channels in self.channels.groupby("device"):
-                if device is None:
-                    device = 1
+    async def _write(self, data: pd.DataFrame) -> None:
+        for device, device_channels in self.channels.groupby("device"):
+            if device is None:
+                device = 1
 
-                for channel in device_channels:
-                    if channel.id not in data.columns:
-                        continue
-                    channel_data = data.loc[:, channel.id].dropna(axis="index", how="all")
-                    if channel_data.empty:
-                        continue
-                    register = self.__registers[channel.id]
-                    try:
-                        values = self.__client.convert_to_registers(
+            registers = []
+            for channel in device_channels:
+                if channel.id not in data.columns:
+                    continue
+                channel_data = data.loc[:, channel.id].dropna(axis="index", how="all")
+                if channel_data.empty:
+                    continue
+                register = self.__registers[channel.id]
+                try:
+                    if register.function == "coil":
+                        values = [bool(channel_data.iloc[-1])]
+                    elif register.function == "holding_register":
+                        values = self.__bus.client.convert_to_registers(
                             channel_data.iloc[-1], register.type, word_order=self._endian
                         )
-                        self.__client.write_registers(register.address, values, slave=device)
+                    else:
+                        raise ConfigurationException(f"Unable to write register function '{register.function}'")
+                    registers.append((register, values))
 
-                    except ConfigurationException as e:
-                        self._logger.warning(f"Invalid register configuration for channel '{channel.id}': {e}")
-                        continue
+                except ConfigurationException as e:
+                    self._logger.warning(f"Invalid register configuration for channel '{channel.id}': {e}")
+                    continue
 
-        except ModbusException as e:
-            raise ConnectionException(self, e)
-        except IOError as e:
-            raise ConnectorException(self, e)
+            # Write contiguous ranges of registers with a single request
+            for function, address, values in _merge_writes(registers):
+                if function == "coil":
+                    await self.__bus.execute(device, "write_coils", address, values)
+                else:
+                    await self.__bus.execute(device, "write_registers", address, values)
+
+
+def _get_freq(resource: Resource) -> Optional[str]:
+    if isinstance(resource, Channel):
+        return resource.freq
+    return None
+
+
+def _discard_exception(future: asyncio.Future) -> None:
+    # Errors of prefetched polls will be raised when collected, or discarded if the poll never got read
+    if not future.cancelled():
+        future.exception()
+
+
+def _merge_writes(registers: List[Tuple[ModbusRegister, List[int | bool]]]) -> List[Tuple[str, int, List[int | bool]]]:
+    writes = []
+    for register, values in sorted(registers, key=lambda r: (r[0].function, r[0].address)):
+        if len(writes) > 0:
+            function, address, merged = writes[-1]
+            if (
+                function == register.function
+                and address + len(merged) == register.address
+                and len(merged) + len(values) <= MAX_WRITE_LENGTH[function]
+            ):
+                merged.extend(values)
+                continue
+        writes.append((register.function, register.address, list(values)))
+    return writes
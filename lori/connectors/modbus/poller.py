@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+lori.connectors.modbus.poller
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from concurrent import futures
+from threading import Lock, Thread
+from typing import Any, Callable, Coroutine, Dict, Hashable, Optional
+
+from pymodbus import ModbusException
+from pymodbus.client import ModbusBaseClient
+from pymodbus.exceptions import ModbusIOException
+from pymodbus.pdu import ModbusPDU
+
+# Maximum number of seconds, a slave device will be skipped for after consecutive timeouts
+SLAVE_BACKOFF_MAX = 300
+
+
+class ModbusSlave:
+    """
+    State of a single slave device of a bus, to skip unresponsive devices with an exponential backoff.
+
+    """
+
+    device: int
+    timeout: float
+
+    failures: int = 0
+
+    _suspended: float = 0
+
+    def __init__(self, device: int, timeout: float) -> None:
+        self.device = device
+        self.timeout = timeout
+        self.failures = 0
+        self._suspended = 0
+
+    def is_suspended(self, now: float) -> bool:
+        return now < self._suspended
+
+    def succeed(self) -> None:
+        self.failures = 0
+        self._suspended = 0
+
+    def fail(self, now: float) -> None:
+        self.failures += 1
+        self._suspended = now + min(2 ** (self.failures - 1), SLAVE_BACKOFF_MAX)
+
+
+class ModbusBus:
+    """
+    Connection to a modbus TCP device, gateway or serial bus, shared by all clients of the same address.
+
+    Requests on a bus are sent one after another, with an optional delay between frames and individual timeouts
+    per slave device. Slave devices that did not respond will be skipped for an increasing time, to not let a single
+    unresponsive slave hold up the requests to all others.
+
+    """
+
+    key: Hashable
+    client: ModbusBaseClient
+
+    frame_delay: float
+    timeout: float
+    timeouts: Dict[int, float]
+
+    slaves: Dict[int, ModbusSlave]
+
+    users: int = 0
+
+    _lock: asyncio.Lock
+    _last_frame: float = 0
+
+    def __init__(
+        self,
+        key: Hashable,
+        client: ModbusBaseClient,
+        frame_delay: float = 0,
+        timeout: float = 3,
+        timeouts: Optional[Dict[int, float]] = None,
+    ) -> None:
+        self._logger = logging.getLogger(self.__module__)
+        self._lock = asyncio.Lock()
+        self._last_frame = 0
+        self.key = key
+        self.client = client
+        self.frame_delay = frame_delay
+        self.timeout = timeout
+        self.timeouts = timeouts if timeouts is not None else {}
+        self.slaves = {}
+        self.users = 0
+
+    def __repr__(self) -> str:
+        return str(self.client)
+
+    @property
+    def connected(self) -> bool:
+        return self.client.connected
+
+    async def connect(self) -> bool:
+        if self.client.connected:
+            return True
+        async with self._lock:
+            return await self.client.connect()
+
+    def close(self) -> None:
+        self.client.close()
+
+    def get_slave(self, device: int) -> ModbusSlave:
+        if device not in self.slaves:
+            self.slaves[device] = ModbusSlave(device, self.timeouts.get(device, self.timeout))
+        return self.slaves[device]
+
+    async def execute(self, device: int, function: str, *args, **kwargs) -> ModbusPDU:
+        """
+        Executes the request function of the client for the given slave device, as soon as the bus is available.
+
+        :raises TimeoutError:
+            if the slave device did not respond or is skipped after previous timeouts.
+        """
+        loop = asyncio.get_running_loop()
+        slave = self.get_slave(device)
+        if slave.is_suspended(loop.time()):
+            raise TimeoutError(f"Skipping unresponsive slave {device} of '{self}'")
+
+        async with self._lock:
+            delay = self._last_frame + self.frame_delay - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            if not self.client.connected and not await self.client.connect():
+                raise ModbusException(f"Unable to reconnect to '{self}'")
+
+            # The timeout is only read by the client when waiting for a response, while holding the bus lock
+            self.client.ctx.comm_params.timeout_connect = slave.timeout
+            try:
+                response = await getattr(self.client, function)(*args, slave=device, **kwargs)
+
+            except ModbusIOException as e:
+                slave.fail(loop.time())
+                self._logger.debug(f"Slave {device} of '{self}' did not respond {slave.failures} times: {e}")
+
+                # Reopen the connection, to discard late responses that would otherwise be taken as responses to
+                # the following request of another slave
+                self.client.close()
+                await self.client.connect()
+                raise TimeoutError(f"Slave {device} of '{self}' did not respond")
+            finally:
+                self._last_frame = loop.time()
+
+        slave.succeed()
+        return response
+
+
+class ModbusPoller:
+    """
+    Event loop shared by all modbus clients, running in a separate thread.
+
+    Requests of independent buses are processed concurrently by the event loop, so that reading many devices does
+    not depend on the number of threads available to read connectors. Clients connecting to the same address share
+    the same bus.
+
+    """
+
+    _instance: Optional[ModbusPoller] = None
+    _instance_lock: Lock = Lock()
+
+    _loop: asyncio.AbstractEventLoop
+    _thread: Thread
+
+    buses: Dict[Hashable, ModbusBus]
+    users: int = 0
+
+    def __init__(self) -> None:
+        self._logger = logging.getLogger(self.__module__)
+        self._loop = asyncio.new_event_loop()
+        self._thread = Thread(name=type(self).__name__, target=self._run, daemon=True)
+        self.buses = {}
+        self.users = 0
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    @classmethod
+    def acquire(cls) -> ModbusPoller:
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+                cls._instance._thread.start()
+            cls._instance.users += 1
+            return cls._instance
+
+    def release(self) -> None:
+        cls = type(self)
+        with cls._instance_lock:
+            self.users -= 1
+            if self.users > 0:
+                return
+            if cls._instance is self:
+                cls._instance = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def submit(self, coroutine: Coroutine) -> futures.Future:
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def run(self, coroutine: Coroutine, timeout: Optional[float] = None) -> Any:
+        future = self.submit(coroutine)
+        try:
+            return future.result(timeout)
+        except futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Timed out running modbus request after {timeout} seconds")
+
+    async def open(self, key: Hashable, factory: Callable[[], ModbusBus]) -> ModbusBus:
+        """
+        Opens the bus of the given key, to be shared with other clients. The bus will be created with the passed
+        factory function on the event loop, if not already open.
+
+        """
+        bus = self.buses.get(key)
+        if bus is None:
+            bus = factory()
+            self.buses[key] = bus
+        bus.users += 1
+        try:
+            if not await bus.connect():
+                raise ModbusException(f"Unable to connect to '{bus}'")
+        except Exception as e:
+            await self.close(bus)
+            raise e
+        return bus
+
+    async def close(self, bus: ModbusBus) -> None:
+        bus.users -= 1
+        if bus.users > 0:
+            return
+        if self.buses.get(bus.key) is bus:
+            del self.buses[bus.key]
+        bus.close()
@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+"""
+lori.connectors.modbus.simulator
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from threading import Event, Thread
+from typing import Any, Dict, Mapping, Optional, Sequence
+
+from pymodbus import FramerType
+from pymodbus.client import ModbusBaseClient
+from pymodbus.datastore import ModbusBaseSlaveContext, ModbusServerContext
+from pymodbus.exceptions import NoSuchSlaveException
+from pymodbus.pdu import ExceptionResponse, ModbusPDU
+from pymodbus.server import ModbusTcpServer
+
+from lori.connectors.modbus import ModbusRegister
+from lori.core import ConfigurationException, Configurations, Resources
+
+# FIXME: Remove this once Python >= 3.9 is a requirement
+try:
+    from typing import Literal
+
+except ImportError:
+    from typing_extensions import Literal
+
+
+class ModbusSimulatorException(Exception):
+    """
+    Raise if a simulated device should respond to a request with a modbus exception code.
+
+    """
+
+    def __init__(self, code: int, *args) -> None:
+        super().__init__(*args)
+        self.code = code
+
+
+class ModbusSimulatorDevice(ModbusBaseSlaveContext):
+    """
+    Simulated slave device, serving the values of the configured registers with an artificial latency.
+    Requests may randomly be answered with a slave failure exception, or not be answered at all.
+
+    """
+
+    device: int
+    registers: Dict[str, ModbusRegister]
+
+    latency: float
+    jitter: float
+    exception_rate: float
+    dropout_rate: float
+    strict: bool
+
+    requests: int = 0
+    exceptions: int = 0
+    dropouts: int = 0
+
+    _values: Dict[str, Dict[int, int | bool]]
+
+    def __init__(
+        self,
+        device: int,
+        registers: Mapping[str, ModbusRegister],
+        latency: float = 0,
+        jitter: float = 0,
+        exception_rate: float = 0,
+        dropout_rate: float = 0,
+        strict: bool = False,
+        endian: Literal["big", "little"] = "big",
+        generator: Optional[random.Random] = None,
+    ) -> None:
+        self.device = device
+        self.registers = dict(registers)
+        self.latency = latency
+        self.jitter = jitter
+        self.exception_rate = exception_rate
+        self.dropout_rate = dropout_rate
+        self.strict = strict
+        self.requests = 0
+        self.exceptions = 0
+        self.dropouts = 0
+        self._endian = endian
+        self._random = generator if generator is not None else random.Random()
+        self._values = {"holding_register": {}, "input_register": {}, "coil": {}}
+        for key, register in self.registers.items():
+            self.set_value(key, "" if register.type == ModbusBaseClient.DATATYPE.STRING else 0)
+
+    def __str__(self) -> str:
+        return f"{type(self).__name__}({self.device})"
+
+    def set_value(self, key: str, value: Any) -> None:
+        register = self.registers[key]
+        if register.function == "coil":
+            values = [bool(value)]
+        else:
+            values = ModbusBaseClient.convert_to_registers(value, register.type, word_order=self._endian)
+        for offset, register_value in enumerate(values):
+            self._values[register.function][register.address + offset] = register_value
+
+    def decode(self, fx: int) -> str:
+        if fx in [1, 5, 15]:
+            return "coil"
+        if fx == 4:
+            return "input_register"
+        return "holding_register"
+
+    async def _simulate(self) -> None:
+        self.requests += 1
+        delay = self.latency
+        if self.jitter > 0:
+            delay = max(self._random.gauss(self.latency, self.jitter), 0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self.dropout_rate > 0 and self._random.random() < self.dropout_rate:
+            self.dropouts += 1
+            # Requests of missing slaves are not answered by the server, like requests lost on the line
+            raise NoSuchSlaveException(f"Dropping request of slave {self.device}")
+        if self.exception_rate > 0 and self._random.random() < self.exception_rate:
+            self.exceptions += 1
+            raise ModbusSimulatorException(ExceptionResponse.SLAVE_FAILURE, f"Simulated failure of slave {self.device}")
+
+    async def async_getValues(self, fc_as_hex: int, address: int, count: int = 1) -> Sequence[int | bool]:
+        await self._simulate()
+        return self.getValues(fc_as_hex, address, count)
+
+    async def async_setValues(self, fc_as_hex: int, address: int, values: Sequence[int | bool]) -> None:
+        await self._simulate()
+        self.setValues(fc_as_hex, address, values)
+
+    def getValues(self, fc_as_hex: int, address: int, count: int = 1) -> Sequence[int | bool]:
+        values = self._values[self.decode(fc_as_hex)]
+        if self.strict and any(a not in values for a in range(address, address + count)):
+            raise ModbusSimulatorException(
+                ExceptionResponse.ILLEGAL_ADDRESS,
+                f"Invalid address range {address}-{address + count - 1} of slave {self.device}",
+            )
+        return [values.get(a, 0) for a in range(address, address + count)]
+
+    def setValues(self, fc_as_hex: int, address: int, values: Sequence[int | bool]) -> None:
+        store = self._values[self.decode(fc_as_hex)]
+        if self.strict and any(a not in store for a in range(address, address + len(values))):
+            raise ModbusSimulatorException(
+                ExceptionResponse.ILLEGAL_ADDRESS,
+                f"Invalid address range {address}-{address + len(values) - 1} of slave {self.device}",
+            )
+        for offset, value in enumerate(values):
+            store[address + offset] = value
+
+
+class ModbusSimulator:
+    """
+    Local modbus TCP server, simulating the slave devices of the passed resources, configured the same way as the
+    channels of a modbus client. Allows to test and benchmark modbus clients without any hardware.
+
+    """
+
+    host: str
+    port: int
+
+    devices: Dict[int, ModbusSimulatorDevice]
+
+    _server: Optional[ModbusTcpServer] = None
+    _thread: Optional[Thread] = None
+
+    # noinspection PyShadowingBuiltins
+    def __init__(
+        self,
+        resources: Resources,
+        host: str = "127.0.0.1",
+        port: int = 5020,
+        latency: float = 0,
+        jitter: float = 0,
+        exception_rate: float = 0,
+        dropout_rate: float = 0,
+        strict: bool = False,
+        endian: Literal["big", "little"] = "big",
+        seed: Optional[int] = None,
+    ) -> None:
+        if latency < 0 or jitter < 0:
+            raise ConfigurationException(f"Invalid simulated latency: {latency}, {jitter}")
+        if not 0 <= exception_rate <= 1 or not 0 <= dropout_rate <= 1:
+            raise ConfigurationException(f"Invalid simulated failure rates: {exception_rate}, {dropout_rate}")
+        self._logger = logging.getLogger(self.__module__)
+        self._random = random.Random(seed)
+        self._started = Event()
+        self.host = host
+        self.port = port
+
+        self.devices = {}
+        for device, device_resources in resources.groupby("device"):
+            if device is None:
+                device = 1
+            self.devices[int(device)] = ModbusSimulatorDevice(
+                int(device),
+                {r.id: ModbusRegister.from_resource(r) for r in device_resources},
+                latency=latency,
+                jitter=jitter,
+                exception_rate=exception_rate,
+                dropout_rate=dropout_rate,
+                strict=strict,
+                endian=endian,
+                generator=self._random,
+            )
+        for resource in resources:
+            if "value" in resource:
+                self.set_value(resource.id, resource.get("value"))
+
+    @classmethod
+    def from_configs(cls, configs: Configurations, resources: Resources) -> ModbusSimulator:
+        return cls(
+            resources,
+            host=configs.get("host", default="127.0.0.1"),
+            port=configs.get_int("port", default=5020),
+            latency=configs.get_float("latency", default=0),
+            jitter=configs.get_float("jitter", default=0),
+            exception_rate=configs.get_float("exception_rate", default=0),
+            dropout_rate=configs.get_float("dropout_rate", default=0),
+            strict=configs.get_bool("strict", default=False),
+            endian=configs.get("endian", default="big").lower(),
+            seed=configs.get_int("seed", default=None),
+        )
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.host}:{self.port})"
+
+    def __enter__(self) -> ModbusSimulator:
+        self.start()
+        return self
+
+    # noinspection PyShadowingBuiltins
+    def __exit__(self, type, value, traceback) -> None:
+        self.stop()
+
+    @property
+    def requests(self) -> int:
+        return sum(d.requests for d in self.devices.values())
+
+    def set_value(self, key: str, value: Any) -> None:
+        for device in self.devices.values():
+            if key in device.registers:
+                device.set_value(key, value)
+                return
+        raise KeyError(f"Unknown simulated register: {key}")
+
+    def start(self) -> None:
+        """
+        Starts the server in a separate thread and returns as soon as it accepts connections.
+
+        """
+        if self._thread is not None:
+            return
+        self._started.clear()
+        self._thread = Thread(name=repr(self), target=self.serve, daemon=True)
+        self._thread.start()
+        if not self._started.wait(timeout=10):
+            raise ConnectionError(f"Unable to start {self}")
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        if self._server is not None:
+            asyncio.run_coroutine_threadsafe(self._server.shutdown(), self._loop)
+        self._thread.join()
+        self._thread = None
+
+    def serve(self) -> None:
+        """
+        Runs the server until stopped, blocking the calling thread.
+
+        """
+        asyncio.run(self._serve())
+
+    @staticmethod
+    def _trace_pdu(sending: bool, pdu: ModbusPDU) -> ModbusPDU:
+        if sending:
+            return pdu
+
+        # The server responds to any error of the datastore with a slave failure of an unknown function.
+        # Wrap the received request, to respond to simulated exceptions as a device would.
+        update_datastore = pdu.update_datastore
+
+        async def _update_datastore(context: ModbusBaseSlaveContext) -> ModbusPDU:
+            try:
+                return await update_datastore(context)
+            except ModbusSimulatorException as e:
+                return ExceptionResponse(pdu.function_code, e.code)
+
+        pdu.update_datastore = _update_datastore
+        return pdu
+
+    async def _serve(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._server = ModbusTcpServer(
+            ModbusServerContext(slaves=self.devices, single=False),
+            framer=FramerType.SOCKET,
+            address=(self.host, self.port),
+            ignore_missing_slaves=True,
+            trace_pdu=self._trace_pdu,
+        )
+        self._logger.info(f"Simulating {len(self.devices)} modbus devices at {self.host}:{self.port}")
+        await self._server.serve_forever(background=True)
+        self._started.set()
+        try:
+            await self._server.serving
+        finally:
+            self._server = None
@@ -0,0 +1,484 @@
+# -*- coding: utf-8 -*-
+"""
+lori.connectors.parquet
+~~~~~~~~~~~~~~~~~~~~~~~
+
+
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import tempfile
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import pandas as pd
+import pytz as tz
+from lori.connectors import ConnectionException, Database, register_connector_type
+from lori.core import ConfigurationException, Configurations, Resource, Resources
+from lori.typing import TimestampType
+
+# FIXME: Remove this once Python >= 3.9 is a requirement
+try:
+    from typing import Literal
+
+except ImportError:
+    from typing_extensions import Literal
+
+PARQUET_FILE = "data.parquet"
+
+_PARTITION_KEYS = {
+    "year": ["year"],
+    "month": ["year", "month"],
+    "day": ["year", "month", "day"],
+}
+
+
+# noinspection PyShadowingBuiltins, PyUnresolvedReferences
+@register_connector_type("parquet")
+class ParquetDatabase(Database):
+    """
+    Columnar database, storing each group of resources as Hive-partitioned Parquet files, e.g.
+    ``group=<group>/year=<year>/month=<month>/data.parquet``.
+
+    Partitions outside a read range are skipped entirely, while row group statistics allow to skip parts of the
+    remaining files. Only the requested columns are read, and partitions of past periods, that will not be written
+    anymore, are read memory-mapped.
+
+    """
+
+    _data_dir: str
+
+    index_column: str = "timestamp"
+
+    partition: Literal["year", "month", "day"] = "month"
+    compression: str = "snappy"
+    row_group_size: int = 10000
+
+    def configure(self, configs: Configurations) -> None:
+        super().configure(configs)
+
+        data_dir = configs.get("dir", default=None)
+        if data_dir is not None:
+            if "~" in data_dir:
+                data_dir = os.path.expanduser(data_dir)
+            if not os.path.isabs(data_dir):
+                data_dir = os.path.join(configs.dirs.data, data_dir)
+        else:
+            data_dir = os.path.join(configs.dirs.data, "parquet")
+        self._data_dir = data_dir
+
+        self.index_column = configs.get("index_column", default=ParquetDatabase.index_column)
+
+        self.partition = configs.get("partition", default=ParquetDatabase.partition).lower()
+        if self.partition not in _PARTITION_KEYS:
+            raise ConfigurationException(f"Invalid parquet partitioning '{self.partition}'")
+
+        self.compression = configs.get("compression", default=ParquetDatabase.compression)
+        self.row_group_size = configs.get_int("row_group_size", default=ParquetDatabase.row_group_size)
+
+    def is_connected(self) -> bool:
+        return os.path.isdir(self._data_dir)
+
+    def connect(self, resources: Resources) -> None:
+        try:
+            os.makedirs(self._data_dir, exist_ok=True)
+
+        except IOError as e:
+            raise ConnectionException(self, str(e))
+
+    # noinspection PyMethodMayBeStatic
+    def _build_column(self, resource: Resource) -> str:
+        return resource.get("column", default=resource.key)
+
+    def read(
+        self,
+        resources: Resources,
+        start: Optional[TimestampType] = None,
+        end: Optional[TimestampType] = None,
+    ) -> pd.DataFrame:
+        start = _to_utc(start)
+        end = _to_utc(end)
+
+        data = []
+        try:
+            for group, group_resources in resources.groupby("group"):
+                columns = {self._build_column(r): r.id for r in group_resources}
+                group_data = []
+                for lower, upper, path in self._get_partitions(group, start, end):
+                    partition_data = self._read_partition(path, upper, list(columns.keys()), start, end)
+                    if partition_data is not None and not partition_data.empty:
+                        group_data.append(partition_data)
+                if len(group_data) == 0:
+                    continue
+                group_data = pd.concat(group_data, axis="index") if len(group_data) > 1 else group_data[0]
+                data.append(group_data.rename(columns=columns))
+
+        except (IOError, pa.ArrowException) as e:
+            raise ConnectionException(self, str(e))
+
+        if len(data) == 0:
+            return pd.DataFrame()
+        if len(data) == 1:
+            return data[0]
+        return pd.concat(data, axis="columns")
+
+    def read_first(self, resources: Resources) -> Optional[pd.DataFrame]:
+        index = self._run_read_first_index(resources)
+        if index is None:
+            return None
+        return self._run_read(resources, start=index, end=index)
+
+    def read_last(self, resources: Resources) -> Optional[pd.DataFrame]:
+        index = self._run_read_last_index(resources)
+        if index is None:
+            return None
+        return self._run_read(resources, start=index, end=index)
+
+    def read_first_index(self, resources: Resources) -> Optional[pd.Timestamp]:
+        indexes = self._read_boundary_indexes(resources, "first")
+        if len(indexes) == 0:
+            return None
+        return min(indexes)
+
+    def read_last_index(self, resources: Resources) -> Optional[pd.Timestamp]:
+        indexes = self._read_boundary_indexes(resources, "last")
+        if len(indexes) == 0:
+            return None
+        return max(indexes)
+
+    def _read_boundary_indexes(self, resources: Resources, mode: Literal["first", "last"]) -> List[pd.Timestamp]:
+        if mode not in ["first", "last"]:
+            raise ValueError(f"Invalid mode '{mode}'")
+        indexes = []
+        try:
+            for group, group_resources in resources.groupby("group"):
+                columns = [self._build_column(r) for r in group_resources]
+                partitions = self._get_partitions(group)
+                if mode == "last":
+                    partitions = reversed(partitions)
+                for _, upper, path in partitions:
+                    index = self._read_boundary_index(path, upper, columns, mode)
+                    if index is not None:
+                        indexes.append(index)
+                        break
+
+        except (IOError, pa.ArrowException) as e:
+            raise ConnectionException(self, str(e))
+        return indexes
+
+    def _read_boundary_index(
+        self,
+        path: str,
+        upper: pd.Timestamp,
+        columns: List[str],
+        mode: Literal["first", "last"],
+    ) -> Optional[pd.Timestamp]:
+        file = pq.ParquetFile(path, memory_map=self._is_immutable(upper))
+        schema = file.schema_arrow
+        columns = [c for c in columns if c in schema.names]
+        if len(columns) == 0:
+            return None
+
+        # Locate the boundary row group from the statistics of the file metadata,
+        # and only read it if the requested columns do not cover all values
+        index_position = schema.get_field_index(self.index_column)
+        covers_all = all(n in columns for n in schema.names if n != self.index_column)
+        row_groups = range(file.metadata.num_row_groups)
+        if mode == "last":
+            row_groups = reversed(row_groups)
+        for row_group in row_groups:
+            metadata = file.metadata.row_group(row_group)
+            if metadata.num_rows == 0:
+                continue
+            statistics = [metadata.column(schema.get_field_index(c)).statistics for c in columns]
+            if all(s is not None and s.has_null_count and s.null_count == metadata.num_rows for s in statistics):
+                continue
+
+            index_statistics = metadata.column(index_position).statistics
+            if covers_all and index_statistics is not None and index_statistics.has_min_max:
+                return _to_utc(index_statistics.min if mode == "first" else index_statistics.max)
+
+            data = file.read_row_group(row_group, columns=[self.index_column, *columns]).to_pandas()
+            data = data.dropna(subset=columns, how="all")
+            if data.empty:
+                continue
+            return _to_utc(data[self.index_column].min() if mode == "first" else data[self.index_column].max())
+        return None
+
+    def exists(
+        self,
+        resources: Resources,
+        start: Optional[TimestampType] = None,
+        end: Optional[TimestampType] = None,
+    ) -> bool:
+        start = _to_utc(start)
+        end = _to_utc(end)
+        try:
+            for group, group_resources in resources.groupby("group"):
+                columns = [self._build_column(r) for r in group_resources]
+                for _, upper, path in self._get_partitions(group, start, end):
+                    if self._exists_partition(path, upper, columns, start, end):
+                        return True
+
+        except (IOError, pa.ArrowException) as e:
+            raise ConnectionException(self, str(e))
+        return False
+
+    def _exists_partition(
+        self,
+        path: str,
+        upper: pd.Timestamp,
+        columns: List[str],
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None,
+    ) -> bool:
+        file = pq.ParquetFile(path, memory_map=self._is_immutable(upper))
+        schema = file.schema_arrow
+        columns = [c for c in columns if c in schema.names]
+        if len(columns) == 0:
+            return False
+
+        index_position = schema.get_field_index(self.index_column)
+        for row_group in range(file.metadata.num_row_groups):
+            metadata = file.metadata.row_group(row_group)
+            if metadata.num_rows == 0:
+                continue
+            statistics = [metadata.column(schema.get_field_index(c)).statistics for c in columns]
+            if all(s is not None and s.has_null_count and s.null_count == metadata.num_rows for s in statistics):
+                continue
+
+            index_statistics = metadata.column(index_position).statistics
+            if index_statistics is not None and index_statistics.has_min_max:
+                first = _to_utc(index_statistics.min)
+                last = _to_utc(index_statistics.max)
+                if (start is not None and last < start) or (end is not None and first > end):
+                    continue
+                if (start is None or first >= start) and (end is None or last <= end):
+                    if any(s is not None and s.has_null_count and s.null_count < metadata.num_rows for s in statistics):
+                        return True
+
+            data = file.read_row_group(row_group, columns=[self.index_column, *columns]).to_pandas()
+            data = data.set_index(self.index_column)
+            data = _get_range(data, start, end).dropna(how="all")
+            if not data.empty:
+                return True
+        return False
+
+    def write(self, data: pd.DataFrame) -> None:
+        try:
+            for group, group_resources in self.resources.filter(lambda r: r.id in data.columns).groupby("group"):
+                group_data = data[group_resources.ids].dropna(axis="index", how="all")
+                if group_data.empty:
+                    continue
+                group_data = group_data.rename(columns={r.id: self._build_column(r) for r in group_resources})
+                group_data.index = _to_utc_index(group_data.index)
+
+                partitions = self._floor_partitions(group_data.index)
+                for lower, partition_data in group_data.groupby(partitions):
+                    path = self._build_path(group, lower)
+                    if os.path.isfile(path):
+                        partition_data = partition_data.combine_first(self._read_file(path))
+                    self._write_partition(path, partition_data)
+
+        except (IOError, pa.ArrowException) as e:
+            raise ConnectionException(self, str(e))
+
+    def delete(
+        self,
+        resources: Resources,
+        start: Optional[TimestampType] = None,
+        end: Optional[TimestampType] = None,
+    ) -> None:
+        start = _to_utc(start)
+        end = _to_utc(end)
+        try:
+            for group, group_resources in resources.groupby("group"):
+                columns = [self._build_column(r) for r in group_resources]
+                for lower, upper, path in self._get_partitions(group, start, end):
+                    covers_range = (start is None or start <= lower) and (end is None or end >= upper)
+                    covers_columns = all(n in columns for n in pq.read_schema(path).names if n != self.index_column)
+                    if covers_range and covers_columns:
+                        self._remove_partition(path)
+                        continue
+
+                    data = self._read_file(path)
+                    deletion = _get_range(data, start, end).index
+                    if covers_columns:
+                        data = data.drop(index=deletion)
+                    else:
+                        data.loc[deletion, [c for c in columns if c in data.columns]] = None
+                        data = data.dropna(axis="index", how="all")
+                    if data.empty:
+                        self._remove_partition(path)
+                    else:
+                        self._write_partition(path, data)
+
+        except (IOError, pa.ArrowException) as e:
+            raise ConnectionException(self, str(e))
+
+    def _read_partition(
+        self,
+        path: str,
+        upper: pd.Timestamp,
+        columns: List[str],
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None,
+    ) -> Optional[pd.DataFrame]:
+        memory_map = self._is_immutable(upper)
+        schema = pq.read_schema(path, memory_map=memory_map)
+        columns = [c for c in columns if c in schema.names]
+        if len(columns) == 0:
+            return None
+
+        # Push the range predicate down to skip row groups by their statistics
+        filters = []
+        if start is not None:
+            filters.append((self.index_column, ">=", start))
+        if end is not None:
+            filters.append((self.index_column, "<=", end))
+        table = pq.read_table(
+            path,
+            columns=[self.index_column, *columns],
+            filters=filters if len(filters) > 0 else None,
+            memory_map=memory_map,
+        )
+        data = table.to_pandas().set_index(self.index_column)
+        return data.dropna(axis="index", how="all")
+
+    def _read_file(self, path: str) -> pd.DataFrame:
+        return pq.read_table(path, memory_map=False).to_pandas().set_index(self.index_column)
+
+    def _write_partition(self, path: str, data: pd.DataFrame) -> None:
+        data = data.sort_index()
+        data.index.name = self.index_column
+        table = pa.Table.from_pandas(data.reset_index(), preserve_index=False)
+
+        # Write to a temporary file first, to atomically replace the partition
+        partition_dir = os.path.dirname(path)
+        os.makedirs(partition_dir, exist_ok=True)
+        file, file_path = tempfile.mkstemp(dir=partition_dir, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(file, "wb") as file:
+                pq.write_table(table, file, compression=self.compression, row_group_size=self.row_group_size)
+            os.replace(file_path, path)
+        except BaseException:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
+
+    def _remove_partition(self, path: str) -> None:
+        os.remove(path)
+
+        # Remove empty partition directories up to the data directory
+        partition_dir = os.path.dirname(path)
+        while partition_dir != self._data_dir and len(os.listdir(partition_dir)) == 0:
+            os.rmdir(partition_dir)
+            partition_dir = os.path.dirname(partition_dir)
+
+    def _get_partitions(
+        self,
+        group: str,
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None,
+    ) -> List[Tuple[pd.Timestamp, pd.Timestamp, str]]:
+        """
+        Lists the files of all partitions of a group, that may contain values in the given range, sorted by time.
+
+        """
+        group_dir = os.path.join(self._data_dir, _format_partition("group", group))
+        if not os.path.isdir(group_dir):
+            return []
+
+        partitions = []
+        keys = _PARTITION_KEYS[self.partition]
+        for partition_dir, _, files in os.walk(group_dir):
+            if PARQUET_FILE not in files:
+                continue
+            values = _parse_partition(os.path.relpath(partition_dir, group_dir))
+            if any(k not in values for k in keys):
+                continue
+            lower = pd.Timestamp(
+                year=int(values["year"]),
+                month=int(values.get("month", 1)),
+                day=int(values.get("day", 1)),
+                tz=tz.UTC,
+            )
+            upper = self._next_partition(lower)
+            if (start is not None and upper <= start) or (end is not None and lower > end):
+                continue
+            partitions.append((lower, upper, os.path.join(partition_dir, PARQUET_FILE)))
+        return sorted(partitions, key=lambda p: p[0])
+
+    def _build_path(self, group: str, lower: pd.Timestamp) -> str:
+        keys = _PARTITION_KEYS[self.partition]
+        values = {"year": f"{lower.year:04d}", "month": f"{lower.month:02d}", "day": f"{lower.day:02d}"}
+        return os.path.join(
+            self._data_dir,
+            _format_partition("group", group),
+            *[_format_partition(k, values[k]) for k in keys],
+            PARQUET_FILE,
+        )
+
+    def _floor_partitions(self, index: pd.DatetimeIndex) -> pd.DatetimeIndex:
+        freq = {"year": "Y", "month": "M", "day": "D"}[self.partition]
+        return index.tz_convert(tz.UTC).tz_localize(None).to_period(freq).to_timestamp().tz_localize(tz.UTC)
+
+    def _next_partition(self, lower: pd.Timestamp) -> pd.Timestamp:
+        if self.partition == "year":
+            return lower + pd.DateOffset(years=1)
+        if self.partition == "month":
+            return lower + pd.DateOffset(months=1)
+        return lower + pd.DateOffset(days=1)
+
+    @staticmethod
+    def _is_immutable(upper: pd.Timestamp) -> bool:
+        # Partitions of past periods will not be replaced by regular writes anymore and can safely be memory-mapped
+        return upper <= pd.Timestamp.now(tz.UTC)
+
+
+def _format_partition(key: str, value: str) -> str:
+    return f"{key}={quote(str(value), safe='')}"
+
+
+def _parse_partition(path: str) -> Dict[str, str]:
+    values = {}
+    for part in re.split(r"[\\/]", path):
+        if "=" not in part:
+            continue
+        key, value = part.split("=", 1)
+        values[key] = unquote(value)
+    return values
+
+
+def _get_range(
+    data: pd.DataFrame,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+) -> pd.DataFrame:
+    if start is not None:
+        data = data[data.index >= start]
+    if end is not None:
+        data = data[data.index <= end]
+    return data
+
+
+def _to_utc(timestamp: Optional[TimestampType]) -> Optional[pd.Timestamp]:
+    if timestamp is None or pd.isna(timestamp):
+        return None
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tzinfo is None:
+        return timestamp.tz_localize(tz.UTC)
+    return timestamp.tz_convert(tz.UTC)
+
+
+def _to_utc_index(index: pd.Index) -> pd.DatetimeIndex:
+    index = pd.DatetimeIndex(index)
+    if index.tz is None:
+        return index.tz_localize(tz.UTC)
+    return index.tz_convert(tz.UTC)
@@ -0,0 +1,494 @@
+# -*- coding: utf-8 -*-
+"""
+lori.connectors.ring
+~~~~~~~~~~~~~~~~~~~~
+
+
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pytz as tz
+from lori.connectors import ConnectionException, Database, DatabaseException, register_connector_type
+from lori.core import ConfigurationException, Configurations, Resource, Resources
+from lori.typing import TimestampType
+
+# FIXME: Remove this once Python >= 3.9 is a requirement
+try:
+    from typing import Literal
+
+except ImportError:
+    from typing_extensions import Literal
+
+RING_INDEX = "timestamp"
+
+# Positions of the monotonic record counters, stored next to the records of a ring
+RING_HEAD = 0
+RING_TAIL = 1
+
+
+class Ring:
+    """
+    Pre-allocated ring buffer of fixed-width records, memory-mapped from a NumPy file.
+    Each record holds the timestamp in nanoseconds since the epoch and a 64-bit float value for every column.
+
+    The head and tail are monotonic counters of records, mapped to positions modulo the capacity. Appending
+    bumps the head after the records were written, and overwrites the oldest records when the ring is full.
+
+    """
+
+    records: np.memmap
+    pointers: np.memmap
+
+    _columns: Optional[List[str]] = None
+
+    def __init__(self, path: str, columns: List[str], capacity: int) -> None:
+        self.path = path
+        self._open(columns, capacity)
+
+    def _open(self, columns: List[str], capacity: int) -> None:
+        self._columns = None
+        dtype = np.dtype([(RING_INDEX, "<i8"), *[(c, "<f8") for c in columns]])
+        records_path = f"{self.path}.npy"
+        pointers_path = f"{self.path}.ptr.npy"
+        if os.path.isfile(records_path) and os.path.isfile(pointers_path):
+            records = np.lib.format.open_memmap(records_path, mode="r+")
+            pointers = np.lib.format.open_memmap(pointers_path, mode="r+")
+            if records.shape == (capacity,) and all(c in records.dtype.names for c in columns):
+                self.records = records
+                self.pointers = pointers
+                return
+
+            # Migrate the retained records of rings with a changed capacity or additional columns
+            columns = [
+                *[c for c in records.dtype.names if c != RING_INDEX],
+                *[c for c in columns if c not in records.dtype.names],
+            ]
+            dtype = np.dtype([(RING_INDEX, "<i8"), *[(c, "<f8") for c in columns]])
+            segments = self._segments(records, pointers)
+            if len(segments) > 0:
+                retained = np.concatenate(segments)[-capacity:]
+            else:
+                retained = np.empty(0, dtype=records.dtype)
+            del records, pointers
+        else:
+            retained = None
+
+        migration_path = f"{self.path}.tmp.npy"
+        records = np.lib.format.open_memmap(migration_path, mode="w+", dtype=dtype, shape=(capacity,))
+        records[RING_INDEX] = np.iinfo(np.int64).min
+        for column in columns:
+            records[column] = np.nan
+        count = 0
+        if retained is not None and len(retained) > 0:
+            count = len(retained)
+            for column in retained.dtype.names:
+                records[column][:count] = retained[column]
+        records.flush()
+        del records
+        os.replace(migration_path, records_path)
+
+        pointers = np.lib.format.open_memmap(pointers_path, mode="w+", dtype="<i8", shape=(2,))
+        pointers[RING_HEAD] = count
+        pointers[RING_TAIL] = 0
+        pointers.flush()
+
+        self.records = np.lib.format.open_memmap(records_path, mode="r+")
+        self.pointers = pointers
+
+    @property
+    def capacity(self) -> int:
+        return len(self.records)
+
+    @property
+    def columns(self) -> List[str]:
+        if self._columns is None:
+            self._columns = [c for c in self.records.dtype.names if c != RING_INDEX]
+        return self._columns
+
+    @property
+    def head(self) -> int:
+        return int(self.pointers[RING_HEAD])
+
+    @property
+    def tail(self) -> int:
+        return max(int(self.pointers[RING_TAIL]), self.head - self.capacity)
+
+    def __len__(self) -> int:
+        return self.head - self.tail
+
+    @staticmethod
+    def _segments(records: np.ndarray, pointers: np.ndarray) -> List[np.ndarray]:
+        capacity = len(records)
+        head = int(pointers[RING_HEAD])
+        tail = max(int(pointers[RING_TAIL]), head - capacity)
+        if head == tail:
+            return []
+        start = tail % capacity
+        end = head % capacity
+        if start < end:
+            return [records[start:end]]
+        if end == 0:
+            return [records[start:]]
+        return [records[start:], records[:end]]
+
+    def segments(self) -> List[np.ndarray]:
+        """
+        Returns views of the retained records in chronological order, without copying any data.
+
+        """
+        return self._segments(self.records, self.pointers)
+
+    def first(self) -> Optional[int]:
+        if len(self) == 0:
+            return None
+        return int(self.records[RING_INDEX][self.tail % self.capacity])
+
+    def last(self) -> Optional[int]:
+        if len(self) == 0:
+            return None
+        return int(self.records[RING_INDEX][(self.head - 1) % self.capacity])
+
+    def select(self, start: Optional[int] = None, end: Optional[int] = None) -> List[np.ndarray]:
+        """
+        Returns views of all records in the given range of nanosecond timestamps, located by binary search in
+        every sorted segment of the ring.
+
+        """
+        selection = []
+        for segment in self.segments():
+            index = segment[RING_INDEX]
+            lower = 0 if start is None else int(np.searchsorted(index, start, side="left"))
+            upper = len(index) if end is None else int(np.searchsorted(index, end, side="right"))
+            if lower < upper:
+                selection.append(segment[lower:upper])
+        return selection
+
+    def locate(self, timestamp: int, side: Literal["left", "right"] = "left") -> int:
+        """
+        Locates the monotonic record counter of a nanosecond timestamp.
+
+        """
+        counter = self.tail
+        for segment in self.segments():
+            position = int(np.searchsorted(segment[RING_INDEX], timestamp, side=side))
+            counter += position
+            if position < len(segment):
+                break
+        return counter
+
+    def append(self, index: np.ndarray, columns: List[str], values: np.ndarray) -> None:
+        if len(index) == 0:
+            return
+        last = self.last()
+        if last is not None and index[0] == last:
+            # Complement the latest record with values of other columns, logged for the same timestamp
+            position = (self.head - 1) % self.capacity
+            for column, value in zip(columns, values[0]):
+                if not np.isnan(value):
+                    self.records[column][position] = value
+            index = index[1:]
+            values = values[1:]
+            if len(index) == 0:
+                return
+
+        index = index[-self.capacity :]
+        values = values[-self.capacity :]
+
+        # Build all records at once, to copy them into the ring with a single assignment
+        records = np.empty(len(index), dtype=self.records.dtype)
+        records[RING_INDEX] = index
+        for column in self.columns:
+            records[column] = np.nan
+        for position, column in enumerate(columns):
+            records[column] = values[:, position]
+
+        head = self.head
+        start = head % self.capacity
+        end = start + len(index)
+        if end <= self.capacity:
+            self.records[start:end] = records
+        else:
+            self.records[start:] = records[: self.capacity - start]
+            self.records[: end - self.capacity] = records[self.capacity - start :]
+
+        # Only bump the head pointer after the records were written completely
+        self.pointers[RING_HEAD] = head + len(index)
+
+    def truncate(self, tail: Optional[int] = None, head: Optional[int] = None) -> None:
+        if tail is not None:
+            self.pointers[RING_TAIL] = max(self.tail, min(tail, self.head))
+        if head is not None:
+            self.pointers[RING_HEAD] = max(self.tail, min(head, self.head))
+
+    def flush(self) -> None:
+        self.records.flush()
+        self.pointers.flush()
+
+
+# noinspection PyShadowingBuiltins, PyUnresolvedReferences
+@register_connector_type("ring")
+class RingDatabase(Database):
+    """
+    Database for high frequency logging, storing every group of resources in a pre-allocated, memory-mapped ring
+    of fixed-width records. Appending only writes the records and bumps a pointer, while the oldest records are
+    overwritten when the capacity of a ring is reached.
+
+    """
+
+    _rings: Dict[str, Ring]
+    _layouts: Dict[Tuple[str, ...], List[Tuple[str, List[int], List[str]]]]
+    _data_dir: str
+    _connected: bool = False
+
+    capacity: int = 100000
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._rings = {}
+        self._layouts = {}
+
+    def configure(self, configs: Configurations) -> None:
+        super().configure(configs)
+
+        data_dir = configs.get("dir", default=None)
+        if data_dir is not None:
+            if "~" in data_dir:
+                data_dir = os.path.expanduser(data_dir)
+            if not os.path.isabs(data_dir):
+                data_dir = os.path.join(configs.dirs.data, data_dir)
+        else:
+            data_dir = os.path.join(configs.dirs.data, "ring")
+        self._data_dir = data_dir
+
+        # Number of records retained per group of resources
+        self.capacity = configs.get_int("capacity", default=RingDatabase.capacity)
+        if self.capacity < 1:
+            raise ConfigurationException(f"Invalid ring capacity: {self.capacity}")
+
+    def is_connected(self) -> bool:
+        return self._connected and os.path.isdir(self._data_dir)
+
+    def connect(self, resources: Resources) -> None:
+        self._layouts = {}
+        try:
+            os.makedirs(self._data_dir, exist_ok=True)
+            for group, group_resources in resources.groupby("group"):
+                self._open_ring(group, [self._build_column(r) for r in group_resources])
+            self._connected = True
+
+        except (IOError, ValueError) as e:
+            raise ConnectionException(self, str(e))
+
+    def disconnect(self) -> None:
+        for ring in self._rings.values():
+            ring.flush()
+        self._rings = {}
+        self._connected = False
+
+    def _open_ring(self, group: str, columns: List[str]) -> Ring:
+        ring = self._rings.get(group, None)
+        if ring is not None and all(c in ring.columns for c in columns):
+            return ring
+        if ring is not None:
+            ring.flush()
+            columns = [*ring.columns, *[c for c in columns if c not in ring.columns]]
+
+        ring = Ring(os.path.join(self._data_dir, _format_key(group)), columns, self.capacity)
+        self._rings[group] = ring
+        return ring
+
+    # noinspection PyMethodMayBeStatic
+    def _build_column(self, resource: Resource) -> str:
+        return resource.get("column", default=resource.key)
+
+    def _get_ring(self, group: str) -> Optional[Ring]:
+        return self._rings.get(group, None)
+
+    def read(
+        self,
+        resources: Resources,
+        start: Optional[TimestampType] = None,
+        end: Optional[TimestampType] = None,
+    ) -> pd.DataFrame:
+        start = _to_nanoseconds(start)
+        end = _to_nanoseconds(end)
+
+        data = []
+        for group, group_resources in resources.groupby("group"):
+            ring = self._get_ring(group)
+            if ring is None:
+                continue
+            group_data = self._extract(ring, group_resources, ring.select(start, end))
+            if not group_data.empty:
+                data.append(group_data)
+
+        if len(data) == 0:
+            return pd.DataFrame()
+        if len(data) == 1:
+            return data[0]
+        return pd.concat(data, axis="columns")
+
+    def read_first(self, resources: Resources) -> Optional[pd.DataFrame]:
+        index = self._run_read_first_index(resources)
+        if index is None:
+            return None
+        return self._run_read(resources, start=index, end=index)
+
+    def read_last(self, resources: Resources) -> Optional[pd.DataFrame]:
+        index = self._run_read_last_index(resources)
+        if index is None:
+            return None
+        return self._run_read(resources, start=index, end=index)
+
+    def read_first_index(self, resources: Resources) -> Optional[pd.Timestamp]:
+        indexes = self._read_boundary_indexes(resources, "first")
+        if len(indexes) == 0:
+            return None
+        return min(indexes)
+
+    def read_last_index(self, resources: Resources) -> Optional[pd.Timestamp]:
+        indexes = self._read_boundary_indexes(resources, "last")
+        if len(indexes) == 0:
+            return None
+        return max(indexes)
+
+    def _read_boundary_indexes(self, resources: Resources, mode: Literal["first", "last"]) -> List[pd.Timestamp]:
+        if mode not in ["first", "last"]:
+            raise ValueError(f"Invalid mode '{mode}'")
+        indexes = []
+        for group, group_resources in resources.groupby("group"):
+            ring = self._get_ring(group)
+            if ring is None:
+                continue
+            columns = [c for c in (self._build_column(r) for r in group_resources) if c in ring.columns]
+            if len(columns) == 0:
+                continue
+
+            segments = ring.segments()
+            if mode == "last":
+                segments = reversed(segments)
+            for segment in segments:
+                valid = np.zeros(len(segment), dtype=bool)
+                for column in columns:
+                    valid |= ~np.isnan(segment[column])
+                valid = np.flatnonzero(valid)
+                if len(valid) > 0:
+                    index = segment[RING_INDEX][valid[0] if mode == "first" else valid[-1]]
+                    indexes.append(pd.Timestamp(int(index), unit="ns", tz=tz.UTC))
+                    break
+        return indexes
+
+    def write(self, data: pd.DataFrame) -> None:
+        try:
+            values = data.to_numpy(dtype=np.float64, na_value=np.nan)
+        except (TypeError, ValueError) as e:
+            raise DatabaseException(self, f"Unable to store non-numeric values: {str(e)}")
+        index = _to_nanoseconds_index(data.index)
+        order = np.argsort(index, kind="stable")
+        index = index[order]
+        values = values[order]
+
+        for group, positions, columns in self._get_layout(data.columns):
+            group_values = values[:, positions]
+            group_valid = ~np.isnan(group_values).all(axis=1)
+            group_index = index[group_valid]
+            group_values = group_values[group_valid]
+
+            # Rings only append records in chronological order, dropping values older than the latest record
+            ring = self._open_ring(group, columns)
+            last = ring.last()
+            if last is not None and len(group_index) > 0 and group_index[0] < last:
+                valid = group_index >= last
+                self._logger.debug(
+                    f"Dropping {int((~valid).sum())} values of group '{group}' older than the latest record"
+                )
+                group_index = group_index[valid]
+                group_values = group_values[valid]
+            ring.append(group_index, columns, group_values)
+
+    def _get_layout(self, columns: pd.Index) -> List[Tuple[str, List[int], List[str]]]:
+        """
+        Maps the columns of written data to the groups and record columns of rings, cached by the data columns
+        to keep the overhead of frequent small writes low.
+
+        """
+        key = tuple(columns)
+        layout = self._layouts.get(key, None)
+        if layout is None:
+            positions = {c: i for i, c in enumerate(columns)}
+            layout = [
+                (group, [positions[r.id] for r in group_resources], [self._build_column(r) for r in group_resources])
+                for group, group_resources in self.resources.filter(lambda r: r.id in positions).groupby("group")
+            ]
+            self._layouts[key] = layout
+        return layout
+
+    def delete(
+        self,
+        resources: Resources,
+        start: Optional[TimestampType] = None,
+        end: Optional[TimestampType] = None,
+    ) -> None:
+        start = _to_nanoseconds(start)
+        end = _to_nanoseconds(end)
+        for group, group_resources in resources.groupby("group"):
+            ring = self._get_ring(group)
+            if ring is None or len(ring) == 0:
+                continue
+            columns = [c for c in (self._build_column(r) for r in group_resources) if c in ring.columns]
+            if len(columns) == 0:
+                continue
+
+            # Rotations of all columns only move the tail or head pointer of the ring
+            if all(c in columns for c in ring.columns):
+                if start is None or start <= ring.first():
+                    ring.truncate(tail=ring.head if end is None else ring.locate(end, "right"))
+                    continue
+                if end is None or end >= ring.last():
+                    ring.truncate(head=ring.locate(start, "left"))
+                    continue
+
+            for segment in ring.select(start, end):
+                for column in columns:
+                    segment[column] = np.nan
+
+    # noinspection PyMethodMayBeStatic
+    def _extract(self, ring: Ring, resources: Resources, segments: List[np.ndarray]) -> pd.DataFrame:
+        columns = {self._build_column(r): r.id for r in resources}
+        columns = {c: i for c, i in columns.items() if c in ring.columns}
+        if len(segments) == 0 or len(columns) == 0:
+            return pd.DataFrame()
+
+        # Copy the selected records only once, as they may be overwritten by later appends
+        records = np.concatenate(segments) if len(segments) > 1 else segments[0]
+        index = pd.DatetimeIndex(records[RING_INDEX].astype("datetime64[ns]")).tz_localize(tz.UTC)
+        index.name = RING_INDEX
+        data = pd.DataFrame({i: np.array(records[c], copy=True) for c, i in columns.items()}, index=index)
+        return data.dropna(axis="index", how="all")
+
+
+def _format_key(key: str) -> str:
+    return re.sub(r"\W", "_", key).lower()
+
+
+def _to_nanoseconds(timestamp: Optional[TimestampType]) -> Optional[int]:
+    if timestamp is None or pd.isna(timestamp):
+        return None
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize(tz.UTC)
+    return int(timestamp.value)
+
+
+def _to_nanoseconds_index(index: pd.Index) -> np.ndarray:
+    index = pd.DatetimeIndex(index)
+    if index.tz is None:
+        index = index.tz_localize(tz.UTC)
+    return index.tz_convert(tz.UTC).to_numpy(dtype="datetime64[ns]").view(np.int64)
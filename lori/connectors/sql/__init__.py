@@ -17,6 +17,8 @@ from .index import DatetimeIndexType  # noqa: F401
 
 from .table import Table  # noqa: F401
 
+from .narrow import NarrowTable  # noqa: F401
+
 from .schema import Schema  # noqa: F401
 
 from .database import SqlDatabase  # noqa: F401
@@ -8,8 +8,9 @@ lori.connectors.sql.database
 
 from __future__ import annotations
 
+import os
 from collections import OrderedDict
-from typing import Any, Dict, Iterator, Mapping, Optional
+from typing import Any, Dict, Iterator, List, Mapping, Optional
 
 from sqlalchemy import Connection, Dialect, Engine, create_engine, text
 from sqlalchemy.exc import SQLAlchemyError
@@ -17,11 +18,11 @@ from sqlalchemy.exc import SQLAlchemyError
 import pandas as pd
 import pytz as tz
 from lori.connectors import ConnectionException, Database, DatabaseException, register_connector_type
-from lori.connectors.sql import Schema, Table
+from lori.connectors.sql import DatetimeIndexType, Schema, Table, sqlite
 from lori.core import ConfigurationException, Configurations, Resources
 from lori.data.util import hash_value
 from lori.typing import TimestampType
-from lori.util import to_timezone
+from lori.util import parse_freq, to_timedelta, to_timezone
 
 # FIXME: Remove this once Python >= 3.9 is a requirement
 try:
@@ -42,6 +43,10 @@ class SqlDatabase(Database, Mapping[str, Table]):
     password: str
     database: str
 
+    batch: Optional[int] = None
+
+    _interval_health: pd.Timedelta = pd.Timedelta(seconds=30)
+
     engine: Engine
     _schema: Schema
     _connection: Connection = None
@@ -72,7 +77,11 @@ class SqlDatabase(Database, Mapping[str, Table]):
         return False
 
     def __getitem__(self, name: str) -> Table:
-        return self.__tables[name]
+        table = self.__tables[name]
+        if not self._schema.is_bound(table):
+            # Tables will be created or validated lazily on first use
+            self._schema.bind(self.connection, table)
+        return table
 
     # noinspection PyShadowingBuiltins, PyProtectedMember
     def _get_vars(self) -> Dict[str, Any]:
@@ -80,9 +89,10 @@ class SqlDatabase(Database, Mapping[str, Table]):
         vars.pop("_schema", None)
         if self.is_configured():
             vars["dialect"] = self.dialect.name
-            vars["host"] = self.host
-            vars["port"] = self.port
-            vars["user"] = self.user
+            if self.dialect.name != "sqlite":
+                vars["host"] = self.host
+                vars["port"] = self.port
+                vars["user"] = self.user
             vars["database"] = self.database
         vars["tables"] = f"[{', '.join(c.name for c in self.__tables.values())}]"
         return vars
@@ -98,8 +108,13 @@ class SqlDatabase(Database, Mapping[str, Table]):
 
         self.database = configs.get("database")
 
+        # Maximum number of rows to be inserted per statement, if configured
+        self.batch = configs.get_int("batch", default=None)
+
         dialect = configs.get("dialect").lower()
-        if dialect == "mysql":
+        if dialect == "sqlite":
+            self.database = self._build_path(configs)
+        elif dialect == "mysql":
             prefix = "mysql+pymysql://"
         elif dialect == "mariadb":
             prefix = "mariadb+pymysql://"
@@ -108,20 +123,54 @@ class SqlDatabase(Database, Mapping[str, Table]):
         else:
             raise ConfigurationException(f"Unsupported database type: {dialect}")
         try:
-            self.engine = create_engine(
-                url=f"{prefix}{self.user}:{self.password}@{self.host}:{self.port}/{self.database}",
-                pool_recycle=-1,
-            )
+            if dialect == "sqlite":
+                self.engine = create_engine(
+                    url=f"sqlite:///{self.database}",
+                    # Connection access is serialized by the connector lock, but shared between executor threads
+                    connect_args={"check_same_thread": False},
+                    pool_recycle=-1,
+                )
+                sqlite.register_engine(
+                    self.engine,
+                    journal_mode=configs.get("journal_mode", default="WAL").upper(),
+                    synchronous=configs.get("synchronous", default="NORMAL").upper(),
+                    timeout=configs.get_float("timeout", default=None),
+                )
+            else:
+                self.engine = create_engine(
+                    url=f"{prefix}{self.user}:{self.password}@{self.host}:{self.port}/{self.database}",
+                    pool_recycle=-1,
+                )
             self.dialect = self.engine.dialect
 
-            self._schema = Schema(self.dialect)
+            # Persist the fingerprints of validated tables, to skip validating unchanged tables after restarts
+            schema_cache = None
+            if configs.get_bool("schema_cache", default=True):
+                schema_cache = os.path.join(configs.dirs.tmp, f"{self.id}.schema.json")
+
+            self._schema = Schema(self.dialect, cache=schema_cache)
             self._schema.configure(configs.get_section("tables", defaults={}))
 
         except SQLAlchemyError as e:
             raise ConfigurationException(f"Unable to create database engine: {str(e)}")
 
+    @staticmethod
+    def _build_path(configs: Configurations) -> str:
+        path = configs.get("file", default=configs.get("database", default=f"{configs.key}.db"))
+        if "~" in path:
+            path = os.path.expanduser(path)
+        if not os.path.isabs(path):
+            path = os.path.join(configs.dirs.data, path)
+        return path
+
     def connect(self, resources: Resources) -> None:
-        self._logger.debug(f"Connecting to {self.dialect.name} database {self.database}@{self.host}:{self.port}")
+        if self.dialect.name == "sqlite":
+            self._logger.debug(f"Connecting to {self.dialect.name} database {self.database}")
+            database_dir = os.path.dirname(self.database)
+            if not os.path.isdir(database_dir):
+                os.makedirs(database_dir, exist_ok=True)
+        else:
+            self._logger.debug(f"Connecting to {self.dialect.name} database {self.database}@{self.host}:{self.port}")
         try:
             self._connection = self.engine.connect()
 
@@ -131,7 +180,7 @@ class SqlDatabase(Database, Mapping[str, Table]):
             if self._select_timezone().utcoffset(now).seconds != 0:
                 raise DatabaseException(self, "Error setting connection timezone to UTC")
 
-            self.__tables = self._schema.connect(self.engine, resources)
+            self.__tables = self._schema.connect(resources)
 
         except SQLAlchemyError as e:
             self._raise(e)
@@ -146,8 +195,9 @@ class SqlDatabase(Database, Mapping[str, Table]):
             query = "SHOW TIMEZONE"
         elif self.dialect.name in ("mariadb", "mysql"):
             query = "SELECT @@session.time_zone"
-        # elif self.dialect.name == 'sqlite':
-        #     query = "SELECT datetime('now')"
+        elif self.dialect.name == "sqlite":
+            # SQLite has no session timezone and all datetime values are stored as naive UTC timestamps
+            return tz.UTC
         else:
             raise NotImplementedError(f"Timezone setting not implemented for dialect: {self.dialect.name}")
         try:
@@ -160,6 +210,11 @@ class SqlDatabase(Database, Mapping[str, Table]):
             raise RuntimeError(f"Error fetching timezone: {e}")
 
     def _set_timezone(self, timezone: tz.BaseTzInfo) -> None:
+        if self.dialect.name == "sqlite":
+            if pd.Timestamp.now(timezone).utcoffset().total_seconds() != 0:
+                raise NotImplementedError(f"Timezone setting not implemented for dialect: {self.dialect.name}")
+            return
+
         # tz_offset = pd.Timestamp.now(timezone).strftime("%:z")
         tz_offset = pd.Timestamp.now(timezone).strftime("%z")
         tz_offset = tz_offset[:3] + ":" + tz_offset[3:]
@@ -191,13 +246,11 @@ class SqlDatabase(Database, Mapping[str, Table]):
 
                     table = self.get(table_name)
                     select = table.hash(table_resources, start, end, method=method)
-                    result = self.connection.execute(select)
+                    result = self.connection.execute(select, table.range_params(start, end))
 
-                    # noinspection PyTypeChecker
-                    if result.rowcount < 1:
+                    table_hashes = [r[0] for r in result.fetchall() if r[0] is not None]
+                    if len(table_hashes) < 1:
                         continue
-
-                    table_hashes = [r[0] for r in result.fetchall()]
                     if len(table_hashes) > 1:
                         table_hash = hash_value(",".join(table_hashes), method, encoding)
                     else:
@@ -214,6 +267,60 @@ class SqlDatabase(Database, Mapping[str, Table]):
 
         return hash_value(",".join(hashes), method, encoding)
 
+    # noinspection PyShadowingBuiltins
+    def hash_buckets(
+        self,
+        resources: Resources,
+        start: Optional[TimestampType] = None,
+        end: Optional[TimestampType] = None,
+        freq: str = "h",
+        method: Literal["MD5", "SHA1", "SHA256", "SHA512"] = "MD5",
+        encoding: str = "UTF-8",
+    ) -> Optional[pd.Series]:
+        bucket_freq = to_timedelta(parse_freq(freq))
+        if not isinstance(bucket_freq, pd.Timedelta):
+            raise ValueError(f"Invalid hash bucket frequency of variable length: {freq}")
+
+        buckets = OrderedDict()
+        try:
+            for table_schema, schema_resources in resources.groupby("schema"):
+                for table_name, table_resources in schema_resources.groupby(lambda c: c.get("table", default=c.group)):
+                    if table_name not in self.__tables:
+                        raise DatabaseException(self, f"Table '{table_name}' not available")
+
+                    table = self.get(table_name)
+                    try:
+                        select = table.hash_buckets(
+                            table_resources, start, end, int(bucket_freq.total_seconds()), method=method
+                        )
+                    except ValueError as e:
+                        # Hash the buckets of tables without a unix timestamp index on the client
+                        self._logger.debug(f"Reading buckets of table '{table_name}' to hash them: {e}")
+                        return super().hash_buckets(resources, start, end, freq, method, encoding)
+
+                    result = self.connection.execute(select, table.range_params(start, end))
+                    for bucket, bucket_hash in result.fetchall():
+                        if bucket_hash is not None:
+                            buckets.setdefault(int(bucket), []).append(bucket_hash)
+
+        except SQLAlchemyError as e:
+            self._raise(e)
+
+        if len(buckets) == 0:
+            return None
+
+        # Combine the bucket hashes of several tables on the client, in order of the tables
+        hashes = pd.Series(
+            {
+                pd.Timestamp(b, unit="s", tz=tz.UTC): h[0] if len(h) == 1 else hash_value(",".join(h), method, encoding)
+                for b, h in sorted(buckets.items())
+            },
+            name="hash",
+            dtype=object,
+        )
+        hashes.index.name = "timestamp"
+        return hashes
+
     def exists(
         self,
         resources: Resources,
@@ -228,10 +335,11 @@ class SqlDatabase(Database, Mapping[str, Table]):
 
                     table = self.get(table_name)
                     select = table.exists(table_resources, start, end)
-                    result = self.connection.execute(select)
+                    result = self.connection.execute(select, table.range_params(start, end))
 
+                    # Some drivers like SQLite do not provide the row count of selects and return -1 instead
                     # noinspection PyTypeChecker
-                    if result.rowcount < 1:
+                    if result.rowcount == 0:
                         continue
                     count = result.scalar()
                     if count is None or int(count) > 1:
@@ -257,12 +365,12 @@ class SqlDatabase(Database, Mapping[str, Table]):
 
                     table = self.get(table_key)
                     if start is None and end is None:
-                        select = table.read(table_resources, order_by="desc").limit(1)
+                        select = table.read(table_resources, order_by="desc", limit=1)
                     else:
                         select = table.read(table_resources, start, end)
 
-                    result = self.connection.execute(select)
-                    if result.rowcount > 0:
+                    result = self.connection.execute(select, table.range_params(start, end))
+                    if result.rowcount != 0:
                         result_data = table.extract(table_resources, result)
                         if not result_data.empty:
                             results.append(result_data)
@@ -284,9 +392,9 @@ class SqlDatabase(Database, Mapping[str, Table]):
                         raise DatabaseException(self, f"Table '{table_name}' not available")
 
                     table = self.get(table_name)
-                    select = table.read(table_resources, order_by="asc").limit(1)
+                    select = table.read(table_resources, order_by="asc", limit=1)
                     result = self.connection.execute(select)
-                    if result.rowcount > 0:
+                    if result.rowcount != 0:
                         result_data = table.extract(table_resources, result)
                         if not result_data.empty:
                             results.append(result_data)
@@ -308,9 +416,9 @@ class SqlDatabase(Database, Mapping[str, Table]):
                         raise DatabaseException(self, f"Table '{table_name}' not available")
 
                     table = self.get(table_name)
-                    select = table.read(table_resources, order_by="desc").limit(1)
+                    select = table.read(table_resources, order_by="desc", limit=1)
                     result = self.connection.execute(select)
-                    if result.rowcount > 0:
+                    if result.rowcount != 0:
                         result_data = table.extract(table_resources, result)
                         if not result_data.empty:
                             results.append(result_data)
@@ -322,6 +430,56 @@ class SqlDatabase(Database, Mapping[str, Table]):
         results = sorted(results, key=lambda d: min(d.index))
         return pd.concat(results, axis="columns")
 
+    def read_first_index(self, resources: Resources) -> Optional[pd.Timestamp]:
+        indexes = self._read_indexes(resources, "first")
+        if len(indexes) == 0:
+            return None
+        return min(indexes)
+
+    def read_last_index(self, resources: Resources) -> Optional[pd.Timestamp]:
+        indexes = self._read_indexes(resources, "last")
+        if len(indexes) == 0:
+            return None
+        return max(indexes)
+
+    # noinspection PyUnresolvedReferences, PyTypeChecker
+    def _read_indexes(self, resources: Resources, mode: Literal["first", "last"]) -> List[pd.Timestamp]:
+        if mode not in ["first", "last"]:
+            raise ValueError(f"Invalid mode '{mode}'")
+        indexes = []
+        try:
+            for table_schema, schema_resources in resources.groupby("schema"):
+                for table_name, table_resources in schema_resources.groupby(lambda c: c.get("table", default=c.group)):
+                    table_key = table_name if table_schema is None else f"{table_schema}.{table_name}"
+                    if table_key not in self.__tables:
+                        raise DatabaseException(self, f"Table '{table_key}' not available")
+
+                    table = self.get(table_key)
+                    if table.datetime_index_type in (
+                        DatetimeIndexType.DATETIME,
+                        DatetimeIndexType.TIMESTAMP,
+                        DatetimeIndexType.TIMESTAMP_UNIX,
+                    ):
+                        if mode == "first":
+                            select = table.first_index(table_resources)
+                        else:
+                            select = table.last_index(table_resources)
+                        index = table.extract_index(self.connection.execute(select))
+                        if index is not None:
+                            indexes.append(index)
+                        continue
+
+                    # Fall back to select the boundary row for tables with composite or without datetime indexes
+                    select = table.read(table_resources, order_by="asc" if mode == "first" else "desc", limit=1)
+                    result = self.connection.execute(select)
+                    if result.rowcount != 0:
+                        result_data = table.extract(table_resources, result)
+                        if not result_data.empty:
+                            indexes.append(min(result_data.index) if mode == "first" else max(result_data.index))
+        except SQLAlchemyError as e:
+            self._raise(e)
+        return indexes
+
     # noinspection PyTypeChecker
     def write(self, data: pd.DataFrame) -> None:
         try:
@@ -334,15 +492,31 @@ class SqlDatabase(Database, Mapping[str, Table]):
                     if table_data.empty:
                         continue
                     table = self.get(table_name)
-                    insert = table.write(table_resources, table_data)
-                    self._logger.debug(insert)
-                    self.connection.execute(insert)
+                    partitioning = self._schema.get_partitioning(table)
+                    if partitioning is not None:
+                        partitioning.create(self.connection, table, table_data.index.min(), table_data.index.max())
+                    for batch_data in self._batch(table, table_resources, table_data):
+                        insert = table.write(table_resources, batch_data)
+                        self._logger.debug(insert)
+                        self.connection.execute(insert)
 
             self.connection.commit()
 
         except SQLAlchemyError as e:
             self._raise(e)
 
+    # noinspection PyProtectedMember
+    def _batch(self, table: Table, resources: Resources, data: pd.DataFrame) -> Iterator[pd.DataFrame]:
+        batch = self.batch
+        if self.dialect.name == "sqlite":
+            batch_max = max(sqlite.MAX_VARIABLES // table._count_values(resources), 1)
+            batch = batch_max if batch is None else min(batch, batch_max)
+        if batch is None or len(data) <= batch:
+            yield data
+            return
+        for batch_start in range(0, len(data), batch):
+            yield data.iloc[batch_start : batch_start + batch]
+
     def delete(
         self,
         resources: Resources,
@@ -356,8 +530,12 @@ class SqlDatabase(Database, Mapping[str, Table]):
                         raise DatabaseException(self, f"Table '{table_name}' not available")
                     table = self.get(table_name)
                     delete = table.delete(table_resources, start, end)
+                    partitioning = self._schema.get_partitioning(table)
+                    if partitioning is not None and table.covers_all(table_resources):
+                        # Drop whole partitions aligned with the range instead of deleting their rows
+                        partitioning.drop(self.connection, table, start, end)
                     self._logger.debug(delete)
-                    self.connection.execute(delete)
+                    self.connection.execute(delete, table.range_params(start, end))
 
             self.connection.commit()
 
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+lori.connectors.sql.narrow
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Optional
+
+import sqlalchemy as sql
+from sqlalchemy import ClauseElement, Index, Result, Subquery
+from sqlalchemy.sql import Delete, Insert, Select, and_, asc, case, desc, func
+from sqlalchemy.types import DATETIME, TIMESTAMP
+
+import pandas as pd
+import pytz as tz
+from lori.connectors.sql.columns import Column
+from lori.connectors.sql.index import DatetimeIndexType
+from lori.connectors.sql.table import Table
+from lori.core import Resource, ResourceException, Resources
+from lori.typing import TimestampType
+
+# FIXME: Remove this once Python >= 3.9 is a requirement
+try:
+    from typing import Literal
+
+except ImportError:
+    from typing_extensions import Literal
+
+
+class NarrowTable(Table):
+    """
+    Table with a narrow (long) layout, storing a row of the datetime index, the channel identifier and the value
+    for each logged value, instead of a column for each channel.
+    Channels can be added without altering the table schema and sparse channels do not need to store NULL values.
+
+    """
+
+    channel: Column
+    value: Column
+
+    def __init__(
+        self,
+        name: str,
+        *args,
+        channel: str = "channel_id",
+        value: str = "value",
+        **kwargs,
+    ) -> None:
+        super().__init__(name, *args, **kwargs)
+        self.channel = self.columns[channel]
+        self.value = self.columns[value]
+        if self.datetime_index_type not in (
+            DatetimeIndexType.DATETIME,
+            DatetimeIndexType.TIMESTAMP,
+            DatetimeIndexType.TIMESTAMP_UNIX,
+        ):
+            raise ResourceException(f"Invalid index of narrow table '{name}': {self.datetime_index_type}")
+
+        # Per channel range scans use the composite index, as the primary key is ordered by the datetime index
+        index_name = f"{name}_{self.channel.name}_index"
+        if not any(i.name == index_name for i in self.indexes):
+            Index(index_name, self.channel, self.primary_index)
+
+    @staticmethod
+    def get_channel(resource: Resource) -> str:
+        return resource.get("channel", default=resource.id)
+
+    def _get_channels(self, resources: Resources) -> Dict[str, str]:
+        return {self.get_channel(r): r.id for r in resources}
+
+    # noinspection PyTypeChecker
+    def _surrogate_clauses(self, resources: Resources) -> List[ClauseElement]:
+        return [self.channel.in_(list(self._get_channels(resources).keys()))]
+
+    def covers_all(self, resources: Resources) -> bool:
+        # Unknown channels of other resources may be stored in the same table
+        return False
+
+    def _count_values(self, resources: Resources) -> int:
+        return len(self.columns) * max(len(resources), 1)
+
+    def _select_index(self, resources: Resources, function: Callable[[Column], ClauseElement]) -> Select:
+        primary_index = self.primary_index
+        query = sql.select(function(primary_index).label(primary_index.name))
+        return query.where(and_(*self._primary_clauses(resources), self.value.is_not(None)))
+
+    def _exists(
+        self,
+        resources: Resources,
+        start: Optional[TimestampType] = None,
+        end: Optional[TimestampType] = None,
+    ) -> Select:
+        query = sql.select(func.count().label("count")).select_from(self)
+        return query.where(and_(*self._primary_clauses(resources, start, end), self.value.is_not(None)))
+
+    # noinspection PyShadowingBuiltins, PyArgumentList
+    def _hash_range(
+        self,
+        resources: Resources,
+        start: Optional[TimestampType],
+        end: Optional[TimestampType],
+        method: Callable[[ClauseElement], ClauseElement],
+    ) -> Subquery:
+        primary_index = self.primary_index
+        if primary_index.type == DATETIME or isinstance(primary_index.type, DATETIME):
+            raise ValueError(
+                f"Unable to generate consistent hashes for table '{self.name}' "
+                f"with DATETIME index: {primary_index.name}",
+            )
+        if primary_index.type == TIMESTAMP or isinstance(primary_index.type, TIMESTAMP):
+            index = func.unix_timestamp(primary_index)
+        else:
+            index = primary_index
+
+        # Pivot the values of every index to a row in order of the resources, to hash the same rows as wide tables
+        values = [
+            func.max(case((self.channel == channel, self.value))).label(f"value_{i}")
+            for i, channel in enumerate(self._get_channels(resources).keys())
+        ]
+        select = sql.select(index.label(primary_index.name), *values)
+        select = select.where(and_(*self._primary_clauses(resources, start, end), self.value.is_not(None)))
+        select = select.group_by(primary_index)
+        select = select.order_by(asc(primary_index))
+        return select.subquery(name="hash_range")
+
+    def _read(
+        self,
+        resources: Resources,
+        start: Optional[TimestampType] = None,
+        end: Optional[TimestampType] = None,
+        order_by: Literal["asc", "desc"] = "asc",
+        limit: Optional[int] = None,
+    ) -> Select:
+        if order_by not in ["asc", "desc"]:
+            raise ValueError(f"Unknown order '{order_by}'")
+        order = asc if order_by == "asc" else desc
+
+        primary_index = self.primary_index
+        clauses = self._primary_clauses(resources, start, end)
+
+        query = sql.select(primary_index, self.channel, self.value)
+        if limit is not None:
+            # Limit the number of distinct index values instead of rows, to select all channels of an index.
+            # Join a derived table, as some dialects like MySQL do not support limits in IN subqueries.
+            index = sql.select(primary_index).where(and_(*clauses, self.value.is_not(None))).distinct()
+            index = index.order_by(order(primary_index)).limit(limit).subquery(name="index_range")
+            query = query.join_from(self, index, primary_index == index.c[primary_index.name])
+
+        query = query.where(and_(*clauses))
+        query = query.order_by(order(primary_index), asc(self.channel))
+        return query
+
+    # noinspection PyUnresolvedReferences
+    def extract(self, resources: Resources, result: Result[Any]) -> pd.DataFrame:
+        result_columns = [r.id for r in resources]
+
+        rows = result.fetchall()
+        if len(rows) < 1:
+            return pd.DataFrame(columns=result_columns)
+
+        primary_index = self.primary_index
+        data = pd.DataFrame(rows, columns=list(result.keys()))
+        data = data.pivot(index=primary_index.name, columns=self.channel.name, values=self.value.name)
+        data = data.rename(columns=self._get_channels(resources))
+        data.columns.name = None
+
+        if self.datetime_index_type == DatetimeIndexType.TIMESTAMP_UNIX:
+            data.index = pd.to_datetime(data.index, unit="s").tz_localize(tz.UTC)
+        else:
+            index = pd.to_datetime(data.index)
+            if index.tz is None:
+                index = index.tz_localize(primary_index.timezone)
+            data.index = index
+        data.index.name = primary_index.name
+
+        data = data.dropna(axis="index", how="all")
+        if data.empty:
+            return pd.DataFrame()
+        return data.reindex(columns=result_columns)
+
+    def write(self, resources: Resources, data: pd.DataFrame) -> Insert:
+        params = self._validate(resources, data)
+
+        # Handle duplicate primary keys (upsert)
+        if self.dialect.name == "postgresql":
+            from sqlalchemy.dialects import postgresql
+
+            query = postgresql.insert(self).values(params)
+            return query.on_conflict_do_update(
+                index_elements=[c.name for c in self.primary_key.columns],
+                set_={self.value.name: query.excluded[self.value.name]},
+            )
+        elif self.dialect.name in ["mariadb", "mysql"]:
+            from sqlalchemy.dialects import mysql
+
+            query = mysql.insert(self).values(params)
+            return query.on_duplicate_key_update({self.value.name: query.inserted[self.value.name]})
+        elif self.dialect.name == "sqlite":
+            from sqlalchemy.dialects import sqlite
+
+            query = sqlite.insert(self).values(params)
+            return query.on_conflict_do_update(
+                index_elements=[c.name for c in self.primary_key.columns],
+                set_={self.value.name: query.excluded[self.value.name]},
+            )
+        else:
+            return sql.insert(self).values(params)
+
+    # noinspection PyMethodOverriding
+    def delete(
+        self,
+        resources: Resources,
+        start: Optional[TimestampType] = None,
+        end: Optional[TimestampType] = None,
+    ) -> Delete:
+        query = sql.delete(self)
+        query = query.where(and_(*self._primary_clauses(resources, start, end)))
+        return query
+
+    # noinspection PyTypeChecker
+    def _validate(self, resources: Resources, data: pd.DataFrame) -> List[Dict[str, Any]]:
+        resources = resources.filter(lambda r: r.id in data.columns)
+        primary_index = self.primary_index
+
+        # Melt the wide frame to one row per index and channel, dropping missing values
+        data = data[resources.ids].rename(columns={r.id: self.get_channel(r) for r in resources})
+        data.index = primary_index.validate(data.index)
+        data = data.rename_axis(index=primary_index.name, columns=self.channel.name).reset_index()
+        data = data.melt(id_vars=primary_index.name, var_name=self.channel.name, value_name=self.value.name)
+        data = data.dropna(subset=[self.value.name])
+        return data.to_dict(orient="records")
@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+"""
+lori.connectors.sql.partition
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import sqlalchemy as sql
+from sqlalchemy import Connection, Dialect, func, text
+from sqlalchemy.types import INTEGER, TIMESTAMP
+
+import pandas as pd
+import pytz as tz
+from lori.connectors.sql.columns import Column
+from lori.connectors.sql.index import DatetimeIndexType
+from lori.connectors.sql.table import Table
+from lori.core import ConfigurationException
+from lori.typing import TimestampType
+
+# FIXME: Remove this once Python >= 3.9 is a requirement
+try:
+    from typing import Literal
+
+except ImportError:
+    from typing_extensions import Literal
+
+PARTITION_HISTORY = "p_history"
+PARTITION_FUTURE = "p_future"
+
+_PARTITION_PATTERN = re.compile(r"p(\d{4})(\d{2})?$")
+
+
+class Partitioning:
+    """
+    Declarative range partitioning of a table by its datetime index, with one partition per month or year.
+
+    Partitions are supported for PostgreSQL and MySQL/MariaDB. Upcoming partitions will be created when connecting
+    and before writing, while deletions of ranges aligned with partitions drop the whole partition.
+
+    """
+
+    period: Literal["month", "year"]
+    ahead: int
+
+    _partitions: Dict[str, Tuple[pd.Timestamp, pd.Timestamp]]
+    _enabled: bool = False
+
+    def __init__(self, dialect: Dialect, period: Literal["month", "year"], ahead: int = 3) -> None:
+        if dialect.name not in ["postgresql", "mysql", "mariadb"]:
+            raise ConfigurationException(f"Table partitioning not supported for dialect: {dialect.name}")
+        if period not in ["month", "year"]:
+            raise ConfigurationException(f"Invalid table partitioning period '{period}'")
+        if ahead < 0:
+            raise ConfigurationException(f"Invalid number of upcoming partitions: {ahead}")
+        self._logger = logging.getLogger(self.__module__)
+        self._partitions = {}
+        self._enabled = False
+        self.dialect = dialect
+        self.period = period
+        self.ahead = ahead
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def table_kwargs(self, index: Column) -> Dict[str, Any]:
+        if self.dialect.name == "postgresql":
+            return {"postgresql_partition_by": f"RANGE ({self._quote(index.name)})"}
+        # MySQL tables will be partitioned after creation, as partition definitions need to be declared explicitly
+        return {}
+
+    # noinspection PyUnresolvedReferences
+    def connect(self, connection: Connection, table: Table) -> None:
+        if table.datetime_index_type not in (
+            DatetimeIndexType.DATETIME,
+            DatetimeIndexType.TIMESTAMP,
+            DatetimeIndexType.TIMESTAMP_UNIX,
+        ):
+            raise ConfigurationException(
+                f"Invalid index of partitioned table '{table.name}': {table.datetime_index_type}"
+            )
+
+        self._partitions = {}
+        partitions = self._select_partitions(connection, table)
+        if partitions is None:
+            if self.dialect.name == "postgresql":
+                self._logger.warning(
+                    f"Unable to partition existing table '{table.fullname}' created without partitions"
+                )
+                self._enabled = False
+                return
+            self._partition_table(connection, table)
+        else:
+            self._partitions = partitions
+        self._enabled = True
+        self.create(connection, table)
+
+    def create(
+        self,
+        connection: Connection,
+        table: Table,
+        start: Optional[TimestampType] = None,
+        end: Optional[TimestampType] = None,
+    ) -> None:
+        """
+        Creates all missing partitions for the given range, as well as the upcoming partitions from now on.
+
+        """
+        if not self._enabled:
+            return
+        now = pd.Timestamp.now(tz.UTC)
+        end = now if end is None else max(_to_utc(end), now)
+        if start is None or self.dialect.name in ["mysql", "mariadb"]:
+            # MySQL partitions can only be appended at the end of the range
+            start = now if len(self._partitions) == 0 else max(upper for _, upper in self._partitions.values())
+        start = _to_utc(start)
+
+        partitions = [
+            (self._build_name(table, lower), lower, upper)
+            for lower, upper in self._iter_bounds(start, self._next(self._floor(end), self.ahead))
+        ]
+        partitions = [p for p in partitions if p[0] not in self._partitions]
+        if len(partitions) == 0:
+            return
+        if self.dialect.name == "postgresql":
+            for name, lower, upper in partitions:
+                self._logger.debug(f"Creating partition '{name}' of table '{table.fullname}'")
+                connection.execute(
+                    text(
+                        f"CREATE TABLE IF NOT EXISTS {self._quote_table(table, name)} "
+                        f"PARTITION OF {self._quote_table(table)} "
+                        f"FOR VALUES FROM ({self._to_value(table, lower)}) TO ({self._to_value(table, upper)})"
+                    )
+                )
+        else:
+            self._logger.debug(f"Creating partitions {', '.join(p[0] for p in partitions)} of table '{table.fullname}'")
+            connection.execute(
+                text(
+                    f"ALTER TABLE {self._quote_table(table)} REORGANIZE PARTITION {PARTITION_FUTURE} INTO ("
+                    + ", ".join(self._define_partition(table, n, u) for n, _, u in partitions)
+                    + f", PARTITION {PARTITION_FUTURE} VALUES LESS THAN (MAXVALUE))"
+                )
+            )
+        connection.commit()
+        for name, lower, upper in partitions:
+            self._partitions[name] = (lower, upper)
+
+    def drop(
+        self,
+        connection: Connection,
+        table: Table,
+        start: Optional[TimestampType] = None,
+        end: Optional[TimestampType] = None,
+    ) -> List[str]:
+        """
+        Drops all partitions, that are entirely covered by the given range.
+
+        """
+        if not self._enabled:
+            return []
+        start = _to_utc(start) if start is not None else None
+        end = _to_utc(end) if end is not None else None
+
+        # The upper partition bound is exclusive, so the inclusive range end needs to reach it
+        partitions = [
+            name
+            for name, (lower, upper) in self._partitions.items()
+            if (start is None or start <= lower) and (end is None or end >= upper)
+        ]
+        if len(partitions) == 0:
+            return []
+
+        self._logger.info(f"Dropping partitions {', '.join(partitions)} of table '{table.fullname}'")
+        if self.dialect.name == "postgresql":
+            for name in partitions:
+                connection.execute(text(f"DROP TABLE IF EXISTS {self._quote_table(table, name)}"))
+        else:
+            connection.execute(text(f"ALTER TABLE {self._quote_table(table)} DROP PARTITION {', '.join(partitions)}"))
+        connection.commit()
+        for name in partitions:
+            del self._partitions[name]
+        return partitions
+
+    def _select_partitions(self, connection: Connection, table: Table) -> Optional[Dict[str, Tuple[pd.Timestamp, ...]]]:
+        if self.dialect.name == "postgresql":
+            relation = self._quote_table(table)
+            partitioned = connection.execute(
+                text("SELECT COUNT(*) FROM pg_partitioned_table WHERE partrelid = to_regclass(:relation)"),
+                {"relation": relation},
+            ).scalar()
+            if not partitioned:
+                return None
+            result = connection.execute(
+                text(
+                    "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                    "WHERE i.inhparent = to_regclass(:relation)"
+                ),
+                {"relation": relation},
+            )
+            prefix = f"{table.name}_"
+            names = [r[0][len(prefix) :] for r in result.fetchall() if r[0].startswith(prefix)]
+        else:
+            result = connection.execute(
+                text(
+                    "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+                    "WHERE TABLE_SCHEMA = COALESCE(:schema, DATABASE()) AND TABLE_NAME = :name "
+                    "AND PARTITION_NAME IS NOT NULL"
+                ),
+                {"schema": table.schema, "name": table.name},
+            )
+            names = [r[0] for r in result.fetchall()]
+            if len(names) == 0:
+                return None
+
+        partitions = {}
+        for name in names:
+            match = _PARTITION_PATTERN.match(name)
+            if match is None:
+                continue
+            year, month = match.groups()
+            lower = pd.Timestamp(year=int(year), month=int(month) if month is not None else 1, day=1, tz=tz.UTC)
+            partitions[self._build_name(table, lower)] = (lower, self._next(lower))
+        return partitions
+
+    def _partition_table(self, connection: Connection, table: Table) -> None:
+        index = table.primary_index
+        first = connection.execute(sql.select(func.min(index))).scalar()
+        if first is None:
+            start = self._floor(pd.Timestamp.now(tz.UTC))
+        elif index.type == INTEGER or isinstance(index.type, INTEGER):
+            start = self._floor(pd.Timestamp(int(first), unit="s", tz=tz.UTC))
+        else:
+            start = self._floor(pd.Timestamp(first))
+        end = self._next(self._floor(pd.Timestamp.now(tz.UTC)), self.ahead)
+
+        partitions = [(self._build_name(table, lower), lower, upper) for lower, upper in self._iter_bounds(start, end)]
+        self._logger.info(f"Partitioning table '{table.fullname}' by {self.period}")
+        connection.execute(
+            text(
+                f"ALTER TABLE {self._quote_table(table)} PARTITION BY {self._build_expression(index)} ("
+                + f"PARTITION {PARTITION_HISTORY} VALUES LESS THAN ({self._to_value(table, start)}), "
+                + ", ".join(self._define_partition(table, n, u) for n, _, u in partitions)
+                + f", PARTITION {PARTITION_FUTURE} VALUES LESS THAN (MAXVALUE))"
+            )
+        )
+        connection.commit()
+        self._partitions = {n: (lower, upper) for n, lower, upper in partitions}
+
+    def _build_expression(self, index: Column) -> str:
+        if index.type == TIMESTAMP or isinstance(index.type, TIMESTAMP):
+            return f"RANGE (UNIX_TIMESTAMP({self._quote(index.name)}))"
+        if index.type == INTEGER or isinstance(index.type, INTEGER):
+            return f"RANGE ({self._quote(index.name)})"
+        return f"RANGE COLUMNS ({self._quote(index.name)})"
+
+    def _build_name(self, table: Table, lower: pd.Timestamp) -> str:
+        name = lower.strftime("p%Y" if self.period == "year" else "p%Y%m")
+        if self.dialect.name == "postgresql":
+            return f"{table.name}_{name}"
+        return name
+
+    def _define_partition(self, table: Table, name: str, upper: pd.Timestamp) -> str:
+        return f"PARTITION {name} VALUES LESS THAN ({self._to_value(table, upper)})"
+
+    def _to_value(self, table: Table, timestamp: pd.Timestamp) -> str:
+        index = table.primary_index
+        if index.type == INTEGER or isinstance(index.type, INTEGER):
+            return str(int(timestamp.timestamp()))
+        if self.dialect.name == "postgresql":
+            return f"'{timestamp.strftime('%Y-%m-%d %H:%M:%S')}+00:00'"
+        if index.type == TIMESTAMP or isinstance(index.type, TIMESTAMP):
+            return str(int(timestamp.timestamp()))
+        return f"'{timestamp.strftime('%Y-%m-%d %H:%M:%S')}'"
+
+    def _quote(self, name: str) -> str:
+        return self.dialect.identifier_preparer.quote_identifier(name)
+
+    def _quote_table(self, table: Table, name: Optional[str] = None) -> str:
+        name = self._quote(table.name if name is None else name)
+        if table.schema is not None:
+            return f"{self._quote(table.schema)}.{name}"
+        return name
+
+    def _floor(self, timestamp: pd.Timestamp) -> pd.Timestamp:
+        timestamp = _to_utc(timestamp)
+        return pd.Timestamp(
+            year=timestamp.year, month=timestamp.month if self.period == "month" else 1, day=1, tz=tz.UTC
+        )
+
+    def _next(self, timestamp: pd.Timestamp, periods: int = 1) -> pd.Timestamp:
+        if self.period == "year":
+            return timestamp + pd.DateOffset(years=periods)
+        return timestamp + pd.DateOffset(months=periods)
+
+    def _iter_bounds(self, start: pd.Timestamp, end: pd.Timestamp) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        bounds = []
+        lower = self._floor(start)
+        while lower <= end:
+            upper = self._next(lower)
+            bounds.append((lower, upper))
+            lower = upper
+        return bounds
+
+
+def _to_utc(timestamp: TimestampType) -> pd.Timestamp:
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tzinfo is None:
+        return timestamp.tz_localize(tz.UTC)
+    return timestamp.tz_convert(tz.UTC)
@@ -8,9 +8,13 @@ lori.connectors.sql.schema
 
 from __future__ import annotations
 
-from typing import Collection, Dict, Iterable
+import hashlib
+import json
+import os
+from typing import Collection, Dict, Iterable, Optional, Set
 
-from sqlalchemy import Connection, Dialect, Engine, ForeignKey, MetaData, inspect
+from sqlalchemy import Connection, Dialect, Engine, ForeignKey, MetaData, String, inspect
+from sqlalchemy.schema import CreateTable
 
 import pytz as tz
 from lori.connectors.sql.columns import (
@@ -21,19 +25,46 @@ from lori.connectors.sql.columns import (
 )
 from lori.connectors.sql.columns.datetime import is_datetime
 from lori.connectors.sql.index import DatetimeIndexType
+from lori.connectors.sql.narrow import NarrowTable
+from lori.connectors.sql.partition import Partitioning
 from lori.connectors.sql.table import Table
 from lori.core import ConfigurationException, Configurations, Configurator, Resource, ResourceException, Resources
 from lori.util import to_bool, to_timezone
 
 
 class Schema(Configurator, MetaData):
+    """
+    Metadata of all configured tables, which will be bound lazily on first use.
+
+    Binding a table creates it if missing, validates its columns and connects its partitions. Bound tables will be
+    reused on reconnects without validating them again. The definition fingerprints of validated tables are persisted
+    in a reflection cache, if configured, to skip validating unchanged tables after restarts as well.
+
+    """
+
     dialect: Dialect
 
-    _created: bool = False
+    _partitions: Dict[str, Partitioning]
+
+    _bound: Set[str]
+    _names: Dict[Optional[str], Set[str]]
 
-    def __init__(self, dialect: Dialect, **kwargs) -> None:
+    _cache: Dict[str, str]
+    _cache_path: Optional[str] = None
+
+    def __init__(self, dialect: Dialect, cache: Optional[str] = None, **kwargs) -> None:
         super().__init__(**kwargs)
-        self._created = False
+        self._partitions = {}
+        self._bound = set()
+        self._names = {}
+        self._cache = {}
+        self._cache_path = cache
+        if cache is not None and os.path.isfile(cache):
+            try:
+                with open(cache, "r", encoding="utf-8") as file:
+                    self._cache = json.load(file)
+            except (OSError, ValueError) as e:
+                self._logger.warning(f"Unable to load schema reflection cache '{cache}': {str(e)}")
         self.dialect = dialect
 
     def __repr__(self) -> str:
@@ -44,13 +75,70 @@ class Schema(Configurator, MetaData):
         # Do not use __str__ of Configurator class, to avoid infinite recursion
         return super(MetaData, self).__str__()
 
-    def connect(self, bind: Engine | Connection, resources: Resources) -> Dict[str, Table]:
-        tables = self._connect_tables(resources)
-        if not self._created:
-            self.create_all(bind=bind, checkfirst=True)
-            self._created = True
-        self._validate(bind=bind, tables=tables.values())
-        return tables
+    def connect(self, resources: Resources) -> Dict[str, Table]:
+        # Existing table names will be selected again on first use, as the database may have been changed meanwhile
+        self._names = {}
+        return self._connect_tables(resources)
+
+    def is_bound(self, table: Table) -> bool:
+        return table.key in self._bound
+
+    def bind(self, bind: Engine | Connection, table: Table) -> None:
+        """
+        Binds a table on first use, by creating it if missing, validating its columns and connecting its partitions.
+
+        """
+        if table.key in self._bound:
+            return
+        connection = bind.connect() if isinstance(bind, Engine) else bind
+        try:
+            fingerprint = self._fingerprint(table)
+            names = self._select_names(connection, table.schema)
+            if table.name not in names:
+                self._logger.debug(f"Creating table '{table.fullname}'")
+                table.create(bind=connection, checkfirst=True)
+                connection.commit()
+                names.add(table.name)
+            elif self._cache.get(table.key, None) != fingerprint:
+                self._validate(connection, table)
+
+            if table.key in self._partitions:
+                self._partitions[table.key].connect(connection, table)
+        finally:
+            if connection is not bind:
+                connection.close()
+
+        self._bound.add(table.key)
+        if self._cache.get(table.key, None) != fingerprint:
+            self._cache[table.key] = fingerprint
+            self._write_cache()
+
+    def _select_names(self, connection: Connection, schema: Optional[str]) -> Set[str]:
+        if schema not in self._names:
+            self._names[schema] = set(inspect(connection).get_table_names(schema))
+        return self._names[schema]
+
+    def _fingerprint(self, table: Table) -> str:
+        definition = str(CreateTable(table).compile(dialect=self.dialect))
+        return hashlib.md5(definition.encode("utf-8")).hexdigest()
+
+    def _write_cache(self) -> None:
+        if self._cache_path is None:
+            return
+        try:
+            cache_dir = os.path.dirname(self._cache_path)
+            if not os.path.isdir(cache_dir):
+                os.makedirs(cache_dir, exist_ok=True)
+            with open(self._cache_path, "w", encoding="utf-8") as file:
+                json.dump(self._cache, file, indent=4, ensure_ascii=False)
+        except OSError as e:
+            self._logger.warning(f"Unable to write schema reflection cache '{self._cache_path}': {str(e)}")
+
+    def get_partitioning(self, table: Table) -> Optional[Partitioning]:
+        partitioning = self._partitions.get(table.key, None)
+        if partitioning is None or not partitioning.enabled:
+            return None
+        return partitioning
 
     def _connect_tables(self, resources: Resources) -> Dict[str, Table]:
         tables = {}
@@ -62,12 +150,35 @@ class Schema(Configurator, MetaData):
                     raise ConfigurationException(
                         "Missing 'table' configuration for resources: " + ", ".join([r.id for r in table_resources])
                     )
-                if name in self.tables:
-                    table = self.tables[name]
+                # Reuse tables of previous connections, which may already be bound
+                key = name if schema is None else f"{schema}.{name}"
+                if key in self.tables:
+                    table = self.tables[key]
                     tables[table.key] = table
                     continue
 
                 configs = self.configs.get_section(name, defaults=defaults)
+
+                partitioning = None
+                partition = configs.get("partition", default=self.configs.get("partition", default=None))
+                if partition is not None and partition.lower() not in ["none", "false"]:
+                    partition_ahead = self.configs.get_int("partition_ahead", default=3)
+                    partitioning = Partitioning(
+                        self.dialect,
+                        partition.lower(),
+                        ahead=configs.get_int("partition_ahead", default=partition_ahead),
+                    )
+
+                layout = configs.get("layout", default=self.configs.get("layout", default="wide")).lower()
+                if layout == "narrow":
+                    table = self._create_narrow_table(name, schema, configs, partitioning)
+                    if partitioning is not None:
+                        self._partitions[table.key] = partitioning
+                    tables[table.key] = table
+                    continue
+                elif layout != "wide":
+                    raise ConfigurationException(f"Unknown layout '{layout}' of table: {name}")
+
                 columns_configs = configs.get_section("columns")
                 column_configs = [columns_configs[s] for s in columns_configs.sections]
 
@@ -90,10 +201,61 @@ class Schema(Configurator, MetaData):
                         raise ConfigurationException(f"Duplicate column for table '{name}': {duplicate}")
                     columns.remove(duplicate)
 
-                table = Table(name, self, *columns, schema=schema, quote=True, quote_schema=True)
+                table_configs = {}
+                if partitioning is not None:
+                    table_configs.update(partitioning.table_kwargs(next(c for c in columns if c.primary_key)))
+
+                table = Table(name, self, *columns, schema=schema, quote=True, quote_schema=True, **table_configs)
+                if partitioning is not None:
+                    self._partitions[table.key] = partitioning
                 tables[table.key] = table
         return tables
 
+    def _create_narrow_table(
+        self,
+        name: str,
+        schema: Optional[str],
+        configs: Configurations,
+        partitioning: Optional[Partitioning] = None,
+    ) -> NarrowTable:
+        index_configs = configs.get_section("index")
+        index_type = index_configs.get("type", default="default")
+        if index_type.lower() in ["default", "none"]:
+            index_type = DatetimeIndexType.TIMESTAMP
+        elif index_type.upper() in ["DATETIME", "TIMESTAMP", "TIMESTAMP_UNIX"]:
+            index_type = DatetimeIndexType.get(index_type.upper())
+        else:
+            raise ConfigurationException(f"Invalid index type '{index_type}' for narrow table: {name}")
+
+        channel = configs.get("channel", default="channel_id")
+        value = configs.get("value", default="value")
+
+        columns = index_type.columns(index_configs.get("column", default=None))
+        columns.append(
+            Column(
+                channel,
+                String(configs.get_int("channel_length", default=128)),
+                primary_key=True,
+                nullable=False,
+            )
+        )
+        columns.append(Column(value, parse_type(configs.get("value_type", default="FLOAT")), nullable=True))
+
+        table_configs = {}
+        if partitioning is not None:
+            table_configs.update(partitioning.table_kwargs(columns[0]))
+        return NarrowTable(
+            name,
+            self,
+            *columns,
+            schema=schema,
+            channel=channel,
+            value=value,
+            quote=True,
+            quote_schema=True,
+            **table_configs,
+        )
+
     # noinspection PyShadowingBuiltins
     @staticmethod
     def _create_primary_key(configs: Configurations, *resources: Resource | Configurations) -> Iterable[Column]:
@@ -140,22 +302,18 @@ class Schema(Configurator, MetaData):
 
         return Column(name, type, **configs)
 
-    def _validate(self, bind: Engine | Connection, tables: Collection[Table]) -> None:
-        self.reflect(bind)
-
-        inspector = inspect(bind)
-        for table in tables:
-            columns = inspector.get_columns(table.name, table.schema)
-            column_names = [c["name"] for c in columns]
-            for column in table.columns.values():
-                if column.name in column_names:
-                    column_schema = next(c for c in columns if c["name"] == column.name)  # noqa F841
-                    # TODO: Implement column validation
+    def _validate(self, connection: Connection, table: Table) -> None:
+        columns = inspect(connection).get_columns(table.name, table.schema)
+        column_names = [c["name"] for c in columns]
+        for column in table.columns.values():
+            if column.name in column_names:
+                column_schema = next(c for c in columns if c["name"] == column.name)  # noqa F841
+                # TODO: Implement column validation
+            else:
+                if self.configs.get_bool("create", default=True):
+                    raise ResourceException(f"Not yet implemented to create missing column: {column.name}")
                 else:
-                    if self.configs.get_bool("create", default=True):
-                        raise ResourceException(f"Not yet implemented to create missing column: {column.name}")
-                    else:
-                        raise ResourceException(f"Unable to find configured column: {column.name}")
+                    raise ResourceException(f"Unable to find configured column: {column.name}")
 
     @staticmethod
     def _validate_column(column: Column, other: Column) -> bool:
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+lori.connectors.sql.sqlite
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import sqlite3
+import sys
+from typing import Any, Optional
+
+from sqlalchemy import Engine, event
+
+import pytz as tz
+
+# SQLite limits the number of host parameters of a single statement
+MAX_VARIABLES = 32766 if sqlite3.sqlite_version_info >= (3, 32) else 999
+
+
+def register_engine(
+    engine: Engine,
+    journal_mode: str = "WAL",
+    synchronous: str = "NORMAL",
+    timeout: Optional[float] = None,
+) -> None:
+    # noinspection PyUnusedLocal
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection: sqlite3.Connection, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"PRAGMA journal_mode={journal_mode}")
+            cursor.execute(f"PRAGMA synchronous={synchronous}")
+            cursor.execute("PRAGMA foreign_keys=ON")
+            if timeout is not None:
+                cursor.execute(f"PRAGMA busy_timeout={int(timeout * 1000)}")
+        finally:
+            cursor.close()
+        register_functions(dbapi_connection)
+
+
+def register_functions(dbapi_connection: sqlite3.Connection) -> None:
+    """
+    Registers the SQL functions used by :meth:`lori.connectors.sql.Table.hash`, that are not natively
+    available in SQLite.
+
+    """
+    for method in ["md5", "sha1", "sha256", "sha512"]:
+        _create_function(dbapi_connection, method, 1, _hash_function(method))
+    _create_function(dbapi_connection, "unix_timestamp", 1, _unix_timestamp)
+
+    # Override the native function of SQLite >= 3.44, to format values like lori.data.util.hash_data
+    _create_function(dbapi_connection, "concat_ws", -1, _concat_ws)
+
+
+def _create_function(dbapi_connection: sqlite3.Connection, name: str, narg: int, function: Any) -> None:
+    # FIXME: Remove this once Python >= 3.8 is a requirement
+    if sys.version_info >= (3, 8):
+        dbapi_connection.create_function(name, narg, function, deterministic=True)
+    else:
+        dbapi_connection.create_function(name, narg, function)
+
+
+def _hash_function(method: str):
+    def _hash(value: Any) -> Optional[str]:
+        if value is None:
+            return None
+        if isinstance(value, str):
+            value = value.encode("UTF-8")
+        return hashlib.new(method, value).hexdigest()
+
+    return _hash
+
+
+def _unix_timestamp(value: Any) -> Optional[int]:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    timestamp = dt.datetime.fromisoformat(str(value))
+    if timestamp.tzinfo is None:
+        # Datetime values are always stored as naive UTC timestamps
+        timestamp = timestamp.replace(tzinfo=tz.UTC)
+    return int(timestamp.timestamp())
+
+
+def _concat_ws(separator: str, *values: Any) -> str:
+    # Empty values are skipped, the same way as missing values are by lori.data.util.hash_data
+    return separator.join(v for v in (_to_str(v) for v in values if v is not None) if len(v) > 0)
+
+
+def _to_str(value: Any) -> str:
+    # Format values the way lori.data.util.hash_data writes them, instead of SQLite casting floats like "1.0"
+    if isinstance(value, float):
+        return "%.10g" % value
+    if isinstance(value, bytes):
+        return value.decode("UTF-8", errors="replace")
+    return str(value)
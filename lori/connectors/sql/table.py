@@ -8,11 +8,26 @@ lori.connectors.sql.table
 
 from __future__ import annotations
 
-from typing import Any, Dict, Iterator, List, Optional, Tuple
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
 
 import sqlalchemy as sql
-from sqlalchemy import ClauseElement, Dialect, Result, UnaryExpression
-from sqlalchemy.sql import Delete, Insert, Select, and_, asc, between, desc, func, literal, not_, or_, text
+from sqlalchemy import ClauseElement, Dialect, Executable, Result, Subquery, UnaryExpression
+from sqlalchemy.sql import (
+    Delete,
+    Insert,
+    Select,
+    and_,
+    asc,
+    between,
+    bindparam,
+    desc,
+    func,
+    literal,
+    not_,
+    or_,
+    text,
+)
 from sqlalchemy.types import BLOB, DATETIME, TIMESTAMP
 
 import numpy as np
@@ -30,8 +45,13 @@ try:
 except ImportError:
     from typing_extensions import Literal
 
+# Maximum number of statements to be cached per table
+STATEMENTS_MAX = 256
+
 
 class Table(sql.Table):
+    _statements: OrderedDict[Hashable, Executable]
+
     def __init__(
         self,
         name: str,
@@ -50,6 +70,10 @@ class Table(sql.Table):
                 self.datetime_index_type = datetime_index_type
                 break
 
+        # Statements are cached per resource set and range shape, with the range boundaries being bound parameters.
+        # This way, SQLAlchemy is able to reuse the compiled statement of each construct for periodic reads.
+        self._statements = OrderedDict()
+
     # noinspection PyUnresolvedReferences
     @property
     def dialect(self) -> Dialect:
@@ -81,12 +105,16 @@ class Table(sql.Table):
         clauses = []
         primary_index = self.primary_index
         if self.__is_datetime_index(primary_index):
+            if start is not None:
+                start = bindparam("index_start", type_=primary_index.type)
+            if end is not None:
+                end = bindparam("index_end", type_=primary_index.type)
             if start is not None and end is not None:
-                clauses.append(between(primary_index, primary_index.validate(start), primary_index.validate(end)))
+                clauses.append(between(primary_index, start, end))
             elif start is not None:
-                clauses.append(primary_index >= primary_index.validate(start))
+                clauses.append(primary_index >= start)
             elif end is not None:
-                clauses.append(primary_index <= primary_index.validate(end))
+                clauses.append(primary_index <= end)
 
         surrogate_clauses = self._surrogate_clauses(resources)
         if len(surrogate_clauses) > 1:
@@ -95,6 +123,36 @@ class Table(sql.Table):
             clauses.append(surrogate_clauses[0])
         return clauses
 
+    def range_params(
+        self,
+        start: Optional[TimestampType] = None,
+        end: Optional[TimestampType] = None,
+    ) -> Dict[str, Any]:
+        """
+        Get the bound parameters of the range boundaries, to execute statements of this table with.
+
+        """
+        params = {}
+        primary_index = self.primary_index
+        if self.__is_datetime_index(primary_index):
+            if start is not None:
+                params["index_start"] = primary_index.validate(start)
+            if end is not None:
+                params["index_end"] = primary_index.validate(end)
+        return params
+
+    def _get_statement(self, key: Tuple[Hashable, ...], build: Callable[[], Executable]) -> Executable:
+        statement = self._statements.get(key, None)
+        if statement is not None:
+            self._statements.move_to_end(key)
+            return statement
+
+        statement = build()
+        self._statements[key] = statement
+        if len(self._statements) > STATEMENTS_MAX:
+            self._statements.popitem(last=False)
+        return statement
+
     # noinspection PyTypeChecker
     def _surrogate_clauses(self, resources: Resources) -> List[ClauseElement]:
         clauses = []
@@ -111,11 +169,12 @@ class Table(sql.Table):
         result_columns = [r.id for r in resources]
         results = []
 
-        # noinspection PyUnresolvedReferences
-        if result.rowcount < 1:
+        # Some drivers like SQLite do not provide the row count of selects, so fetch rows before validating
+        rows = result.fetchall()
+        if len(rows) < 1:
             return pd.DataFrame(columns=result_columns)
 
-        data = pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+        data = pd.DataFrame(rows, columns=list(result.keys()))
         for group, group_resources in self._groupby(resources):
 
             def _is_group(row: pd.Series) -> bool:
@@ -167,11 +226,58 @@ class Table(sql.Table):
             results.loc[:, [result_column]] = np.nan
         return results
 
+    def first_index(self, resources: Resources) -> Select:
+        key = ("first_index", _build_signature(resources))
+        return self._get_statement(key, lambda: self._select_index(resources, func.min))
+
+    def last_index(self, resources: Resources) -> Select:
+        key = ("last_index", _build_signature(resources))
+        return self._get_statement(key, lambda: self._select_index(resources, func.max))
+
+    def _select_index(self, resources: Resources, function: Callable[[Column], ClauseElement]) -> Select:
+        if self.datetime_index_type not in (
+            DatetimeIndexType.DATETIME,
+            DatetimeIndexType.TIMESTAMP,
+            DatetimeIndexType.TIMESTAMP_UNIX,
+        ):
+            raise ResourceException(f"Unable to select index of table '{self.name}': {self.datetime_index_type}")
+        primary_index = self.primary_index
+        query = sql.select(function(primary_index).label(primary_index.name))
+
+        clauses = self._primary_clauses(resources)
+        nullable = [c for c in self.__get_resource_columns(resources) if c.nullable]
+        if len(nullable) > 0:
+            # Make sure to only select indexes of valid values
+            clauses.append(not_(and_(*[c.is_(None) for c in nullable])))
+        return query.where(and_(*clauses))
+
+    # noinspection PyUnresolvedReferences
+    def extract_index(self, result: Result[Any]) -> Optional[pd.Timestamp]:
+        index = result.scalar()
+        if index is None:
+            return None
+        if self.datetime_index_type == DatetimeIndexType.TIMESTAMP_UNIX:
+            return pd.Timestamp(int(index), unit="s", tz=tz.UTC)
+
+        index = pd.Timestamp(index)
+        if index.tzinfo is None:
+            index = index.tz_localize(self.primary_index.timezone)
+        return index
+
     def exists(
         self,
         resources: Resources,
         start: Optional[TimestampType] = None,
         end: Optional[TimestampType] = None,
+    ) -> Select:
+        key = ("exists", _build_signature(resources), start is not None, end is not None)
+        return self._get_statement(key, lambda: self._exists(resources, start, end))
+
+    def _exists(
+        self,
+        resources: Resources,
+        start: Optional[TimestampType] = None,
+        end: Optional[TimestampType] = None,
     ) -> Select:
         columns = self.__get_columns(resources)
         select = sql.select(*columns)
@@ -190,15 +296,80 @@ class Table(sql.Table):
     ) -> Select:
         if method.lower() not in ["md5", "sha1", "sha256", "sha512"]:
             raise ValueError(f"Invalid checksum method '{method}'")
+        key = ("hash", _build_signature(resources), start is not None, end is not None, method.lower())
+        return self._get_statement(key, lambda: self._hash(resources, start, end, method))
+
+    # noinspection PyShadowingBuiltins, PyProtectedMember, PyArgumentList
+    def _hash(
+        self,
+        resources: Resources,
+        start: Optional[TimestampType] = None,
+        end: Optional[TimestampType] = None,
+        method: Literal["MD5", "SHA1", "SHA256", "SHA512"] = "MD5",
+    ) -> Select:
         method = getattr(func, method.lower())
+        select = self._hash_range(resources, start, end, method)
+
+        concat = func.aggregate_strings(func.concat_ws(",", *select.exported_columns.values()), ",")
+
+        query = sql.select(method(concat).label("hash"), literal(True).label("in_range")).group_by(text("in_range"))
+        return query.select_from(select)
+
+    # noinspection PyShadowingBuiltins, PyProtectedMember, PyArgumentList
+    def hash_buckets(
+        self,
+        resources: Resources,
+        start: Optional[TimestampType] = None,
+        end: Optional[TimestampType] = None,
+        seconds: int = 3600,
+        method: Literal["MD5", "SHA1", "SHA256", "SHA512"] = "MD5",
+    ) -> Select:
+        if method.lower() not in ["md5", "sha1", "sha256", "sha512"]:
+            raise ValueError(f"Invalid checksum method '{method}'")
+        if self.datetime_index_type not in (DatetimeIndexType.TIMESTAMP, DatetimeIndexType.TIMESTAMP_UNIX):
+            raise ValueError(f"Unable to hash buckets of table '{self.name}' with index: {self.datetime_index_type}")
+        key = ("hash_buckets", _build_signature(resources), start is not None, end is not None, seconds, method.lower())
+        return self._get_statement(key, lambda: self._hash_buckets(resources, start, end, seconds, method))
+
+    # noinspection PyShadowingBuiltins, PyProtectedMember, PyArgumentList
+    def _hash_buckets(
+        self,
+        resources: Resources,
+        start: Optional[TimestampType] = None,
+        end: Optional[TimestampType] = None,
+        seconds: int = 3600,
+        method: Literal["MD5", "SHA1", "SHA256", "SHA512"] = "MD5",
+    ) -> Select:
+        method = getattr(func, method.lower())
+        select = self._hash_range(resources, start, end, method)
+
+        # The first column of the hashed range is the unix timestamp of the datetime index, floored to the unix epoch
+        index = list(select.exported_columns.values())[0]
+        bucket = (index - index % seconds).label("bucket")
+        concat = func.aggregate_strings(func.concat_ws(",", *select.exported_columns.values()), ",")
+
+        query = sql.select(bucket, method(concat).label("hash")).select_from(select)
+        return query.group_by(bucket).order_by(bucket)
+
+    # noinspection PyShadowingBuiltins, PyProtectedMember, PyArgumentList
+    def _hash_range(
+        self,
+        resources: Resources,
+        start: Optional[TimestampType],
+        end: Optional[TimestampType],
+        method: Callable[[ClauseElement], ClauseElement],
+    ) -> Subquery:
+        """
+        Selects the ordered rows of a range to be hashed, starting with the unix timestamp of the datetime index.
+
+        """
         columns = self.__get_columns(resources)
 
         def _validate(column: Column) -> ClauseElement:
             if column.type == DATETIME or isinstance(column.type, DATETIME):
                 # TODO: Verify if there is a more generic way to implement time
                 raise ValueError(
-                    f"Unable to generate consistent hashes for table '{self.name}' "
-                    f"with DATETIME column: {column.name}",
+                    f"Unable to generate consistent hashes for table '{self.name}' with DATETIME column: {column.name}",
                 )
             if column.type == TIMESTAMP or isinstance(column.type, TIMESTAMP):
                 return func.unix_timestamp(column)
@@ -214,12 +385,7 @@ class Table(sql.Table):
             select = select.filter(not_(and_(*[c.is_(None) for c in columns if c.nullable])))
         select = select.where(and_(*self._primary_clauses(resources, start, end)))
         select = select.order_by(*self._primary_order("asc"))
-        select = select.subquery(name="hash_range")
-
-        concat = func.aggregate_strings(func.concat_ws(",", *select.exported_columns.values()), ",")
-
-        query = sql.select(method(concat).label("hash"), literal(True).label("in_range")).group_by(text("in_range"))
-        return query.select_from(select)
+        return select.subquery(name="hash_range")
 
     def read(
         self,
@@ -227,11 +393,26 @@ class Table(sql.Table):
         start: Optional[TimestampType] = None,
         end: Optional[TimestampType] = None,
         order_by: Literal["asc", "desc"] = "asc",
+        limit: Optional[int] = None,
+    ) -> Select:
+        key = ("read", _build_signature(resources), start is not None, end is not None, order_by, limit)
+        return self._get_statement(key, lambda: self._read(resources, start, end, order_by, limit))
+
+    def _read(
+        self,
+        resources: Resources,
+        start: Optional[TimestampType] = None,
+        end: Optional[TimestampType] = None,
+        order_by: Literal["asc", "desc"] = "asc",
+        limit: Optional[int] = None,
     ) -> Select:
         columns = self.__get_columns(resources)
         query = sql.select(*columns)
         query = query.where(and_(*self._primary_clauses(resources, start, end)))
-        return query.order_by(*self._primary_order(order_by))
+        query = query.order_by(*self._primary_order(order_by))
+        if limit is not None:
+            query = query.limit(limit)
+        return query
 
     # noinspection PyUnresolvedReferences
     def write(self, resources: Resources, data: pd.DataFrame) -> Insert:
@@ -254,6 +435,14 @@ class Table(sql.Table):
 
             query = mysql.insert(self).values(params)
             return query.on_duplicate_key_update({c.name: c for c in resource_columns})
+        elif self.dialect.name == "sqlite":
+            from sqlalchemy.dialects import sqlite
+
+            query = sqlite.insert(self).values(params)
+            return query.on_conflict_do_update(
+                index_elements=[c.name for c in primary_columns],
+                set_={c.name: query.excluded[c.name] for c in resource_columns},
+            )
         else:
             return sql.insert(self).values(params)
 
@@ -297,6 +486,20 @@ class Table(sql.Table):
             values.extend(group_data.to_dict(orient="records"))
         return values
 
+    def covers_all(self, resources: Resources) -> bool:
+        """
+        Verify if the resources cover all rows of the table, e.g. to drop whole partitions instead of deleting rows.
+
+        """
+        if any(isinstance(c, SurrogateKeyColumn) for c in self.primary_key.columns):
+            return False
+        columns = self.__get_resource_columns(resources)
+        return all(c in columns for c in self.columns if not c.primary_key)
+
+    def _count_values(self, resources: Resources) -> int:
+        # Each row of every surrogate key group will be inserted with a value for all table columns
+        return len(self.columns) * max(len(list(self._groupby(resources))), 1)
+
     # noinspection SpellCheckingInspection
     def _groupby(self, resources: Resources) -> Iterator[Tuple[Dict[str, Any], Resources]]:
         groups: List[Tuple[Dict[str, Any], Resources]] = []
@@ -355,3 +558,7 @@ class Table(sql.Table):
         if self.datetime_index_type == DatetimeIndexType.NONE:
             return False
         return column in self.__get_datetime_index(self.datetime_index_type)
+
+
+def _build_signature(resources: Resources) -> Tuple[Tuple[str, str], ...]:
+    return tuple((r.id, r.get("column", default=r.key)) for r in resources)
@@ -10,14 +10,26 @@ from __future__ import annotations
 
 import os
 import re
-from typing import Optional, Sequence
+from typing import List, Optional, Sequence
 
+import numpy as np
 import pandas as pd
+import pytz as tz
 from lori.connectors import ConnectionException, Database, register_connector_type
 from lori.core import Configurations, Resources
 from lori.typing import TimestampType
+from lori.util import parse_freq, to_timedelta
 from pandas import HDFStore
 
+# FIXME: Remove this once Python >= 3.9 is a requirement
+try:
+    from typing import Literal
+
+except ImportError:
+    from typing_extensions import Literal
+
+HDF_CHUNK_SIZE = 100000
+
 
 @register_connector_type("tables", "hdfstore")
 class HDFDatabase(Database):
@@ -33,6 +45,9 @@ class HDFDatabase(Database):
     _compression_level: int | None = None
     _compression_lib = None
 
+    _data_columns: Optional[bool | List[str]] = None
+    _compact_freq: Optional[str] = "W"
+
     # noinspection PyTypeChecker
     def configure(self, configs: Configurations) -> None:
         super().configure(configs)
@@ -63,6 +78,14 @@ class HDFDatabase(Database):
         self._compression_level = configs.get_int("compression_level", None)
         self._compression_lib = configs.get("compression_lib", None)
 
+        # Additional columns to be queryable and indexed, besides the always indexed datetime index
+        self._data_columns = configs.get("data_columns", default=None)
+        if isinstance(self._data_columns, str):
+            self._data_columns = [c.strip() for c in self._data_columns.split(",")]
+
+        # Minimum interval between compactions of the store, when rotating
+        self._compact_freq = parse_freq(configs.get("compact", default=HDFDatabase._compact_freq))
+
     def is_connected(self) -> bool:
         return self.__store is not None and self.__store.is_open
 
@@ -159,6 +182,48 @@ class HDFDatabase(Database):
         data = sorted(data, key=lambda d: min(d.index))
         return pd.concat(data, axis="columns")
 
+    def read_first_index(self, resources: Resources) -> Optional[pd.Timestamp]:
+        indexes = self._read_boundary_indexes(resources, "first")
+        if len(indexes) == 0:
+            return None
+        return min(indexes)
+
+    def read_last_index(self, resources: Resources) -> Optional[pd.Timestamp]:
+        indexes = self._read_boundary_indexes(resources, "last")
+        if len(indexes) == 0:
+            return None
+        return max(indexes)
+
+    def _read_boundary_indexes(self, resources: Resources, mode: Literal["first", "last"]) -> List[pd.Timestamp]:
+        if mode not in ["first", "last"]:
+            raise ValueError(f"Invalid mode '{mode}'")
+        indexes = []
+        try:
+            for group, group_resources in resources.groupby("group"):
+                group_key = _format_key(group)
+                if group_key not in self.__store:
+                    continue
+
+                storer = self.__store.get_storer(group_key)
+                rows = storer.nrows
+                if not rows:
+                    continue
+
+                # Rows may be appended out of order until the store is compacted, e.g. after deleting a range.
+                # Read the boundary row from the completely sorted table index, if available.
+                column = storer.table.cols.index
+                if column.is_indexed and column.index.is_csi:
+                    start = 0 if mode == "first" else rows - 1
+                    index = storer.table.read_sorted("index", field="index", start=start, stop=start + 1)
+                    indexes.append(pd.Timestamp(int(index[0]), unit="ns", tz=tz.UTC))
+                else:
+                    index = self.__store.select_column(group_key, "index")
+                    indexes.append(pd.Timestamp(index.min() if mode == "first" else index.max()))
+
+        except IOError as e:
+            raise ConnectionException(self, str(e))
+        return indexes
+
     def delete(
         self,
         resources: Resources,
@@ -171,7 +236,30 @@ class HDFDatabase(Database):
                 if group_key not in self.__store:
                     continue
 
-                self.__store.remove(group_key)
+                columns = self.__build_columns(group_resources)
+                group_columns = self.__store.select(group_key, stop=0).columns
+                if all(c in columns for c in group_columns):
+                    if start is None and end is None:
+                        self.__store.remove(group_key)
+                    else:
+                        self.__store.remove(group_key, where=_build_where(start, end))
+                    continue
+
+                # Values of other columns need to be kept. Only rewrite the rows of the range, which will be appended
+                # out of order until the store is compacted.
+                where = _build_where(start, end)
+                group_data = self.__store.select(group_key, where=where)
+                if group_data.empty:
+                    continue
+                group_data.loc[:, [c for c in columns if c in group_data.columns]] = np.nan
+                group_data = group_data.dropna(axis="index", how="all")
+
+                if where is None:
+                    self.__store.remove(group_key)
+                else:
+                    self.__store.remove(group_key, where=where)
+                if not group_data.empty:
+                    self.__append(group_key, group_data)
 
         except IOError as e:
             raise ConnectionException(self, str(e))
@@ -187,14 +275,105 @@ class HDFDatabase(Database):
                         columns={r.id: r.get("column", default=r.key) for r in group_resources},
                         inplace=True,
                     )
-                if group_key not in self.__store:
-                    self.__store.put(group_key, group_data, format="table", encoding="UTF-8")
-                else:
-                    self.__store.append(group_key, group_data, format="table", encoding="UTF-8")
+                self.__append(group_key, group_data)
 
         except IOError as e:
             raise ConnectionException(self, str(e))
 
+    def __append(self, group_key: str, data: pd.DataFrame) -> None:
+        # Skip updating the index for every append, as PyTables keeps an existing table index up to date itself
+        if group_key not in self.__store:
+            self.__store.put(
+                group_key,
+                data,
+                format="table",
+                encoding="UTF-8",
+                index=False,
+                data_columns=self._data_columns,
+            )
+            self.__store.create_table_index(group_key, optlevel=9, kind="full")
+        else:
+            self.__store.append(
+                group_key,
+                data,
+                format="table",
+                encoding="UTF-8",
+                index=False,
+                data_columns=self._data_columns,
+            )
+
+    def compact(self) -> None:
+        if self._compact_freq is None or self._mode == "r":
+            return
+
+        now = pd.Timestamp.now(tz.UTC)
+        attrs = self.__store.root._v_attrs
+        if "compacted" in attrs and pd.Timestamp(str(attrs.compacted)) + to_timedelta(self._compact_freq) > now:
+            return
+
+        # Repack all tables into a new file, sorted by their index, like ptrepack does.
+        # This reclaims the space of deleted rows and restores the index of tables appended out of order.
+        self._logger.info(f"Compacting HDF store '{self._store_path}'")
+        compact_path = f"{self._store_path}.compact"
+        try:
+            with HDFStore(
+                compact_path,
+                mode="w",
+                complevel=self._compression_level,
+                complib=self._compression_lib,
+            ) as compact_store:
+                for group_key in self.__store.keys():
+                    storer = self.__store.get_storer(group_key)
+                    if not storer.is_table:
+                        compact_store.put(group_key, self.__store.get(group_key))
+                        continue
+
+                    data_columns = [c for c in storer.data_columns if c != "index"] or None
+                    index = self.__store.select_column(group_key, "index")
+                    if index.is_monotonic_increasing and index.is_unique:
+                        for group_data in self.__store.select(group_key, chunksize=HDF_CHUNK_SIZE):
+                            compact_store.append(
+                                group_key,
+                                group_data,
+                                format="table",
+                                encoding="UTF-8",
+                                index=False,
+                                data_columns=data_columns,
+                            )
+                    else:
+                        group_data = self.__store.select(group_key)
+                        group_data = group_data[~group_data.index.duplicated(keep="last")].sort_index()
+                        compact_store.put(
+                            group_key,
+                            group_data,
+                            format="table",
+                            encoding="UTF-8",
+                            index=False,
+                            data_columns=data_columns,
+                        )
+                    if group_key in compact_store:
+                        compact_store.create_table_index(group_key, optlevel=9, kind="full")
+
+                compact_store.root._v_attrs.compacted = now.isoformat()
+
+            self.__store.close()
+            os.replace(compact_path, self._store_path)
+
+        except (IOError, ValueError) as e:
+            if os.path.exists(compact_path):
+                os.remove(compact_path)
+            raise ConnectionException(self, str(e))
+        finally:
+            if not self.__store.is_open:
+                # Reopen the store without truncating it again
+                self.__store = HDFStore(
+                    self._store_path,
+                    mode="a" if self._mode == "w" else self._mode,
+                    complevel=self._compression_level,
+                    complib=self._compression_lib,
+                )
+                self.__store.open()
+
     def __build_columns(self, resources: Resources) -> Sequence[str]:
         if self._columns_unique:
             return [r.id for r in resources]
@@ -202,6 +381,8 @@ class HDFDatabase(Database):
 
     def __extract_data(self, resources: Resources, data: pd.DataFrame) -> pd.DataFrame:
         data.dropna(axis="columns", how="all", inplace=True)
+        if not data.index.is_monotonic_increasing:
+            data.sort_index(inplace=True)
         if not self._columns_unique:
             return data.rename(columns={r.get("column", default=r.key): r.id for r in resources})
         return data
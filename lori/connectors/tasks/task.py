@@ -27,11 +27,15 @@ class ConnectorTask(ABC, Thread):
         self.connector = connector
         self.channels = channels
 
+    # noinspection PyProtectedMember
     def __call__(self, **kwargs) -> Any:
         try:
-            return self.run(**kwargs)
+            result = self.run(**kwargs)
+            self.connector._set_health(True)
+            return result
 
         except ConnectionException as e:
+            self.connector._set_health(False)
             try:
                 self.connector.set_channels(ChannelState.DISCONNECTING)
                 self.connector.disconnect()
@@ -40,6 +44,10 @@ class ConnectorTask(ABC, Thread):
                 raise e
         except ConnectorException as e:
             raise e
+        except (ConnectionError, TimeoutError) as e:
+            # Mark the connector unhealthy, to be disconnected properly and reconnected by the manager
+            self.connector._set_health(False)
+            raise ConnectorException(self.connector, str(e))
         except Exception as e:
             raise ConnectorException(self.connector, str(e))
 
@@ -9,31 +9,167 @@ lori.connectors.virtual
 from __future__ import annotations
 
 import random
-from typing import Optional
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 import pytz as tz
 from lori import Channel, ConfigurationException, Resource, Resources
-from lori.connectors import Connector, ConnectorException, register_connector_type
+from lori.connectors import Connector, ConnectorException, Database, register_connector_type
+from lori.core import Configurations
 from lori.typing import TimestampType
+from lori.util import convert_timezone, to_timedelta
+
+
+class VirtualThroughput:
+    """
+    Counters of the data generated by a virtual connector, to measure the throughput of the processing pipeline.
+
+    """
+
+    reads: int = 0
+    rows: int = 0
+    values: int = 0
+    dropouts: int = 0
+    bursts: int = 0
+
+    _start: float
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.reads = 0
+        self.rows = 0
+        self.values = 0
+        self.dropouts = 0
+        self.bursts = 0
+        self._start = monotonic()
+
+    def count(self, data: pd.DataFrame, dropouts: int = 0, bursts: int = 0) -> None:
+        self.reads += 1
+        self.rows += len(data.index)
+        self.values += int(data.count().sum())
+        self.dropouts += dropouts
+        self.bursts += bursts
+
+    @property
+    def elapsed(self) -> float:
+        return monotonic() - self._start
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / max(self.elapsed, 1e-9)
+
+    @property
+    def values_per_second(self) -> float:
+        return self.values / max(self.elapsed, 1e-9)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return OrderedDict(
+            elapsed=self.elapsed,
+            reads=self.reads,
+            rows=self.rows,
+            values=self.values,
+            dropouts=self.dropouts,
+            bursts=self.bursts,
+            rows_per_second=self.rows_per_second,
+            values_per_second=self.values_per_second,
+        )
 
 
 # noinspection PyShadowingBuiltins
 @register_connector_type("virtual", "random", "dummy")
 class VirtualConnector(Connector):
+    """
+    Connector of virtual channels, holding written values, or generating values to simulate devices and load.
+
+    Channels of the "synthetic" generator draw values from a "uniform", "normal" or random "walk" distribution,
+    generated for all channels at once. Values randomly drop out with the "dropout" rate, while a burst of
+    "burst_size" values will be generated with the "burst" rate. Large numbers of synthetic channels can be
+    configured as templates, with the "count" attribute of a channel section.
+
+    Channels of the "replay" generator replay historical data of the configured database at an accelerated rate.
+    The logged history of each channel will be replayed, or the channel of the "source" attribute.
+
+    """
+
     VIRTUAL: str = "virtual"
     RANDOM: str = "random"
+    SYNTHETIC: str = "synthetic"
+    REPLAY: str = "replay"
+
+    DISTRIBUTIONS: List[str] = ["uniform", "normal", "walk"]
+
+    throughput: VirtualThroughput
 
     _data: pd.Series
 
+    _random: np.random.Generator
+    _synthetic: Dict[str, np.ndarray]
+    _synthetic_ids: List[str]
+    _burst_interval: pd.Timedelta
+
+    _replay_database: Optional[str] = None
+    _replay_start: Optional[pd.Timestamp] = None
+    _replay_end: Optional[pd.Timestamp] = None
+    _replay_speed: float = 1
+    _replay_chunk: pd.Timedelta
+    _replay_loop: bool = True
+    _replay_shift: bool = True
+
+    _replay_sources: Dict[str, Resource]
+    _replay_buffer: Optional[pd.DataFrame] = None
+    _replay_cursor: Optional[pd.Timestamp] = None
+    _replay_position: Optional[pd.Timestamp] = None
+    _replay_origin: Optional[pd.Timestamp] = None
+    _replay_wall: float = 0
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.throughput = VirtualThroughput()
+        self._synthetic = {}
+        self._synthetic_ids = []
+        self._replay_sources = {}
+
+    def configure(self, configs: Configurations) -> None:
+        super().configure(configs)
+        self._random = np.random.default_rng(configs.get_int("seed", default=None))
+        self._burst_interval = to_timedelta(configs.get("burst_interval", default="1s"))
+
+        replay = configs.get_section("replay", defaults={})
+        self._replay_database = replay.get("database", default=None)
+        self._replay_start = replay.get_date("start", default=None)
+        self._replay_end = replay.get_date("end", default=None)
+        self._replay_speed = replay.get_float("speed", default=VirtualConnector._replay_speed)
+        if self._replay_speed <= 0:
+            raise ConfigurationException(f"Invalid replay speed of connector '{self.id}': {self._replay_speed}")
+
+        # Duration of historical data to be read from the database at once
+        self._replay_chunk = to_timedelta(replay.get("chunk", default="1h"))
+        self._replay_loop = replay.get_bool("loop", default=VirtualConnector._replay_loop)
+
+        # Shift replayed timestamps to the time of the replay, compressed by the replay speed
+        self._replay_shift = replay.get_bool("shift", default=VirtualConnector._replay_shift)
+
     def connect(self, resources: Resources) -> None:
         super().connect(resources)
         index = []
         data = []
+        synthetic = []
+        replay = []
         for resource in resources:
-            index.append(resource.id)
-
             generator = resource.get("generator", default=None)
+            if generator == VirtualConnector.SYNTHETIC:
+                synthetic.append(resource)
+                continue
+            if generator == VirtualConnector.REPLAY:
+                replay.append(resource)
+                continue
+
+            index.append(resource.id)
             if generator == VirtualConnector.RANDOM:
                 for attr in ["min", "max"]:
                     if attr not in resource:
@@ -48,22 +184,128 @@ class VirtualConnector(Connector):
                 data.append(resource.get("default", default=None))
         self._data = pd.Series(index=index, data=data)
 
+        self._connect_synthetic(synthetic)
+        self._connect_replay(replay)
+        self.throughput.reset()
+
+    def _connect_synthetic(self, resources: List[Resource]) -> None:
+        def get_float(resource: Resource, attr: str, default: float) -> float:
+            value = resource.get(attr, default=None)
+            return float(value) if value is not None else default
+
+        parameters = {k: [] for k in ["distribution", "min", "max", "mean", "std", "step", "dropout", "burst", "size"]}
+        for resource in resources:
+            distribution = resource.get("distribution", default="uniform")
+            if distribution not in VirtualConnector.DISTRIBUTIONS:
+                raise ConfigurationException(f"Invalid synthetic channel '{resource.id}' distribution: {distribution}")
+
+            minimum = get_float(resource, "min", -np.inf)
+            maximum = get_float(resource, "max", np.inf)
+            if distribution in ["uniform", "walk"] and not (np.isfinite(minimum) and np.isfinite(maximum)):
+                raise ConfigurationException(
+                    f"Invalid synthetic channel '{resource.id}', missing 'min' and 'max' of {distribution} distribution"
+                )
+            center = (minimum + maximum) / 2 if np.isfinite(minimum + maximum) else 0.0
+
+            parameters["distribution"].append(VirtualConnector.DISTRIBUTIONS.index(distribution))
+            parameters["min"].append(minimum)
+            parameters["max"].append(maximum)
+            parameters["mean"].append(get_float(resource, "mean", center))
+            parameters["std"].append(get_float(resource, "std", 1.0))
+            parameters["step"].append(
+                get_float(resource, "step", (maximum - minimum) / 100 if distribution == "walk" else 0.0)
+            )
+            parameters["dropout"].append(get_float(resource, "dropout", 0.0))
+            parameters["burst"].append(get_float(resource, "burst", 0.0))
+            parameters["size"].append(int(resource.get("burst_size", default=10)))
+
+        self._synthetic = {
+            k: np.array(v, dtype=int if k in ["distribution", "size"] else float) for k, v in parameters.items()
+        }
+        self._synthetic_ids = [r.id for r in resources]
+
+        walk = self._synthetic["distribution"] == VirtualConnector.DISTRIBUTIONS.index("walk")
+        self._synthetic["value"] = np.where(
+            walk,
+            self._random.uniform(np.where(walk, self._synthetic["min"], 0), np.where(walk, self._synthetic["max"], 1)),
+            np.nan,
+        )
+
+    def _connect_replay(self, resources: List[Resource]) -> None:
+        self._replay_sources = {}
+        self._replay_buffer = None
+        self._replay_cursor = None
+        self._replay_origin = None
+        if len(resources) == 0:
+            return
+        if self._replay_database is None:
+            raise ConfigurationException(f"Unable to replay channels of connector '{self.id}' without database")
+
+        for resource in resources:
+            if isinstance(resource, Channel) and resource.has_logger():
+                resource = resource.from_logger()
+            source = resource.get("source", default=resource.id)
+            configs = {
+                k: v for k, v in resource.to_configs().items() if k not in ["key", "name", "group", "unit", "type"]
+            }
+            self._replay_sources[resource.id] = Resource(
+                id=source,
+                key=source.split(".")[-1],
+                type=resource.type,
+                unit=resource.unit,
+                **configs,
+            )
+
+    def disconnect(self) -> None:
+        super().disconnect()
+        if self.throughput.reads > 0:
+            self._logger.info(
+                f"Generated {self.throughput.values} values of connector '{self.id}' in "
+                f"{self.throughput.elapsed:.1f} seconds ({self.throughput.values_per_second:.1f} values/s)"
+            )
+
     def read(
         self,
         resources: Resources,
         start: Optional[TimestampType] = None,
         end: Optional[TimestampType] = None,
     ) -> pd.DataFrame:
-        for resource in resources:
-            generator = resource.get("generator", default=VirtualConnector.VIRTUAL)
-            if generator == VirtualConnector.RANDOM:
-                self._read_random(resource)
+        timestamp = pd.Timestamp.now(tz.UTC).floor(freq="s")
+        resource_ids = set(resources.ids)
 
-            elif generator != VirtualConnector.VIRTUAL:
-                raise ConnectorException(
-                    self, f"Trying to read dummy channel '{resource.id}' with generator: {generator}"
-                )
-        return self._data.to_frame(pd.Timestamp.now(tz.UTC).floor(freq="s")).T
+        data = []
+        virtual_ids = set(self._data.index)
+        if not resource_ids.isdisjoint(virtual_ids):
+            for resource in resources:
+                if resource.id not in virtual_ids:
+                    continue
+                generator = resource.get("generator", default=VirtualConnector.VIRTUAL)
+                if generator == VirtualConnector.RANDOM:
+                    self._read_random(resource)
+
+                elif generator != VirtualConnector.VIRTUAL:
+                    raise ConnectorException(
+                        self, f"Trying to read dummy channel '{resource.id}' with generator: {generator}"
+                    )
+            data.append(self._data.to_frame(timestamp).T)
+
+        dropouts = 0
+        bursts = 0
+        if not resource_ids.isdisjoint(self._synthetic_ids):
+            synthetic_data, dropouts, bursts = self._read_synthetic(timestamp)
+            data.append(synthetic_data)
+
+        replay_ids = [i for i in self._replay_sources.keys() if i in resource_ids]
+        if len(replay_ids) > 0:
+            data.append(self._read_replay(replay_ids))
+
+        if len(data) == 0:
+            return pd.DataFrame()
+        data = pd.concat(data, axis="columns").sort_index() if len(data) > 1 else data[0]
+        data = data.loc[:, [c for c in data.columns if c in resource_ids]]
+
+        self.throughput.count(data, dropouts=dropouts, bursts=bursts)
+        return data
 
     def _read_random(self, resource: Resource) -> None:
         range = int(abs(resource.max - resource.min))
@@ -74,6 +316,113 @@ class VirtualConnector(Connector):
             value = resource.max
         self._data[resource.id] = value
 
+    def _generate(self, rows: int) -> np.ndarray:
+        parameters = self._synthetic
+        distributions = parameters["distribution"]
+        values = np.empty((rows, len(distributions)))
+
+        for code, distribution in enumerate(VirtualConnector.DISTRIBUTIONS):
+            selected = distributions == code
+            if not selected.any():
+                continue
+            size = (rows, int(selected.sum()))
+            if distribution == "uniform":
+                values[:, selected] = self._random.uniform(
+                    parameters["min"][selected], parameters["max"][selected], size
+                )
+            elif distribution == "normal":
+                values[:, selected] = self._random.normal(
+                    parameters["mean"][selected], parameters["std"][selected], size
+                )
+            elif distribution == "walk":
+                steps = self._random.normal(0, parameters["step"][selected], size)
+                values[:, selected] = parameters["value"][selected] + np.cumsum(steps, axis=0)
+
+        values = np.clip(values, parameters["min"], parameters["max"])
+        walk = distributions == VirtualConnector.DISTRIBUTIONS.index("walk")
+        parameters["value"][walk] = values[-1, walk]
+        return values
+
+    def _read_synthetic(self, timestamp: pd.Timestamp) -> Tuple[pd.DataFrame, int, int]:
+        parameters = self._synthetic
+        count = len(self._synthetic_ids)
+
+        # Generate the maximum burst size of all bursting channels, and keep only the latest values of the others
+        bursting = self._random.random(count) < parameters["burst"]
+        sizes = np.where(bursting, parameters["size"], 1)
+        rows = int(sizes.max()) if count > 0 else 1
+
+        values = self._generate(rows)
+        values[np.arange(rows)[:, None] < rows - sizes[None, :]] = np.nan
+
+        dropped = (self._random.random(values.shape) < parameters["dropout"]) & ~np.isnan(values)
+        values[dropped] = np.nan
+
+        index = pd.DatetimeIndex([timestamp - (rows - 1 - r) * (self._burst_interval / rows) for r in range(rows)])
+        data = pd.DataFrame(values, index=index, columns=self._synthetic_ids)
+        return data, int(dropped.sum()), int(bursting.sum())
+
+    def _get_replay_database(self) -> Database:
+        database = self.context.get(self._replay_database, None)
+        if not isinstance(database, Database):
+            raise ConnectorException(self, f"Invalid replay database of connector '{self.id}': {self._replay_database}")
+        if not database._is_connected():
+            raise ConnectorException(self, f"Replay database '{database.id}' of connector '{self.id}' not connected")
+        return database
+
+    def _read_replay(self, resource_ids: List[str]) -> pd.DataFrame:
+        database = self._get_replay_database()
+        sources = Resources([self._replay_sources[i] for i in resource_ids])
+        now = monotonic()
+        if self._replay_origin is None:
+            if self._replay_start is None:
+                self._replay_start = database.read_first_index(sources)
+            if self._replay_end is None:
+                self._replay_end = database.read_last_index(sources)
+            if self._replay_start is None or self._replay_end is None:
+                return pd.DataFrame(columns=resource_ids)
+            self._replay_start = convert_timezone(self._replay_start, database.timezone)
+            self._replay_end = convert_timezone(self._replay_end, database.timezone)
+            self._restart_replay(now)
+
+        position = self._replay_start + pd.Timedelta(seconds=(now - self._replay_wall) * self._replay_speed)
+        if position > self._replay_end:
+            if self._replay_cursor >= self._replay_end and self._replay_loop:
+                self._restart_replay(now)
+                position = self._replay_start
+            position = min(position, self._replay_end)
+
+        # Read historical data ahead in chunks, to not request the database for every read
+        while self._replay_position < position:
+            chunk_start = self._replay_position
+            chunk_end = min(max(chunk_start + self._replay_chunk, position), self._replay_end)
+            chunk = database.read(sources, start=chunk_start, end=chunk_end)
+            if chunk is not None and not chunk.empty:
+                chunk = chunk[chunk.index > chunk_start]
+                if self._replay_buffer.empty:
+                    self._replay_buffer = chunk
+                else:
+                    self._replay_buffer = pd.concat([self._replay_buffer, chunk], axis="index")
+            self._replay_position = chunk_end
+
+        data = self._replay_buffer[
+            (self._replay_buffer.index > self._replay_cursor) & (self._replay_buffer.index <= position)
+        ]
+        self._replay_buffer = self._replay_buffer[self._replay_buffer.index > position]
+        self._replay_cursor = position
+
+        data = data.rename(columns={s.id: i for i, s in self._replay_sources.items() if i in resource_ids})
+        if self._replay_shift and not data.empty:
+            data.index = self._replay_origin + (data.index.tz_convert(tz.UTC) - self._replay_start) / self._replay_speed
+        return data
+
+    def _restart_replay(self, now: float) -> None:
+        self._replay_wall = now
+        self._replay_origin = pd.Timestamp.now(tz.UTC)
+        self._replay_cursor = self._replay_start - pd.Timedelta(microseconds=1)
+        self._replay_position = self._replay_cursor
+        self._replay_buffer = pd.DataFrame()
+
     def write(self, data: pd.DataFrame) -> None:
         for id in data.columns:
             if id in self.channels:
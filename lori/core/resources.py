@@ -89,5 +89,10 @@ class Resources(Generic[R], Sequence[R]):
             return r.get(by, default=None)
 
         filter = _by if isinstance(by, str) else by
-        for group_by in list(dict.fromkeys([filter(r) for r in self])):
-            yield group_by, self.filter(lambda r: filter(r) == group_by)
+
+        # Evaluate the group of each resource only once, as resource configurations may be expensive to look up
+        groups = {}
+        for resource in self:
+            groups.setdefault(filter(resource), []).append(resource)
+        for group_by, group in groups.items():
+            yield group_by, type(self)(group)
@@ -89,8 +89,9 @@ class ChannelConnector:
     def is_configured(self) -> bool:
         return self._connector.is_configured() if self.enabled else False
 
+    # noinspection PyProtectedMember
     def is_connected(self) -> bool:
-        return self._connector.is_connected() if self.enabled else False
+        return self._connector._is_connected() if self.enabled else False
 
     def is_database(self) -> bool:
         from lori.connectors import Database
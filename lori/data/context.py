@@ -88,7 +88,22 @@ class DataContext(Context[Channel]):
         for channel_key in [i for i in configs.keys() if i not in defaults]:
             channel_configs = update_recursive(deepcopy(defaults), configs.get_section(channel_key))
             channel_key = validate_key(channel_configs.pop("key", channel_key))
-            channels.append(self._load_from_configs(context, channel_key, **channel_configs))
+
+            # Channel sections with a count are templates, to create several numbered channels at once
+            channel_count = channel_configs.pop("count", None)
+            if channel_count is None:
+                channels.append(self._load_from_configs(context, channel_key, **channel_configs))
+                continue
+            channel_count = int(channel_count)
+            if channel_count < 1:
+                raise ConfigurationException(f"Invalid count of channel template '{channel_key}': {channel_count}")
+            channel_name = channel_configs.pop("name", None)
+            for channel_index in range(1, channel_count + 1):
+                channel_number = str(channel_index).zfill(len(str(channel_count)))
+                channel_template = deepcopy(channel_configs)
+                if channel_name is not None:
+                    channel_template["name"] = f"{channel_name} {channel_number}"
+                channels.append(self._load_from_configs(context, f"{channel_key}_{channel_number}", **channel_template))
         return channels
 
     def _load_from_file(
@@ -11,7 +11,7 @@ from __future__ import annotations
 import datetime as dt
 from abc import abstractmethod
 from functools import wraps
-from typing import Any, Optional, overload
+from typing import Any, Dict, Optional, Tuple, overload
 
 import tzlocal
 
@@ -23,7 +23,7 @@ from lori.core import Configurations, Resources
 from lori.data.util import hash_data
 from lori.data.validation import validate_index, validate_timezone
 from lori.typing import TimestampType
-from lori.util import convert_timezone, to_date, to_timezone
+from lori.util import convert_timezone, parse_freq, to_date, to_timedelta, to_timezone
 
 # FIXME: Remove this once Python >= 3.9 is a requirement
 try:
@@ -38,12 +38,14 @@ class DatabaseMeta(ConnectorMeta):
     def __call__(cls, *args, **kwargs):
         database = super().__call__(*args, **kwargs)
         cls._wrap_method(database, "hash")
+        cls._wrap_method(database, "hash_buckets")
         cls._wrap_method(database, "exists")
         cls._wrap_method(database, "read_first")
         cls._wrap_method(database, "read_first_index")
         cls._wrap_method(database, "read_last")
         cls._wrap_method(database, "read_last_index")
         cls._wrap_method(database, "delete")
+        cls._wrap_method(database, "compact")
 
         return database
 
@@ -52,6 +54,15 @@ class DatabaseMeta(ConnectorMeta):
 class Database(Connector, metaclass=DatabaseMeta):
     timezone: tz.BaseTzInfo
 
+    _extents_cache: bool = False
+    _extents_first: Dict[Tuple[str, ...], Optional[pd.Timestamp]]
+    _extents_last: Dict[Tuple[str, ...], Optional[pd.Timestamp]]
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._extents_first = {}
+        self._extents_last = {}
+
     def configure(self, configs: Configurations) -> None:
         super().configure(configs)
 
@@ -60,6 +71,10 @@ class Database(Connector, metaclass=DatabaseMeta):
             timezone = tzlocal.get_localzone_name()
         self.timezone = to_timezone(timezone)
 
+        # Optionally cache the first and last index of resources, updated by writes and deletions of this database.
+        # Only enable this if no other process writes to the same database, as the cache would not be invalidated.
+        self._extents_cache = configs.get_bool("cache_extents", default=Database._extents_cache)
+
     # noinspection PyShadowingBuiltins
     def hash(
         self,
@@ -95,6 +110,60 @@ class Database(Connector, metaclass=DatabaseMeta):
 
             return self._run_hash(resources, start=start, end=end, method=method, encoding=encoding, *args, **kwargs)
 
+    # noinspection PyShadowingBuiltins
+    def hash_buckets(
+        self,
+        resources: Resources,
+        start: Optional[TimestampType] = None,
+        end: Optional[TimestampType] = None,
+        freq: str = "h",
+        method: Literal["MD5", "SHA1", "SHA256", "SHA512"] = "MD5",
+        encoding: str = "UTF-8",
+    ) -> Optional[pd.Series]:
+        """
+        Generates a hash for every bucket of a fixed frequency, aligned to the unix epoch, that contains any values.
+        Buckets allow to compare large ranges and to only transfer the differing parts.
+
+        """
+        data = self._run_read(resources, start, end)
+        data = self._validate(resources, data)
+        data = self._get_range(data, start, end)
+        if data is None or data.empty:
+            return None
+
+        columns = [r.id for r in resources if r.id in data.columns]
+        data = data.loc[:, columns].dropna(axis="index", how="all")
+        if data.empty:
+            return None
+        buckets = data.index.tz_convert(tz.UTC).floor(_to_bucket_freq(freq))
+        hashes = pd.Series(
+            {b: hash_data(d, method, encoding) for b, d in data.groupby(buckets)},
+            name="hash",
+            dtype=object,
+        )
+        hashes.index.name = data.index.name
+        return hashes
+
+    @wraps(hash_buckets, updated=())
+    def _do_hash_buckets(
+        self,
+        resources: Resources,
+        start: Optional[TimestampType] = None,
+        end: Optional[TimestampType] = None,
+        freq: str = "h",
+        method: Literal["MD5", "SHA1", "SHA256", "SHA512"] = "MD5",
+        encoding: str = "UTF-8",
+        *args,
+        **kwargs,
+    ) -> Optional[pd.Series]:
+        with self._lock:
+            if not self._is_connected():
+                raise ConnectionException(self, f"Database '{self.id}' not connected")
+
+            return self._run_hash_buckets(
+                resources, start=start, end=end, freq=freq, method=method, encoding=encoding, *args, **kwargs
+            )
+
     def exists(
         self,
         resources: Resources,
@@ -186,9 +255,15 @@ class Database(Connector, metaclass=DatabaseMeta):
             if not self._is_connected():
                 raise ConnectionException(self, f"Database '{self.id}' not connected")
 
+            extents_key = _build_extents_key(resources)
+            if self._extents_cache and extents_key in self._extents_first:
+                return self._extents_first[extents_key]
+
             index = self._run_read_first_index(resources, *args, **kwargs)
             if isinstance(index, (pd.Timestamp, dt.datetime)):
                 index = convert_timezone(index, timezone=self.timezone)
+                if self._extents_cache:
+                    self._extents_first[extents_key] = index
             return index
 
     @abstractmethod
@@ -218,11 +293,64 @@ class Database(Connector, metaclass=DatabaseMeta):
             if not self._is_connected():
                 raise ConnectionException(self, f"Database '{self.id}' not connected")
 
+            extents_key = _build_extents_key(resources)
+            if self._extents_cache and extents_key in self._extents_last:
+                return self._extents_last[extents_key]
+
             index = self._run_read_last_index(resources, *args, **kwargs)
             if isinstance(index, (pd.Timestamp, dt.datetime)):
                 index = convert_timezone(index, timezone=self.timezone)
+                if self._extents_cache:
+                    self._extents_last[extents_key] = index
             return index
 
+    def _update_extents(self, data: pd.DataFrame) -> None:
+        if not self._extents_cache or data is None or data.empty or not isinstance(data.index, pd.DatetimeIndex):
+            return
+
+        for extents_key in set(self._extents_first.keys()) | set(self._extents_last.keys()):
+            extents_columns = [c for c in extents_key if c in data.columns]
+            if len(extents_columns) == 0:
+                continue
+            extents_data = data[extents_columns].dropna(axis="index", how="all")
+            if extents_data.empty:
+                continue
+            extents_first = convert_timezone(extents_data.index.min(), timezone=self.timezone)
+            extents_last = convert_timezone(extents_data.index.max(), timezone=self.timezone)
+
+            if extents_key in self._extents_first:
+                first = self._extents_first[extents_key]
+                self._extents_first[extents_key] = extents_first if first is None else min(first, extents_first)
+            if extents_key in self._extents_last:
+                last = self._extents_last[extents_key]
+                self._extents_last[extents_key] = extents_last if last is None else max(last, extents_last)
+
+    def _clear_extents(
+        self,
+        resources: Resources,
+        start: Optional[TimestampType] = None,
+        end: Optional[TimestampType] = None,
+    ) -> None:
+        start = convert_timezone(start, timezone=self.timezone)
+        end = convert_timezone(end, timezone=self.timezone)
+
+        resource_ids = set(resources.ids)
+        for extents_key in list(self._extents_first.keys()):
+            first = self._extents_first[extents_key]
+            if resource_ids.isdisjoint(extents_key) or first is None:
+                continue
+            # The first index may only remain valid, if the deleted range begins after it
+            if start is None or start <= first:
+                del self._extents_first[extents_key]
+
+        for extents_key in list(self._extents_last.keys()):
+            last = self._extents_last[extents_key]
+            if resource_ids.isdisjoint(extents_key) or last is None:
+                continue
+            # The last index may only remain valid, if the deleted range ends before it
+            if end is None or end >= last:
+                del self._extents_last[extents_key]
+
     def _validate(self, resources: Resources, data: pd.DataFrame) -> pd.DataFrame:
         if not data.empty:
             data = validate_index(data)
@@ -287,6 +415,47 @@ class Database(Connector, metaclass=DatabaseMeta):
                 raise ConnectionException(self, f"Database '{self.id}' not connected")
 
             self._run_delete(resources, start=start, end=end, *args, **kwargs)
+            self._clear_extents(resources, start, end)
+
+    def compact(self) -> None:
+        """
+        Reclaims space and restores the layout of the stored data, e.g. after deletions while rotating.
+        Databases that do not need any maintenance may ignore this.
+
+        """
+        pass
+
+    @wraps(compact, updated=())
+    def _do_compact(self, *args, **kwargs) -> None:
+        with self._lock:
+            if not self._is_connected():
+                raise ConnectionException(self, f"Database '{self.id}' not connected")
+
+            self._run_compact(*args, **kwargs)
+
+    # noinspection PyUnresolvedReferences
+    @wraps(Connector.write, updated=())
+    def _do_write(self, data: pd.DataFrame, *args, **kwargs) -> None:
+        super()._do_write(data, *args, **kwargs)
+        with self._lock:
+            self._update_extents(data)
+
+    def _do_disconnect(self) -> None:
+        super()._do_disconnect()
+        with self._lock:
+            self._extents_first.clear()
+            self._extents_last.clear()
+
+
+def _build_extents_key(resources: Resources) -> Tuple[str, ...]:
+    return tuple(sorted(resources.ids))
+
+
+def _to_bucket_freq(freq: str) -> pd.Timedelta:
+    bucket_freq = to_timedelta(parse_freq(freq))
+    if not isinstance(bucket_freq, pd.Timedelta):
+        raise ValueError(f"Invalid hash bucket frequency of variable length: {freq}")
+    return bucket_freq
 
 
 class DatabaseException(ConnectorException):
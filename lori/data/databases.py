@@ -150,5 +150,13 @@ class Databases(ConnectorContext, Configurator):
 
                 except ResourceException as e:
                     self._logger.warning(f"Error aggregating '{retention.method}' retaining {retention.keep}: {str(e)}")
+
+            databases = {c.logger._connector for c in channels if c.logger.enabled}
+            for database in [d for d in databases if isinstance(d, Database)]:
+                try:
+                    database.compact()
+
+                except ResourceException as e:
+                    self._logger.warning(f"Error compacting database '{database.id}': {str(e)}")
         finally:
             self.disconnect()
@@ -271,7 +271,7 @@ class DataManager(DataContext, Activator, Entity):
 
             if not connector._is_connected() and connector._connected:
                 # Connection aborted and not yet disconnected properly
-                self._disconnect(connector)
+                self.__disconnect(connector)
                 continue
 
             connect_task = self.__connect(connector)
@@ -429,7 +429,7 @@ class DataManager(DataContext, Activator, Entity):
                 freq is None
                 or not channel.has_connector()
                 or not self.connectors.get(channel.connector.id, False)
-                or not self.connectors.get(channel.connector.id).is_connected()
+                or not self.connectors.get(channel.connector.id)._is_connected()
             ):
                 return False
             if pd.isna(channel.connector.timestamp):
@@ -14,6 +14,7 @@ from typing import Any, Dict, Mapping, Optional
 
 import tzlocal
 
+import numpy as np
 import pandas as pd
 import pytz as tz
 from lori import ConfigurationException, Resource, ResourceException, Resources
@@ -39,6 +40,7 @@ class Replicator:
     floor: Optional[str]
     freq: str
     slice: bool
+    buckets: Optional[str]
     timezone: tz.BaseTzInfo
 
     # noinspection PyShadowingNames
@@ -76,6 +78,7 @@ class Replicator:
         floor: Optional[str] = None,
         freq: str = "D",
         slice: bool = True,
+        buckets: Optional[str] = None,
         enabled: bool = True,
     ) -> None:
         self._logger = logging.getLogger(self.__module__)
@@ -93,6 +96,7 @@ class Replicator:
         self.floor = parse_freq(floor)
         self.freq = parse_freq(freq)
         self.slice = to_bool(slice)
+        self.buckets = parse_freq(buckets)
 
     @classmethod
     def _assert_database(cls, database):
@@ -135,6 +139,7 @@ class Replicator:
             "floor": self.floor,
             "freq": self.freq,
             "slice": self.slice,
+            "buckets": self.buckets,
             "timezone": self.timezone,
         }
 
@@ -146,7 +151,7 @@ class Replicator:
     def replicate(self, resources: Resources, full: bool = False, force: bool = False) -> None:
         if not self.enabled:
             raise ReplicationException(self.database, "Replication disabled")
-        if not self.database.is_connected():
+        if not self.database._is_connected():
             raise ReplicationException(self.database, f"Replication database '{self.database.id}' not connected")
         kwargs = self._get_args()
         kwargs["full"] = full
@@ -183,6 +188,7 @@ def replicate(
     full: bool = True,
     force: bool = False,
     slice: str = True,
+    buckets: Optional[str] = None,
 ) -> None:
     if source is None or target is None or len(resources) == 0:
         return
@@ -226,13 +232,13 @@ def replicate(
         prior_freq = freq if floor is None else floor
         prior_end = floor_date(start if start <= now else now, timezone=timezone, freq=prior_freq)
         prior_start = prior_end - to_timedelta(prior_freq) + pd.Timedelta(seconds=1)
-        replicate_range(source, target, resources, prior_start, prior_end, force=force)
+        replicate_range(source, target, resources, prior_start, prior_end, force=force, buckets=buckets)
 
     if slice:
         for slice_start, slice_end in slice_range(start, end, timezone=timezone, freq=freq):
-            replicate_range(source, target, resources, slice_start, slice_end, force=force)
+            replicate_range(source, target, resources, slice_start, slice_end, force=force, buckets=buckets)
     else:
-        replicate_range(source, target, resources, start, end, force=force)
+        replicate_range(source, target, resources, start, end, force=force, buckets=buckets)
 
 
 def replicate_range(
@@ -242,7 +248,12 @@ def replicate_range(
     start: pd.Timestamp,
     end: pd.Timestamp,
     force: bool = False,
+    buckets: Optional[str] = None,
 ) -> None:
+    if buckets is not None:
+        replicate_buckets(source, target, resources, start, end, freq=buckets, force=force)
+        return
+
     logger = logging.getLogger(Replicator.__module__)
     logger.debug(
         f"Start copying data of resource{'s' if len(resources) > 1 else ''} "
@@ -305,3 +316,94 @@ def replicate_range(
         + f" from {start.strftime('%d.%m.%Y (%H:%M:%S)')}"
         + f" to {end.strftime('%d.%m.%Y (%H:%M:%S)')}"
     )
+
+
+# noinspection PyShadowingBuiltins
+def replicate_buckets(
+    source: Database,
+    target: Database,
+    resources: Resources,
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+    freq: str = "h",
+    force: bool = False,
+) -> None:
+    """
+    Compares the hashes of fixed-size time buckets of the source and target database and only copies the
+    data of differing buckets.
+
+    """
+    logger = logging.getLogger(Replicator.__module__)
+    logger.debug(
+        f"Start comparing {freq} buckets of resource{'s' if len(resources) > 1 else ''} "
+        + ", ".join([f"'{r.id}'" for r in resources])
+        + f" from {start.strftime('%d.%m.%Y (%H:%M:%S)')}"
+        + f" to {end.strftime('%d.%m.%Y (%H:%M:%S)')}"
+    )
+
+    source_hashes = source.hash_buckets(resources, start, end, freq=freq)
+    if source_hashes is None or source_hashes.empty:
+        logger.debug(
+            f"Skipping time slice without database data for resource{'s' if len(resources) > 1 else ''} "
+            + ", ".join([f"'{r.id}'" for r in resources]),
+        )
+        return
+
+    target_hashes = target.hash_buckets(resources, start, end, freq=freq)
+    if target_hashes is None:
+        target_hashes = pd.Series(dtype=object)
+
+    buckets = source_hashes.index.union(target_hashes.index)
+    source_hashes = source_hashes.reindex(buckets)
+    target_hashes = target_hashes.reindex(buckets)
+    differing = buckets[(source_hashes != target_hashes) & source_hashes.notna()]
+    if len(differing) == 0:
+        logger.debug(
+            f"Skipping time slice without changed data for resource{'s' if len(resources) > 1 else ''} "
+            + ", ".join([f"'{r.id}'" for r in resources])
+        )
+        return
+
+    # Copy contiguous runs of differing buckets at once
+    bucket_freq = to_timedelta(freq)
+    runs = (pd.Series(differing).diff() != bucket_freq).cumsum().to_numpy()
+    for run in np.unique(runs):
+        run_buckets = differing[runs == run]
+        run_start = max(start, run_buckets[0])
+        run_end = min(end, run_buckets[-1] + bucket_freq - pd.Timedelta(seconds=1))
+
+        data = source.read(resources, start=run_start, end=run_end)
+        if data is None or data.empty:
+            continue
+
+        logger.debug(
+            f"Copying {len(data)} values of resource{'s' if len(resources) > 1 else ''} "
+            + ", ".join([f"'{r.id}'" for r in resources])
+            + f" from {run_start.strftime('%d.%m.%Y (%H:%M:%S)')}"
+            + f" to {run_end.strftime('%d.%m.%Y (%H:%M:%S)')}"
+        )
+
+        target.write(data)
+        run_hashes = target.hash_buckets(resources, run_start, run_end, freq=freq)
+        run_hashes = run_hashes.reindex(run_buckets) if run_hashes is not None else None
+        if run_hashes is None or not run_hashes.equals(source_hashes.reindex(run_buckets)):
+            if force:
+                target.delete(resources, run_start, run_end)
+                target.write(data)
+                continue
+
+            logger.error(
+                f"Mismatching for {len(data)} values of resource{'s' if len(resources) > 1 else ''} "
+                + ",".join([f"'{r.id}'" for r in resources])
+                + f" in {len(run_buckets)} buckets"
+                + f" from {run_start.strftime('%d.%m.%Y (%H:%M:%S)')}"
+                + f" to {run_end.strftime('%d.%m.%Y (%H:%M:%S)')}"
+            )
+            raise ReplicationException("Checksum mismatch while synchronizing")
+
+        logger.info(
+            f"Replicated {len(data)} values of resource{'s' if len(resources) > 1 else ''} "
+            + ", ".join([f"'{r.id}'" for r in resources])
+            + f" from {run_start.strftime('%d.%m.%Y (%H:%M:%S)')}"
+            + f" to {run_end.strftime('%d.%m.%Y (%H:%M:%S)')}"
+        )
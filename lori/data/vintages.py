@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+lori.data.vintages
+~~~~~~~~~~~~~~~~~~
+
+
+"""
+
+from __future__ import annotations
+
+import glob
+import logging
+import os
+from collections import OrderedDict
+from threading import Lock
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+import pytz as tz
+from lori.core import Configurations
+from lori.typing import TimestampType, TimezoneType
+from lori.util import to_date, to_timedelta, to_timezone
+
+VINTAGE_FILE_PREFIX = "issue="
+VINTAGE_FILE_SUFFIX = ".parquet"
+
+
+class Vintages:
+    """
+    Store of forecast vintages, recording every issue of a forecast by its issue and target time, to be able to
+    reproduce what was forecast at any given time.
+
+    Values of a target that did not change since the latest previous issue are not stored again, so each issue only
+    holds changed values. Missing values of an issue do not overwrite previously forecast values. Issues are stored
+    as Parquet files, partitioned by the day of the issue, of which only the days within the forecast horizon of a
+    queried range will be read.
+
+    """
+
+    ISSUE: str = "issue"
+    TARGET: str = "timestamp"
+
+    dir: str
+    horizon: pd.Timedelta
+    timezone: TimezoneType
+
+    _partitions: OrderedDict[str, pd.DataFrame]
+    _partitions_size: int
+    _lock: Lock
+
+    def __init__(
+        self,
+        dir: str,
+        horizon: str | pd.Timedelta = "10D",
+        timezone: Optional[TimezoneType | str] = None,
+    ) -> None:
+        self._logger = logging.getLogger(self.__module__)
+        self._partitions = OrderedDict()
+        self._lock = Lock()
+        self.dir = str(dir)
+        self.horizon = to_timedelta(horizon)
+
+        # Keep the most recently used partitions in memory, enough to read a single range within the horizon
+        self._partitions_size = int(np.ceil(self.horizon / pd.Timedelta(days=1))) + 2
+        self.timezone = to_timezone(timezone) if timezone is not None else tz.UTC
+
+    @classmethod
+    def from_configs(cls, configs: Configurations, dir: str, **kwargs) -> Vintages:
+        return cls(
+            dir=configs.get("dir", default=dir),
+            horizon=configs.get("horizon", default="10D"),
+            **kwargs,
+        )
+
+    def write(self, data: pd.DataFrame, issue: Optional[TimestampType] = None) -> int:
+        """
+        Record a forecast issue, indexed by its target timestamps.
+
+        :param data:
+            the forecasted data of the issue, indexed by target timestamps.
+        :type data:
+            :class:`pandas.DataFrame`
+
+        :param issue:
+            the time the forecast was issued at. Defaults to now.
+        :type issue:
+            :class:`pandas.Timestamp`, datetime or str
+
+        :returns:
+            the number of values that changed since the previous issue and were stored.
+        :rtype:
+            int
+        """
+        issue = to_date(issue, timezone=self.timezone) if issue is not None else pd.Timestamp.now(tz=tz.UTC)
+        issue = issue.tz_convert(tz.UTC)
+
+        data = data.copy()
+        data.index = pd.DatetimeIndex(data.index).tz_convert(tz.UTC)
+        data = data[~data.index.duplicated(keep="last")].sort_index()
+        if data.empty:
+            return 0
+
+        with self._lock:
+            previous = self._read(data.index[0], data.index[-1], issue)
+            previous = previous.reindex(index=data.index, columns=data.columns)
+            changed = data.mask(data.eq(previous) | data.isna()).dropna(how="all")
+            if changed.empty:
+                self._logger.debug(f"Skipping unchanged forecast issue of {issue}")
+                return 0
+
+            values = int(changed.count().sum())
+            changed.index.name = self.TARGET
+            changed = changed.reset_index()
+            changed.insert(0, self.ISSUE, issue)
+
+            partition = self._get_partition_path(issue)
+            partition_data = self._read_partition(partition)
+            if partition_data is not None:
+                partition_data = partition_data[partition_data[self.ISSUE] != issue]
+                changed = pd.concat([partition_data, changed], axis="index", ignore_index=True)
+            changed = changed.sort_values([self.TARGET, self.ISSUE], ignore_index=True)
+
+            self._write_partition(partition, changed)
+            self._logger.debug(f"Stored {values} changed values of forecast issue {issue}")
+            return values
+
+    def read(
+        self,
+        start: Optional[TimestampType] = None,
+        end: Optional[TimestampType] = None,
+        as_of: Optional[TimestampType] = None,
+    ) -> pd.DataFrame:
+        """
+        Read the latest forecast of every target, as it was known at the given time.
+
+        :param start:
+            the first target timestamp to be read.
+        :param end:
+            the last target timestamp to be read.
+        :param as_of:
+            the point in time, of which the latest issued values will be returned. Defaults to now.
+
+        :returns:
+            the forecasted data, indexed by target timestamps.
+        :rtype:
+            :class:`pandas.DataFrame`
+        """
+        start = to_date(start, timezone=self.timezone)
+        end = to_date(end, timezone=self.timezone)
+        as_of = to_date(as_of, timezone=self.timezone) if as_of is not None else pd.Timestamp.now(tz=tz.UTC)
+        with self._lock:
+            data = self._read(start, end, as_of)
+        if not data.empty:
+            data.index = data.index.tz_convert(self.timezone)
+        return data
+
+    def issues(
+        self,
+        start: Optional[TimestampType] = None,
+        end: Optional[TimestampType] = None,
+    ) -> pd.DatetimeIndex:
+        """
+        Get the times of all recorded forecast issues within the given range.
+
+        """
+        start = to_date(start, timezone=self.timezone)
+        end = to_date(end, timezone=self.timezone)
+        issues = []
+        with self._lock:
+            for partition in self._get_partition_paths(start, end):
+                partition_data = self._read_partition(partition)
+                if partition_data is not None:
+                    issues.append(partition_data[self.ISSUE])
+        if len(issues) == 0:
+            return pd.DatetimeIndex([], tz=self.timezone, name=self.ISSUE)
+
+        issues = pd.DatetimeIndex(pd.concat(issues).unique(), name=self.ISSUE).sort_values()
+        if start is not None:
+            issues = issues[issues >= start]
+        if end is not None:
+            issues = issues[issues <= end]
+        return issues.tz_convert(self.timezone)
+
+    def _read(
+        self,
+        start: Optional[pd.Timestamp],
+        end: Optional[pd.Timestamp],
+        as_of: pd.Timestamp,
+    ) -> pd.DataFrame:
+        # Only issues within the horizon before the first target may hold values of the queried range
+        issue_start = start - self.horizon if start is not None else None
+        data = []
+        for partition in self._get_partition_paths(issue_start, as_of):
+            partition_data = self._read_partition(partition)
+            if partition_data is None:
+                continue
+            selected = partition_data[self.ISSUE] <= as_of
+            if start is not None:
+                selected &= partition_data[self.TARGET] >= start
+            if end is not None:
+                selected &= partition_data[self.TARGET] <= end
+            data.append(partition_data[selected])
+
+        data = [d for d in data if not d.empty]
+        if len(data) == 0:
+            return pd.DataFrame(index=pd.DatetimeIndex([], tz=tz.UTC, name=self.TARGET))
+        data = pd.concat(data, axis="index", ignore_index=True) if len(data) > 1 else data[0]
+
+        # The last valid value of each column is the latest forecast of a target, as unchanged values are missing
+        data = data.sort_values([self.TARGET, self.ISSUE]).drop(columns=[self.ISSUE])
+        return data.groupby(self.TARGET, sort=True).last().dropna(axis="columns", how="all")
+
+    def _get_partition_path(self, issue: pd.Timestamp) -> str:
+        return os.path.join(self.dir, f"{VINTAGE_FILE_PREFIX}{issue.strftime('%Y-%m-%d')}{VINTAGE_FILE_SUFFIX}")
+
+    def _get_partition_paths(self, start: Optional[pd.Timestamp], end: Optional[pd.Timestamp]) -> List[str]:
+        start_day = start.tz_convert(tz.UTC).strftime("%Y-%m-%d") if start is not None else None
+        end_day = end.tz_convert(tz.UTC).strftime("%Y-%m-%d") if end is not None else None
+
+        partitions = []
+        for partition in sorted(glob.glob(os.path.join(self.dir, f"{VINTAGE_FILE_PREFIX}*{VINTAGE_FILE_SUFFIX}"))):
+            day = os.path.basename(partition)[len(VINTAGE_FILE_PREFIX) : -len(VINTAGE_FILE_SUFFIX)]
+            if (start_day is None or day >= start_day) and (end_day is None or day <= end_day):
+                partitions.append(partition)
+        return partitions
+
+    def _read_partition(self, partition: str) -> Optional[pd.DataFrame]:
+        partition_data = self._partitions.get(partition)
+        if partition_data is None:
+            if not os.path.isfile(partition):
+                return None
+            partition_data = pd.read_parquet(partition)
+        self._cache_partition(partition, partition_data)
+        return partition_data
+
+    def _write_partition(self, partition: str, data: pd.DataFrame) -> None:
+        os.makedirs(self.dir, exist_ok=True)
+        partition_temp = f"{partition}.tmp"
+        data.to_parquet(partition_temp, index=False)
+        os.replace(partition_temp, partition)
+        self._cache_partition(partition, data)
+
+    def _cache_partition(self, partition: str, data: pd.DataFrame) -> None:
+        self._partitions[partition] = data
+        self._partitions.move_to_end(partition)
+        while len(self._partitions) > self._partitions_size:
+            self._partitions.popitem(last=False)
@@ -9,15 +9,33 @@ lori.io.csv
 from __future__ import annotations
 
 import glob
+import io
 import os
-from typing import List, Mapping, Optional
+import re
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 import pytz as tz
 from lori.core import ResourceException
 from lori.typing import TimestampType, TimezoneType
 from lori.util import ceil_date, floor_date, to_date, to_timedelta
 
+TAIL_BLOCK_SIZE = 4096
+INDEX_CHUNK_SIZE = 1000
+
+# Closed periods may be archived in a compressed format, which will be read transparently
+ARCHIVE_SUFFIXES = {
+    "gzip": ".csv.gz",
+    "zstd": ".csv.zst",
+    "parquet": ".parquet",
+}
+FILE_SUFFIXES = [".csv", *ARCHIVE_SUFFIXES.values()]
+
+_OFFSET_PATTERN = re.compile(r"([+-])(\d{2}):(\d{2})")
+
 
 # noinspection PyShadowingBuiltins
 def has_range(
@@ -28,10 +46,133 @@ def has_range(
     end: TimestampType | str,
     timezone: tz.tzinfo = tz.UTC,
 ):
-    files = get_files(path, freq, format, start, end, timezone)
+    files = CsvIndex(path, freq, format, timezone).select(start, end)
     return len(files) > 0
 
 
+class CsvFile:
+    """
+    Entry of a :class:`CsvIndex`, describing a CSV file of a single period and the range of its timestamps,
+    if already known.
+
+    """
+
+    path: str
+    start: pd.Timestamp
+    end: pd.Timestamp
+
+    first: Optional[pd.Timestamp] = None
+    last: Optional[pd.Timestamp] = None
+
+    columns: Optional[Tuple[str, ...]] = None
+
+    # Modification time and size, to detect changes of the file
+    stat: Tuple[int, int]
+
+    def __init__(self, path: str, start: pd.Timestamp, end: pd.Timestamp, stat: Tuple[int, int]) -> None:
+        self.path = path
+        self.start = start
+        self.end = end
+        self.stat = stat
+        self.first = None
+        self.last = None
+        self.columns = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.path})"
+
+    @property
+    def archived(self) -> bool:
+        return not self.path.endswith(".csv")
+
+    def overlaps(self, start: Optional[pd.Timestamp] = None, end: Optional[pd.Timestamp] = None) -> bool:
+        if start is not None and (self.end <= start or (self.last is not None and self.last < start)):
+            return False
+        if end is not None and (self.start > end or (self.first is not None and self.first > end)):
+            return False
+        return True
+
+    def update(self, index: pd.Index) -> None:
+        if not isinstance(index, pd.DatetimeIndex) or len(index) == 0:
+            return
+        self.first = index.min()
+        self.last = index.max()
+
+
+class CsvIndex:
+    """
+    Index of the CSV files in a directory, named by the date of their period. Files of a time range can be selected
+    without probing the file system for every period, and the range of timestamps of each file is cached once read.
+
+    The index is refreshed incrementally with a single directory scan, only resetting entries of modified files.
+
+    """
+
+    path: str
+    freq: str
+    format: str
+    timezone: Optional[TimezoneType]
+
+    _files: Dict[str, CsvFile]
+    _dates: Dict[str, Optional[pd.Timestamp]]
+
+    # noinspection PyShadowingBuiltins
+    def __init__(self, path: str, freq: str, format: str, timezone: Optional[TimezoneType] = None) -> None:
+        self.path = path
+        self.freq = freq
+        self.format = format
+        self.timezone = timezone if timezone is not None else tz.UTC
+        self._files = {}
+        self._dates = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def refresh(self) -> List[CsvFile]:
+        with self._lock:
+            files = {}
+            if os.path.isdir(self.path):
+                with os.scandir(self.path) as entries:
+                    for entry in entries:
+                        if not any(entry.name.endswith(s) for s in FILE_SUFFIXES) or not entry.is_file():
+                            continue
+                        date = self._parse_date(entry.name)
+                        if date is None:
+                            continue
+                        stat = entry.stat()
+                        stat = (stat.st_mtime_ns, stat.st_size)
+
+                        file = self._files.get(entry.name, None)
+                        if file is None or file.stat != stat:
+                            end = _next_date(date, self.freq, self.timezone)
+                            file = CsvFile(entry.path, date, end, stat)
+                        files[entry.name] = file
+
+            # Plain files of archived periods may contain values written later and will be sorted last
+            self._files = dict(sorted(files.items(), key=lambda f: (f[1].start, not f[1].archived)))
+            return list(self._files.values())
+
+    def select(
+        self,
+        start: Optional[TimestampType | str] = None,
+        end: Optional[TimestampType | str] = None,
+    ) -> List[CsvFile]:
+        start = to_date(start, self.timezone)
+        end = to_date(end, self.timezone)
+        return [f for f in self.refresh() if f.overlaps(start, end)]
+
+    def _parse_date(self, filename: str) -> Optional[pd.Timestamp]:
+        if filename not in self._dates:
+            suffix = next(s for s in FILE_SUFFIXES if filename.endswith(s))
+            try:
+                date = to_date(filename[: -len(suffix)], timezone=self.timezone, format=self.format)
+            except ValueError:
+                date = None
+            self._dates[filename] = date
+        return self._dates[filename]
+
+
 # noinspection PyShadowingBuiltins
 def read_files(
     path: str,
@@ -40,29 +181,70 @@ def read_files(
     start: Optional[TimestampType | str] = None,
     end: Optional[TimestampType | str] = None,
     timezone: Optional[TimezoneType] = None,
-    **kwargs,
+    index_column: str = "Timestamp",
+    index_type: str = "Timestamp",
+    separator: str = ",",
+    decimal: str = ".",
+    rename: Optional[Mapping[str, str]] = None,
+    encoding: str = "utf-8-sig",
+    engine: Optional[str] = None,
+    index: Optional[CsvIndex] = None,
+    workers: int = 1,
 ) -> pd.DataFrame:
-    data = pd.DataFrame()
+    """
+    Reads the content of all CSV files of a directory, overlapping the specified time range.
+
+    Files are selected from the passed :class:`CsvIndex` if available, and parsed in parallel by the specified
+    number of workers. The index column of all files will be parsed only once, after concatenating the files.
+
+    :returns:
+        the retrieved columns, indexed by their timestamp
+    :rtype:
+        :class:`pandas.DataFrame`
+    """
     start = to_date(start, timezone)
     end = to_date(end, timezone)
 
-    files = get_files(path, freq, format, start, end, timezone)
+    if index is None:
+        index = CsvIndex(path, freq, format, timezone)
+    files = index.select(start, end)
     if len(files) == 0:
-        return data
-    elif len(files) == 1:
-        data = read_file(files[0], timezone=timezone, **kwargs)
+        return pd.DataFrame()
+
+    def _read_file(file: CsvFile) -> pd.DataFrame:
+        return _read_raw(file.path, separator=separator, decimal=decimal, encoding=encoding, engine=engine)
+
+    if workers > 1 and len(files) > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(files)), thread_name_prefix="csv") as executor:
+            data = list(executor.map(_read_file, files))
     else:
-        for file in get_files(path, freq, format, start, end, timezone):
-            if not data.empty and (end is not None and data.index[-1] > end):
-                break
-            file_data = read_file(file, timezone=timezone, **kwargs)
-            data = pd.concat([data, file_data], axis="index")
+        data = [_read_file(file) for file in files]
+
+    files = [f for f, d in zip(files, data) if not d.empty]
+    data = [d for d in data if not d.empty]
+    if len(data) == 0:
+        return pd.DataFrame()
+    lengths = [len(d) for d in data]
+    if len(data) == 1:
+        data = data[0]
+    else:
+        data = pd.concat(data, axis="index", ignore_index=True)
+    data = _parse_data(data, index_column, index_type, timezone, rename)
 
-    if data.empty:
-        return data
-    if not pd.isna(start):
+    if isinstance(data.index, pd.DatetimeIndex):
+        offsets = np.cumsum([0, *lengths])
+        for file, offset_start, offset_end in zip(files, offsets[:-1], offsets[1:]):
+            file.update(data.index[offset_start:offset_end])
+
+        if len(set(f.start for f in files)) < len(files):
+            # Values of plain files, written after the period was archived, take precedence
+            data = data[~data.index.duplicated(keep="last")].sort_index()
+
+    if not pd.isna(start) and not pd.isna(end):
+        data = data.loc[(data.index >= start) & (data.index <= end), :]
+    elif not pd.isna(start):
         data = data.loc[data.index >= start, :]
-    if not pd.isna(end):
+    elif not pd.isna(end):
         data = data.loc[data.index <= end, :]
     return data
 
@@ -76,6 +258,7 @@ def read_file(
     decimal: str = ".",
     rename: Optional[Mapping[str, str]] = None,
     encoding: str = "utf-8-sig",
+    engine: Optional[str] = None,
 ) -> pd.DataFrame:
     """
     Reads the content of a specified CSV file.
@@ -120,13 +303,41 @@ def read_file(
     :type encoding:
         string
 
+    :param engine:
+        the parser engine to use, e.g. "pyarrow" for multithreaded parsing, or the pandas default if None.
+    :type engine:
+        string
+
 
     :returns:
         the retrieved columns, indexed by their timestamp
     :rtype:
         :class:`pandas.DataFrame`
     """
-    data = pd.read_csv(path, sep=separator, decimal=decimal, encoding=encoding)
+    data = _read_raw(path, separator=separator, decimal=decimal, encoding=encoding, engine=engine)
+    return _parse_data(data, index_column, index_type, timezone, rename)
+
+
+def _read_raw(
+    path: str,
+    separator: str = ",",
+    decimal: str = ".",
+    encoding: str = "utf-8-sig",
+    engine: Optional[str] = None,
+) -> pd.DataFrame:
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    # The compression of archived CSV files will be inferred by their suffix
+    return pd.read_csv(path, sep=separator, decimal=decimal, encoding=encoding, engine=engine)
+
+
+def _parse_data(
+    data: pd.DataFrame,
+    index_column: str = "Timestamp",
+    index_type: str = "Timestamp",
+    timezone: Optional[tz.tzinfo] = None,
+    rename: Optional[Mapping[str, str]] = None,
+) -> pd.DataFrame:
     if not data.empty:
         if index_column not in data.columns:
             if index_column.islower():
@@ -136,7 +347,7 @@ def read_file(
 
         if index_type.lower() in ["timestamp", "unix"]:
             if index_type.lower() == "timestamp":
-                data[index_column] = pd.to_datetime(data[index_column], utc=True)
+                data[index_column] = _parse_timestamps(data[index_column])
             elif index_type.lower() == "unix":
                 data[index_column] = pd.to_datetime(data[index_column], unit="ms")
             else:
@@ -165,12 +376,297 @@ def read_file(
 
     if rename:
         data = data.rename(columns=rename)
-        data.index.name = data.index.name.lower()
-    else:
+        if data.index.name is not None:
+            data.index.name = data.index.name.lower()
+    elif data.index.name is not None:
         data.index.name = data.index.name.title()
     return data
 
 
+def _parse_timestamps(timestamps: pd.Series) -> pd.Series:
+    if timestamps.dtype == object:
+        # Parsing timestamps with varying UTC offsets, e.g. across daylight saving time changes, falls back to a slow
+        # per element conversion. Parse the local time and the few distinct offsets separately instead.
+        codes, offsets = pd.factorize(timestamps.str[-6:])
+        offsets = [_OFFSET_PATTERN.fullmatch(o) for o in offsets]
+        if len(offsets) > 0 and all(offsets) and not (codes < 0).any():
+            offsets = np.array([(-1 if o[1] == "-" else 1) * (int(o[2]) * 60 + int(o[3])) for o in offsets])
+            try:
+                local = pd.to_datetime(timestamps.str[:-6])
+                return (local - pd.to_timedelta(offsets[codes], unit="min")).dt.tz_localize(tz.UTC)
+            except ValueError:
+                pass
+
+    # Timestamps may already be parsed with a coarser resolution by some engines
+    return pd.to_datetime(timestamps, utc=True).astype("datetime64[ns, UTC]")
+
+
+def read_tail(
+    path: str,
+    rows: int = 1,
+    index_column: str = "Timestamp",
+    index_type: str = "Timestamp",
+    timezone: Optional[tz.tzinfo] = None,
+    separator: str = ",",
+    decimal: str = ".",
+    rename: Optional[Mapping[str, str]] = None,
+    encoding: str = "utf-8-sig",
+) -> pd.DataFrame:
+    """
+    Reads only the last rows of a specified CSV file, by seeking backwards from the end of the file.
+    The cost of reading the latest values will not depend on the size of the file, as long as rows are ordered.
+
+    :param path:
+        the full path to the CSV file.
+    :type path:
+        string
+
+    :param rows:
+        the number of rows to read from the end of the file.
+    :type rows:
+        int
+
+
+    :returns:
+        the retrieved columns of the last rows, indexed by their timestamp
+    :rtype:
+        :class:`pandas.DataFrame`
+    """
+    if not path.endswith(".csv"):
+        # Compressed archives can not be read backwards
+        data = read_file(path, index_column, index_type, timezone, separator, decimal, rename, encoding)
+        return data.tail(rows)
+
+    with open(path, "rb") as file:
+        header = file.readline()
+        header_size = len(header)
+
+        file.seek(0, os.SEEK_END)
+        position = file.tell()
+        block = b""
+        # Read blocks backwards, until the requested number of complete lines after the header is available
+        while position > header_size and block.count(b"\n") <= rows:
+            size = min(TAIL_BLOCK_SIZE, position - header_size)
+            position -= size
+            file.seek(position)
+            block = file.read(size) + block
+
+    lines = block.splitlines()
+    if position > header_size:
+        # Drop the first line, as it may have been cut
+        lines = lines[1:]
+    lines = [line for line in lines if len(line.strip()) > 0][-rows:]
+
+    content = b"\n".join([header.rstrip(b"\r\n"), *lines, b""])
+    data = pd.read_csv(io.BytesIO(content), sep=separator, decimal=decimal, encoding=encoding)
+    return _parse_data(data, index_column, index_type, timezone, rename)
+
+
+def read_columns(path: str, separator: str = ",", encoding: str = "utf-8-sig") -> pd.Index:
+    """
+    Reads only the header of a specified CSV file.
+
+    :param path:
+        the full path to the CSV file.
+    :type path:
+        string
+
+
+    :returns:
+        the names of all columns of the file
+    :rtype:
+        :class:`pandas.Index`
+    """
+    if path.endswith(".parquet"):
+        # Read only the schema of the file, available with the 'parquet' extra
+        from pyarrow import parquet
+
+        return pd.Index(parquet.read_schema(path).names)
+    return pd.read_csv(path, sep=separator, encoding=encoding, nrows=0).columns
+
+
+def read_index(
+    path: str,
+    index_column: str = "Timestamp",
+    index_type: str = "Timestamp",
+    timezone: Optional[tz.tzinfo] = None,
+    separator: str = ",",
+    encoding: str = "utf-8-sig",
+    rows: Optional[int] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> pd.DatetimeIndex:
+    """
+    Reads only the index column of a specified CSV file.
+
+    :param path:
+        the full path to the CSV file.
+    :type path:
+        string
+
+    :param rows:
+        the number of rows to read from the start of the file, or all rows if None.
+    :type rows:
+        int
+
+    :param columns:
+        the columns of which at least one value needs to be valid for a row to be indexed, or all rows if None.
+    :type columns:
+        list of strings
+
+
+    :returns:
+        the parsed timestamps of the index column
+    :rtype:
+        :class:`pandas.DatetimeIndex`
+    """
+    if index_type is None or index_type.lower() not in ["timestamp", "unix"]:
+        raise ValueError(f"Unable to read index of type: {index_type}")
+
+    columns = list(columns) if columns is not None else []
+    if path.endswith(".parquet"):
+        data = pd.read_parquet(path)
+        index_column = _find_column(data.columns, index_column)
+        data = _drop_invalid(data[[index_column, *columns]], columns)
+        data = data.head(rows) if rows is not None else data
+    else:
+        header = pd.read_csv(path, sep=separator, encoding=encoding, nrows=0).columns
+        index_column = _find_column(header, index_column)
+        if len(columns) == 0:
+            data = pd.read_csv(path, sep=separator, encoding=encoding, usecols=[index_column], nrows=rows)
+        elif rows is None:
+            data = pd.read_csv(path, sep=separator, encoding=encoding, usecols=[index_column, *columns])
+            data = _drop_invalid(data, columns)
+        else:
+            # Read chunks until enough rows with valid values were found
+            chunks = []
+            with pd.read_csv(
+                path,
+                sep=separator,
+                encoding=encoding,
+                usecols=[index_column, *columns],
+                chunksize=INDEX_CHUNK_SIZE,
+            ) as reader:
+                for chunk in reader:
+                    chunks.append(_drop_invalid(chunk, columns))
+                    if sum(len(c) for c in chunks) >= rows:
+                        break
+            data = pd.concat(chunks).head(rows) if len(chunks) > 0 else pd.DataFrame(columns=[index_column])
+    if index_type.lower() == "timestamp":
+        index = pd.DatetimeIndex(_parse_timestamps(data[index_column]))
+    else:
+        index = pd.DatetimeIndex(pd.to_datetime(data[index_column], unit="ms"))
+
+    if timezone is not None:
+        if index.tzinfo is not None:
+            index = index.tz_convert(timezone)
+        else:
+            index = index.tz_localize(timezone, ambiguous="infer")
+    return index
+
+
+def _drop_invalid(data: pd.DataFrame, columns: Sequence[str]) -> pd.DataFrame:
+    if len(columns) == 0:
+        return data
+    return data.dropna(axis="index", how="all", subset=columns)
+
+
+def _find_column(columns: pd.Index, index_column: str) -> str:
+    if index_column not in columns:
+        if index_column.islower():
+            index_column = index_column.title()
+        else:
+            index_column = index_column.lower()
+    return index_column
+
+
+def archive_files(
+    index: CsvIndex,
+    archive: str,
+    end: Optional[TimestampType] = None,
+    **kwargs,
+) -> List[str]:
+    """
+    Archives all plain CSV files of an index, whose period closed before the specified end, or now by default.
+
+    :returns:
+        the paths of all archived files
+    :rtype:
+        list
+    """
+    end = to_date(end, index.timezone) if end is not None else pd.Timestamp.now(tz=index.timezone)
+    archives = []
+    for file in index.refresh():
+        if file.archived or file.end > end:
+            continue
+        archives.append(archive_file(file.path, archive, **kwargs))
+    return archives
+
+
+def archive_file(
+    path: str,
+    archive: str,
+    index_column: str = "Timestamp",
+    index_type: str = "Timestamp",
+    separator: str = ",",
+    decimal: str = ".",
+    encoding: str = "utf-8-sig",
+) -> str:
+    """
+    Compresses a CSV file with gzip or zstd, or converts it to Parquet, and removes the plain file.
+    Values of an already existing archive of the same period will be merged, if the file was written after archiving.
+
+    :param path:
+        the full path to the CSV file.
+    :type path:
+        string
+
+    :param archive:
+        the archive format, either "gzip", "zstd" or "parquet".
+    :type archive:
+        string
+
+
+    :returns:
+        the full path to the archive
+    :rtype:
+        string
+    """
+    if archive not in ARCHIVE_SUFFIXES:
+        raise ValueError(f"Unknown archive format: {archive}")
+    archive_path = path[: -len(".csv")] + ARCHIVE_SUFFIXES[archive]
+
+    def _read(_path: str) -> pd.DataFrame:
+        _data = _read_raw(_path, separator=separator, decimal=decimal, encoding=encoding)
+        if archive == "parquet" and index_type is not None and index_type.lower() == "timestamp" and not _data.empty:
+            # Store parsed timestamps, to avoid parsing them again when reading the archive
+            _column = _find_column(_data.columns, index_column)
+            _data[_column] = _parse_timestamps(_data[_column])
+        return _data
+
+    data = _read(path)
+    if os.path.isfile(archive_path):
+        data = pd.concat([_read(archive_path), data], axis="index", ignore_index=True)
+        column = _find_column(data.columns, index_column)
+        if index_type is not None and index_type.lower() in ["timestamp", "unix"] and column in data.columns:
+            index = data[column]
+            if index_type.lower() == "timestamp":
+                index = _parse_timestamps(index)
+            data = data.loc[~index.duplicated(keep="last")]
+            data = data.iloc[np.argsort(index[data.index].to_numpy(), kind="stable")]
+
+    archive_temp = archive_path + ".tmp"
+    if archive == "parquet":
+        data.to_parquet(archive_temp, index=False)
+    else:
+        data.to_csv(archive_temp, sep=separator, decimal=decimal, encoding=encoding, index=False, compression=archive)
+    os.replace(archive_temp, archive_path)
+    os.remove(path)
+
+    with _headers_lock:
+        _headers.pop(path, None)
+    return archive_path
+
+
 # noinspection PyShadowingBuiltins
 def write_files(
     data: pd.DataFrame,
@@ -196,7 +692,7 @@ def write_files(
     time_step = floor_date(data.index[0], freq=freq)
 
     def next_step() -> pd.Timestamp:
-        return floor_date(time_step + to_timedelta(freq), timezone=timezone, freq=freq)
+        return _next_date(time_step, freq, timezone)
 
     while time_step < data.index[-1]:
         time_next = next_step()
@@ -228,15 +724,32 @@ def write_file(
     elif data.index.tzinfo != timezone:
         data.index = data.index.tz_convert(timezone)
 
+    if rename:
+        columns = [rename.get(column, column) for column in data.columns]
+    else:
+        columns = list(data.columns)
+    index = data.index.name if data.index.name is not None else "timestamp"
+
     if not override and os.path.isfile(path):
-        index = data.index.name
+        if _is_appendable(path, data.index, index, columns):
+            if data.empty:
+                return
+            # New rows strictly after the last written timestamp can be appended, without reading the file
+            header = _headers[path]
+            data = data.rename(columns=rename) if rename else data.copy()
+            data = data.reindex(columns=list(header.columns))
+            data.index.name = header.index
+            data.to_csv(path, sep=separator, decimal=decimal, encoding=encoding, mode="a", header=False)
+            _update_header(path, data, header.columns)
+            return
+
         csv = read_file(
             path,
             index_column=index,
             timezone=timezone,
             separator=separator,
             decimal=decimal,
-            rename={column: name for name, column in rename.items()} if not None else None,
+            rename={column: name for name, column in rename.items()} if rename is not None else None,
             encoding=encoding,
         )
 
@@ -252,6 +765,57 @@ def write_file(
         data.index.name = "timestamp"
 
     data.to_csv(path, sep=separator, decimal=decimal, encoding=encoding)
+    _update_header(path, data)
+
+
+class _CsvHeader:
+    index: str
+    columns: Tuple[str, ...]
+    last: Optional[pd.Timestamp]
+
+    # Modification time and size after the last write, to detect modifications by others
+    stat: Tuple[int, int]
+
+    def __init__(self, index: str, columns: Tuple[str, ...], last: Optional[pd.Timestamp], stat: Tuple[int, int]):
+        self.index = index
+        self.columns = columns
+        self.last = last
+        self.stat = stat
+
+
+# Header and last timestamp of files written by this process, to append new rows without reading the file again
+_headers: Dict[str, _CsvHeader] = {}
+_headers_lock = Lock()
+
+
+def _get_stat(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _is_appendable(path: str, index: pd.Index, index_name: str, columns: List[str]) -> bool:
+    with _headers_lock:
+        header = _headers.get(path, None)
+        if header is None or header.last is None:
+            return False
+        if header.stat != _get_stat(path):
+            del _headers[path]
+            return False
+    if header.index != index_name or not all(c in header.columns for c in columns):
+        return False
+    if len(index) == 0:
+        return True
+    return index.is_monotonic_increasing and index.is_unique and index[0] > header.last
+
+
+def _update_header(path: str, data: pd.DataFrame, columns: Optional[Tuple[str, ...]] = None) -> None:
+    if not isinstance(data.index, pd.DatetimeIndex):
+        return
+    if columns is None:
+        columns = tuple(data.columns)
+    last = data.index.max() if len(data.index) > 0 else None
+    with _headers_lock:
+        _headers[path] = _CsvHeader(data.index.name, columns, last, _get_stat(path))
 
 
 # noinspection PyShadowingBuiltins
@@ -290,19 +854,13 @@ def get_files(
                     end = to_date(end_str, timezone=timezone, format=f"{format}.csv")
                     end = ceil_date(end, timezone=timezone, freq=freq)
 
+        elif start is None:
+            return []
+
     date = floor_date(start, timezone=timezone, freq=freq)
 
-    # noinspection PyShadowingNames
     def next_date() -> pd.Timestamp:
-        next_date = floor_date(date + to_timedelta(freq), timezone=timezone, freq=freq)
-        if next_date == date:
-            next_date += to_timedelta(freq)
-            next_offset = date.utcoffset() - next_date.utcoffset()
-            if next_offset.seconds > 0:
-                next_date = floor_date(next_date + next_offset, timezone=timezone, freq=freq)
-            else:
-                ResourceException(f"Unable to increment date for freq '{freq}'")
-        return next_date
+        return _next_date(date, freq, timezone)
 
     files = []
     file = date.strftime(format) + ".csv"
@@ -322,3 +880,15 @@ def get_files(
     files.sort()
 
     return files
+
+
+def _next_date(date: pd.Timestamp, freq: str, timezone: Optional[TimezoneType] = None) -> pd.Timestamp:
+    next_date = floor_date(date + to_timedelta(freq), timezone=timezone, freq=freq)
+    if next_date == date:
+        next_date += to_timedelta(freq)
+        next_offset = date.utcoffset() - next_date.utcoffset()
+        if next_offset.seconds > 0:
+            next_date = floor_date(next_date + next_offset, timezone=timezone, freq=freq)
+        else:
+            ResourceException(f"Unable to increment date for freq '{freq}'")
+    return next_date
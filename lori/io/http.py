@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+lori.io.http
+~~~~~~~~~~~~
+
+
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from threading import Lock, get_ident
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# Response headers stored with cached responses, to revalidate and decode them
+CACHE_HEADERS = ["Content-Type", "Content-Encoding", "ETag", "Last-Modified", "Date"]
+
+
+class HttpSession(requests.Session):
+    """
+    Pooled HTTP session, to be shared by all connectors of the same provider.
+
+    Successful GET responses are cached on disk for a time to live, passed per request or configured for the session.
+    Expired responses are revalidated with their ETag and Last-Modified headers, to not transfer unchanged data again.
+    Identical requests, issued concurrently by several threads, are sent only once.
+
+    """
+
+    _sessions: Dict[Tuple[Any, ...], HttpSession] = {}
+    _sessions_lock: Lock = Lock()
+
+    cache_dir: Optional[Path]
+    ttl: float
+
+    _pending: Dict[str, Future]
+    _pending_lock: Lock
+
+    def __init__(
+        self,
+        cache_dir: Optional[str | Path] = None,
+        ttl: float = 0,
+        timeout: Optional[float] = None,
+        pool_size: int = 10,
+    ) -> None:
+        super().__init__()
+        self._logger = logging.getLogger(self.__module__)
+        self._pending = {}
+        self._pending_lock = Lock()
+
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.ttl = ttl
+        self.timeout = timeout
+
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    @classmethod
+    def get_shared(cls, name: str, **kwargs) -> HttpSession:
+        """
+        Get the session shared by the given name, e.g. of a data provider, and the passed arguments. Sessions of the
+        same name, but different settings like the time to live, are created separately and only share the cache
+        directory, if configured.
+
+        """
+        key = (name, *sorted(kwargs.items()))
+        with cls._sessions_lock:
+            session = cls._sessions.get(key)
+            if session is None:
+                session = cls(**kwargs)
+                cls._sessions[key] = session
+            return session
+
+    # noinspection PyShadowingBuiltins
+    def request(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Mapping[str, Any]] = None,
+        ttl: Optional[float] = None,
+        **kwargs,
+    ) -> requests.Response:
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        if method.upper() != "GET" or kwargs.get("stream", False):
+            return super().request(method, url, params=params, **kwargs)
+        if ttl is None:
+            ttl = self.ttl
+
+        key = _build_key(url, params, kwargs.get("headers"))
+        with self._pending_lock:
+            future = self._pending.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._pending[key] = future
+        if not leader:
+            self._logger.debug(f"Waiting for pending request of {url}")
+            return _copy_response(future.result())
+
+        try:
+            response = self._request_cached(key, url, params, ttl, **kwargs)
+            future.set_result(response)
+            return response
+
+        except BaseException as e:
+            future.set_exception(e)
+            raise e
+        finally:
+            with self._pending_lock:
+                del self._pending[key]
+
+    def _request_cached(
+        self,
+        key: str,
+        url: str,
+        params: Optional[Mapping[str, Any]],
+        ttl: float,
+        **kwargs,
+    ) -> requests.Response:
+        cached = self._read_cache(key)
+        if cached is not None:
+            metadata, content = cached
+            # Validate the age of responses with the time to live of each request, as they may be shared by sessions
+            if metadata.get("validated", 0) + ttl > time.time():
+                self._logger.debug(f"Using cached response of {url}")
+                return _build_response(url, metadata, content)
+
+            # Revalidate the expired response, to only receive the content again, if it was modified
+            headers = dict(kwargs.pop("headers", None) or {})
+            if "ETag" in metadata["headers"]:
+                headers["If-None-Match"] = metadata["headers"]["ETag"]
+            if "Last-Modified" in metadata["headers"]:
+                headers["If-Modified-Since"] = metadata["headers"]["Last-Modified"]
+            response = super().request("GET", url, params=params, headers=headers, **kwargs)
+            if response.status_code == 304:
+                self._logger.debug(f"Revalidated cached response of {url}")
+                metadata["validated"] = time.time()
+                self._write_cache(key, metadata)
+                return _build_response(url, metadata, content)
+        else:
+            response = super().request("GET", url, params=params, **kwargs)
+        response.from_cache = False
+
+        if response.status_code == 200 and (ttl > 0 or any(h in response.headers for h in ["ETag", "Last-Modified"])):
+            metadata = {
+                "url": url.split("?")[0],
+                "validated": time.time(),
+                "headers": {h: response.headers[h] for h in CACHE_HEADERS if h in response.headers},
+            }
+            self._write_cache(key, metadata, response.content)
+        return response
+
+    def _read_cache(self, key: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self.cache_dir.joinpath(f"{key}.json"), "r", encoding="utf-8") as metadata_file:
+                metadata = json.load(metadata_file)
+            with open(self.cache_dir.joinpath(f"{key}.body"), "rb") as content_file:
+                content = content_file.read()
+            return metadata, content
+
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache(self, key: str, metadata: Dict[str, Any], content: Optional[bytes] = None) -> None:
+        if self.cache_dir is None:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            if content is not None:
+                _write_atomic(self.cache_dir.joinpath(f"{key}.body"), content)
+            _write_atomic(self.cache_dir.joinpath(f"{key}.json"), json.dumps(metadata).encode("utf-8"))
+
+        except OSError as e:
+            self._logger.warning(f"Unable to cache response of {metadata['url']}: {e}")
+
+    def clear_cache(self) -> None:
+        if self.cache_dir is None or not self.cache_dir.is_dir():
+            return
+        for cache_file in self.cache_dir.iterdir():
+            if cache_file.suffix in [".json", ".body"]:
+                cache_file.unlink(missing_ok=True)
+
+
+def _build_key(url: str, params: Optional[Mapping[str, Any]], headers: Optional[Mapping[str, str]]) -> str:
+    # Only the hash of the request will be stored, as parameters may contain credentials like security tokens
+    request = [url, sorted((str(k), str(v)) for k, v in (params or {}).items())]
+    if headers:
+        request.append(sorted((str(k).lower(), str(v)) for k, v in headers.items()))
+    return hashlib.sha256(json.dumps(request).encode("utf-8")).hexdigest()
+
+
+def _build_response(url: str, metadata: Dict[str, Any], content: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.reason = "OK"
+    response.url = url
+    response.headers = CaseInsensitiveDict(metadata["headers"])
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response._content = content
+    response.from_cache = True
+    return response
+
+
+def _copy_response(response: requests.Response) -> requests.Response:
+    copy = requests.Response()
+    copy.__setstate__(response.__getstate__())
+    copy.from_cache = getattr(response, "from_cache", False)
+    return copy
+
+
+def _write_atomic(path: Path, content: bytes) -> None:
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.{get_ident()}.tmp")
+    with open(temp_path, "wb") as temp_file:
+        temp_file.write(content)
+    os.replace(temp_path, path)
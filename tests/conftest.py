@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+tests.conftest
+~~~~~~~~~~~~~~
+
+
+"""
+
+import pytest
+
+from lori import Configurations, Directories, Resource, Resources
+from lori.data.manager import DataManager
+
+
+@pytest.fixture
+def directories(tmp_path) -> Directories:
+    return Directories(data_dir=tmp_path, conf_dir=tmp_path, tmp_dir=tmp_path, log_dir=tmp_path, lib_dir=tmp_path)
+
+
+@pytest.fixture
+def manager(directories) -> DataManager:
+    return DataManager(Configurations("settings.conf", directories, {}), "test")
+
+
+@pytest.fixture
+def connect(manager, directories):
+    """
+    Configures and connects connectors of the passed type, which will be disconnected after the test.
+
+    """
+    connectors = []
+
+    def _connect(connector_type, key: str, resources: Resources, **configs):
+        configs = Configurations(f"{key}.conf", directories, {"key": key, **configs})
+        connector = connector_type(manager.connectors, configs=configs)
+        connector.configure(configs)
+        connector.connect(resources)
+        connectors.append(connector)
+        return connector
+
+    yield _connect
+    for connector in connectors:
+        connector.disconnect()
+
+
+def build_resources(group: str, count: int, **configs) -> Resources:
+    return Resources(
+        [Resource(id=f"{group}.c{i}", key=f"c{i}", group=group, type=float, **configs) for i in range(count)]
+    )
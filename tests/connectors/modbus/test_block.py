@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+tests.connectors.modbus.test_block
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+
+"""
+
+import pytest
+
+pytest.importorskip("pymodbus")
+
+from lori.connectors.modbus import ModbusRegister  # noqa: E402
+from lori.connectors.modbus.block import MAX_READ_LENGTH, ModbusBlock, build_blocks  # noqa: E402
+from lori.connectors.modbus.register import DataType  # noqa: E402
+
+
+# noinspection PyShadowingBuiltins
+def _build_registers(*addresses: int, device: int = 1, function: str = "holding_register", type=DataType.UINT16):
+    return [(f"r{a}", device, ModbusRegister(a, function, type)) for a in addresses]
+
+
+def _ranges(blocks):
+    return [(b.device, b.function, b.address, b.count) for b in blocks]
+
+
+def test_build_blocks_adjacent():
+    blocks = build_blocks(_build_registers(2, 0, 1, 3))
+    assert _ranges(blocks) == [(1, "holding_register", 0, 4)]
+    assert list(blocks[0].registers.keys()) == ["r0", "r1", "r2", "r3"]
+
+
+def test_build_blocks_gap():
+    registers = _build_registers(0, 1, 4, 10)
+    assert _ranges(build_blocks(registers)) == [
+        (1, "holding_register", 0, 2),
+        (1, "holding_register", 4, 1),
+        (1, "holding_register", 10, 1),
+    ]
+    assert _ranges(build_blocks(registers, gap=2)) == [(1, "holding_register", 0, 5), (1, "holding_register", 10, 1)]
+    assert _ranges(build_blocks(registers, gap=10)) == [(1, "holding_register", 0, 11)]
+
+
+def test_build_blocks_length():
+    registers = _build_registers(*range(0, 20, 2), type=DataType.UINT32)
+    assert [b.count for b in build_blocks(registers, length=8)] == [8, 8, 4]
+
+    registers = _build_registers(*range(0, 300))
+    assert [b.count for b in build_blocks(registers)] == [MAX_READ_LENGTH["holding_register"]] * 2 + [50]
+
+
+def test_build_blocks_by_device_and_function():
+    registers = [
+        *_build_registers(0, 1, device=1),
+        *_build_registers(2, 3, device=2),
+        *_build_registers(2, 3, device=1, function="input_register"),
+        *_build_registers(0, 1, device=1, function="coil"),
+    ]
+    assert _ranges(build_blocks(registers, gap=4)) == [
+        (1, "holding_register", 0, 2),
+        (2, "holding_register", 2, 2),
+        (1, "input_register", 2, 2),
+        (1, "coil", 0, 2),
+    ]
+
+
+def test_build_blocks_variable_length():
+    registers = [*_build_registers(0, 1), *_build_registers(2, type=DataType.STRING)]
+    blocks = build_blocks(registers)
+    assert [list(b.registers.keys()) for b in blocks] == [["r0", "r1"], ["r2"]]
+
+
+def test_block_extract():
+    block = build_blocks(_build_registers(0, 4, 5, type=DataType.UINT32), gap=2)[0]
+    assert block.count == 7
+    assert block.extract(list(range(7))) == {"r0": [0, 1], "r4": [4, 5], "r5": [5, 6]}
+
+
+def test_block_split():
+    block = build_blocks(_build_registers(0, 1, 4, 5, 6), gap=4)[0]
+    assert _ranges(block.split()) == [(1, "holding_register", 0, 2), (1, "holding_register", 4, 3)]
+
+    # Blocks of strictly adjacent registers are split into single registers
+    block = build_blocks(_build_registers(4, 5, 6))[0]
+    split = block.split()
+    assert all(isinstance(b, ModbusBlock) for b in split)
+    assert _ranges(split) == [
+        (1, "holding_register", 4, 1),
+        (1, "holding_register", 5, 1),
+        (1, "holding_register", 6, 1),
+    ]
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+tests.connectors.modbus.test_client
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+
+"""
+
+import pytest
+
+pytest.importorskip("pymodbus")
+
+from lori.connectors.modbus import ModbusRegister  # noqa: E402
+from lori.connectors.modbus.block import MAX_WRITE_LENGTH  # noqa: E402
+from lori.connectors.modbus.client import _merge_writes  # noqa: E402
+from lori.connectors.modbus.register import DataType  # noqa: E402
+
+
+def test_merge_writes_adjacent():
+    writes = _merge_writes(
+        [
+            (ModbusRegister(12, "holding_register", DataType.UINT32), [3, 4]),
+            (ModbusRegister(10, "holding_register", DataType.UINT32), [1, 2]),
+            (ModbusRegister(20, "holding_register", DataType.UINT16), [5]),
+            (ModbusRegister(0, "coil", DataType.BITS), [True]),
+            (ModbusRegister(1, "coil", DataType.BITS), [False]),
+        ]
+    )
+    assert writes == [
+        ("coil", 0, [True, False]),
+        ("holding_register", 10, [1, 2, 3, 4]),
+        ("holding_register", 20, [5]),
+    ]
+
+
+def test_merge_writes_length():
+    registers = [(ModbusRegister(a, "holding_register", DataType.UINT16), [a]) for a in range(200)]
+    writes = _merge_writes(registers)
+    assert [(w[1], len(w[2])) for w in writes] == [(0, MAX_WRITE_LENGTH["holding_register"]), (123, 77)]
+    assert [v for w in writes for v in w[2]] == list(range(200))
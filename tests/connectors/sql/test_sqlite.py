@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+tests.connectors.sql.test_sqlite
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+
+"""
+
+import pytest
+
+import numpy as np
+import pandas as pd
+from lori import Configurations, Directories, Resource, Resources
+from lori.data.util import hash_data
+
+pytest.importorskip("sqlalchemy")
+
+from lori.connectors.sql import SqlDatabase  # noqa: E402
+from lori.data.manager import DataManager  # noqa: E402
+
+
+@pytest.fixture
+def database(tmp_path):
+    dirs = Directories(data_dir=tmp_path, conf_dir=tmp_path, tmp_dir=tmp_path, log_dir=tmp_path, lib_dir=tmp_path)
+    manager = DataManager(Configurations("settings.conf", dirs, {}), "test")
+    configs = Configurations("sqlite.conf", dirs, {"key": "sqlite", "dialect": "sqlite"})
+    database = SqlDatabase(manager.connectors, configs=configs)
+    database.configure(configs)
+    yield database
+    database.disconnect()
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        [[1.0, 2.0, 3.0]],
+        [[1.5, np.nan, 3.0], [np.nan, np.nan, 2.0], [0.1, 1e-7, 1e12]],
+    ],
+)
+def test_hash_equals_hash_data(database, values):
+    resources = Resources([Resource(id=f"test.c{i}", key=f"c{i}", group="test", type=float) for i in range(3)])
+    index = pd.date_range("2024-01-01", periods=len(values), freq="1min", tz="UTC", name="timestamp")
+    data = pd.DataFrame(values, index=index, columns=resources.ids)
+
+    database.connect(resources)
+    database.write(data)
+    assert database.hash(resources, index[0], index[-1]) == hash_data(data)
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+tests.connectors.test_csv
+~~~~~~~~~~~~~~~~~~~~~~~~~
+
+
+"""
+
+import pytest
+
+import numpy as np
+import pandas as pd
+import pytz as tz
+from lori.connectors.csv import CsvDatabase
+from tests.conftest import build_resources
+
+
+@pytest.fixture
+def database(connect):
+    resources = build_resources("test", 2)
+    return connect(CsvDatabase, "csv", resources, freq="D"), resources
+
+
+def test_boundary_indexes_of_added_resource(database):
+    database, resources = database
+    first, added = resources
+
+    # The added resource is only available in files of the second and third day
+    index = pd.date_range("2024-01-01", "2024-01-03 23:00", freq="h", tz=tz.UTC)
+    data = pd.DataFrame({first.id: np.arange(len(index), dtype=float), added.id: np.nan}, index=index)
+    data.loc["2024-01-02 06:00":"2024-01-03 12:00", added.id] = 1.0
+    database.write(data.loc["2024-01-01", [first.id]])
+    database.write(data.loc["2024-01-02":])
+
+    assert database.read_first_index(resources) == index[0]
+    assert database.read_last_index(resources) == index[-1]
+    assert database.read_first_index(resources.filter(lambda r: r.id == first.id)) == index[0]
+    assert database.read_first_index(resources.filter(lambda r: r.id == added.id)) == index[30]
+    assert database.read_last_index(resources.filter(lambda r: r.id == added.id)) == index[60]
+
+
+def test_boundary_indexes_of_missing_resource(database):
+    database, resources = database
+    written, missing = resources
+
+    index = pd.date_range("2024-01-01", periods=24, freq="h", tz=tz.UTC)
+    database.write(pd.DataFrame({written.id: 1.0}, index=index))
+
+    missing = resources.filter(lambda r: r.id == missing.id)
+    assert database.read_first_index(missing) is None
+    assert database.read_last_index(missing) is None
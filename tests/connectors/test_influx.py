@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+tests.connectors.test_influx
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+
+"""
+
+import pytest
+
+import numpy as np
+import pandas as pd
+import pytz as tz
+from lori import Resource, Resources
+
+pytest.importorskip("influxdb_client")
+
+from lori.connectors.influx import _parse_csv, _to_line_protocol  # noqa: E402
+
+
+def test_to_line_protocol():
+    resources = Resources(
+        [
+            Resource(id="test.float", key="float", group="test", type=float),
+            Resource(id="test.int", key="int", group="test", type=int, field="count"),
+            Resource(id="test.bool", key="bool", group="test", type=bool),
+            Resource(id="test.str", key="str", group="test", type=str, column="text value"),
+        ]
+    )
+    index = pd.date_range("2024-01-01", periods=3, freq="1s", tz=tz.UTC)
+    data = pd.DataFrame(
+        {
+            "test.float": [0.1, np.nan, np.nan],
+            "test.int": np.array([1, 2, 3], dtype=np.int64),
+            "test.bool": [True, False, True],
+            "test.str": ['a "b"', None, "c,d"],
+        },
+        index=index,
+    )
+    timestamp = index[0].value
+
+    lines = _to_line_protocol(data, resources, "my measurement", "a,b")
+    assert lines == [
+        f'my\\ measurement,tag=a\\,b float=0.1,count=1i,bool=true,text\\ value="a \\"b\\"" {timestamp}',
+        f"my\\ measurement,tag=a\\,b count=2i,bool=false {timestamp + 1_000_000_000}",
+        f'my\\ measurement,tag=a\\,b count=3i,bool=true,text\\ value="c,d" {timestamp + 2_000_000_000}',
+    ]
+
+
+def test_to_line_protocol_missing():
+    resources = Resources([Resource(id="test.c0", key="c0", group="test", type=float)])
+    index = pd.date_range("2024-01-01", periods=3, freq="1min", tz=tz.UTC)
+    data = pd.DataFrame({"test.c0": [np.nan, 1e-7, np.inf]}, index=index)
+
+    assert _to_line_protocol(data, resources, "test", None) == [f"test c0=1e-07 {index[1].value}"]
+    assert _to_line_protocol(data.iloc[[0]], resources, "test", None) == []
+
+
+def test_parse_csv():
+    rows = [
+        ["#datatype", "string", "long", "dateTime:RFC3339", "double", "string", "string"],
+        ["", "result", "table", "_time", "_value", "_field", "_measurement"],
+        ["", "_result", "0", "2024-01-01T00:00:00Z", "1.5", "c0", "test"],
+        ["", "_result", "0", "2024-01-01T00:01:00Z", "", "c0", "test"],
+        [],
+        ["#datatype", "string", "long", "dateTime:RFC3339", "boolean", "string", "string", "string"],
+        ["", "result", "table", "_time", "_value", "_field", "_measurement", "tag"],
+        ["", "_result", "1", "2024-01-01T00:00:00Z", "true", "c1", "test", "a"],
+        ["", "_result", "1", "2024-01-01T00:01:00Z", "false", "c1", "test", "a"],
+    ]
+    data = _parse_csv(rows, ["_time", "_value", "_field", "tag"])
+
+    assert list(data.columns) == ["_time", "_value", "_field", "tag"]
+    assert len(data) == 4
+    assert (data["_time"] == pd.to_datetime(["2024-01-01 00:00", "2024-01-01 00:01"] * 2, utc=True)).all()
+    assert data["_value"].iloc[0] == 1.5
+    assert pd.isna(data["_value"].iloc[1])
+    assert data["_value"].iloc[2:].tolist() == [True, False]
+    assert data["_field"].tolist() == ["c0", "c0", "c1", "c1"]
+    assert data["tag"].tolist() == [None, None, "a", "a"]
+
+
+def test_parse_csv_empty():
+    data = _parse_csv([], ["_time", "_value"])
+    assert data.empty
+    assert list(data.columns) == ["_time", "_value"]
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+tests.connectors.test_parquet
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+
+"""
+
+import pytest
+
+import numpy as np
+import pandas as pd
+import pytz as tz
+from tests.conftest import build_resources
+
+pytest.importorskip("pyarrow")
+
+from lori.connectors.parquet import ParquetDatabase  # noqa: E402
+
+
+@pytest.fixture
+def database(connect):
+    resources = build_resources("test", 2)
+    return connect(ParquetDatabase, "parquet", resources, partition="day", row_group_size=6), resources
+
+
+@pytest.fixture
+def data(database):
+    _, resources = database
+    index = pd.date_range("2024-01-01", "2024-01-03 23:00", freq="h", tz=tz.UTC, name="timestamp")
+    data = pd.DataFrame(np.random.rand(len(index), 2), index=index, columns=resources.ids)
+    data.iloc[::5, 0] = np.nan
+    return data
+
+
+def _assert_frame_equal(result: pd.DataFrame, expected: pd.DataFrame) -> None:
+    expected = expected.copy()
+    expected.index = expected.index.tz_convert(result.index.tz)
+    pd.testing.assert_frame_equal(result, expected, check_names=False, check_freq=False)
+
+
+def test_partition_round_trip(database, data, tmp_path):
+    database, resources = database
+    database.write(data)
+
+    partitions = sorted(p.relative_to(tmp_path / "parquet").as_posix() for p in tmp_path.rglob("*.parquet"))
+    assert partitions == [f"group=test/year=2024/month=01/day=0{d}/data.parquet" for d in range(1, 4)]
+
+    result = database.read(resources, data.index[0], data.index[-1])
+    _assert_frame_equal(result, data)
+
+    # Ranges across partitions only read the selected rows
+    start, end = pd.Timestamp("2024-01-01 20:00", tz=tz.UTC), pd.Timestamp("2024-01-02 03:00", tz=tz.UTC)
+    result = database.read(resources, start, end)
+    _assert_frame_equal(result, data.loc[start:end])
+
+    # Rewriting a partition keeps values of other rows and columns
+    update = data.loc["2024-01-02", resources.ids[:1]] + 1
+    database.write(update)
+    result = database.read(resources, data.index[0], data.index[-1])
+    expected = data.copy()
+    expected.update(update)
+    _assert_frame_equal(result, expected)
+
+
+def test_boundary_indexes(database, data):
+    database, resources = database
+    database.write(data)
+
+    first = resources.filter(lambda r: r.id == resources.ids[0])
+    assert database.read_first_index(resources) == data.index[0]
+    assert database.read_last_index(resources) == data.index[-1]
+    assert database.read_first_index(first) == data.index[1]
+    assert database.exists(resources, data.index[0], data.index[-1])
+
+
+def test_delete(database, data, tmp_path):
+    database, resources = database
+    database.write(data)
+
+    # Deleting a whole partition removes its directory
+    database.delete(resources, pd.Timestamp("2024-01-01", tz=tz.UTC), pd.Timestamp("2024-01-01 23:59", tz=tz.UTC))
+    assert not (tmp_path / "parquet" / "group=test" / "year=2024" / "month=01" / "day=01").exists()
+    assert database.read_first_index(resources) == pd.Timestamp("2024-01-02", tz=tz.UTC)
+
+    # Deleting some columns only removes their values
+    first = resources.filter(lambda r: r.id == resources.ids[0])
+    database.delete(first, pd.Timestamp("2024-01-02", tz=tz.UTC), pd.Timestamp("2024-01-02 12:00", tz=tz.UTC))
+    result = database.read(resources, data.index[0], data.index[-1])
+    assert result.loc[:"2024-01-02 12:00", resources.ids[0]].isna().all()
+    assert (
+        result.loc["2024-01-02 13:00":, resources.ids[0]].notna().sum()
+        == data.loc["2024-01-02 13:00":, resources.ids[0]].notna().sum()
+    )
+    np.testing.assert_allclose(
+        result[resources.ids[1]].to_numpy(), data.loc["2024-01-02":, resources.ids[1]].to_numpy()
+    )
+    assert not database.exists(
+        first, pd.Timestamp("2024-01-02", tz=tz.UTC), pd.Timestamp("2024-01-02 12:00", tz=tz.UTC)
+    )
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+tests.connectors.test_ring
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+
+"""
+
+import pytest
+
+import numpy as np
+from lori.connectors.ring import RING_INDEX, Ring
+
+
+@pytest.fixture
+def ring(tmp_path) -> Ring:
+    return Ring(str(tmp_path.joinpath("test")), ["a", "b"], capacity=8)
+
+
+def _append(ring: Ring, index, columns=("a", "b")):
+    index = np.array(index, dtype=np.int64)
+    values = np.column_stack([index * (i + 1) for i in range(len(columns))]).astype(float)
+    ring.append(index, list(columns), values)
+
+
+def _index(ring: Ring):
+    return np.concatenate([s[RING_INDEX] for s in ring.segments()]).tolist() if len(ring) > 0 else []
+
+
+def test_wraparound(ring):
+    _append(ring, range(0, 6))
+    assert (ring.tail, ring.head) == (0, 6)
+    assert len(ring.segments()) == 1
+
+    _append(ring, range(6, 11))
+    assert len(ring) == ring.capacity
+    assert (ring.tail, ring.head) == (3, 11)
+    assert len(ring.segments()) == 2
+    assert _index(ring) == list(range(3, 11))
+    assert (ring.first(), ring.last()) == (3, 10)
+
+    # Appending more records than the capacity only keeps the latest
+    _append(ring, range(11, 31))
+    assert _index(ring) == list(range(23, 31))
+
+    selected = ring.select(25, 28)
+    assert np.concatenate([s[RING_INDEX] for s in selected]).tolist() == [25, 26, 27, 28]
+    assert np.concatenate([s["b"] for s in selected]).tolist() == [50.0, 52.0, 54.0, 56.0]
+
+
+def test_complement_last(ring):
+    _append(ring, [1, 2], columns=["a"])
+    _append(ring, [2, 3], columns=["b"])
+    records = np.concatenate(ring.segments())
+    assert records[RING_INDEX].tolist() == [1, 2, 3]
+    assert records["a"][:2].tolist() == [1.0, 2.0]
+    assert np.isnan(records["a"][2])
+    assert records["b"][1:].tolist() == [2.0, 3.0]
+
+
+def test_locate(ring):
+    _append(ring, range(0, 100, 10))
+    assert _index(ring) == list(range(20, 100, 10))
+
+    # Counters of timestamps are located across the wrapped segments
+    assert ring.locate(20) == ring.tail
+    assert ring.locate(50) == ring.tail + 3
+    assert ring.locate(50, side="right") == ring.tail + 4
+    assert ring.locate(55) == ring.tail + 4
+    assert ring.locate(0) == ring.tail
+    assert ring.locate(1000) == ring.head
+
+
+def test_truncate(ring):
+    _append(ring, range(0, 100, 10))
+
+    ring.truncate(tail=ring.locate(40))
+    assert _index(ring) == [40, 50, 60, 70, 80, 90]
+    ring.truncate(head=ring.locate(80))
+    assert _index(ring) == [40, 50, 60, 70]
+
+    # Truncating is bounded by the retained records
+    ring.truncate(tail=0, head=ring.head + 10)
+    assert _index(ring) == [40, 50, 60, 70]
+
+    # Appending after truncating the head overwrites the truncated records
+    _append(ring, [75, 85])
+    assert _index(ring) == [40, 50, 60, 70, 75, 85]
+
+    ring.truncate(tail=ring.head)
+    assert len(ring) == 0
+    assert ring.first() is None
+    assert ring.segments() == []
+
+
+def test_reopen(ring):
+    _append(ring, range(0, 11))
+    ring.flush()
+
+    reopened = Ring(ring.path, ["a", "b"], capacity=8)
+    assert _index(reopened) == list(range(3, 11))
+
+    # Rings with a changed capacity or additional columns are migrated, retaining the latest records
+    migrated = Ring(ring.path, ["a", "b", "c"], capacity=4)
+    assert migrated.columns == ["a", "b", "c"]
+    assert _index(migrated) == list(range(7, 11))
+    assert np.isnan(np.concatenate(migrated.segments())["c"]).all()
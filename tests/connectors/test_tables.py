@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+tests.connectors.test_tables
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+
+"""
+
+import pytest
+
+import numpy as np
+import pandas as pd
+from tests.conftest import build_resources
+
+pytest.importorskip("tables")
+
+from lori.connectors.tables import HDFDatabase  # noqa: E402
+
+
+@pytest.fixture
+def database(connect):
+    resources = build_resources("test", 2)
+    database = connect(HDFDatabase, "hdf", resources)
+    return database, resources
+
+
+@pytest.fixture
+def data(database):
+    _, resources = database
+    index = pd.date_range("2024-01-01", "2024-01-03 23:00", freq="h", tz="UTC")
+    return pd.DataFrame(np.random.rand(len(index), 2), index=index, columns=resources.ids)
+
+
+def test_boundary_indexes_after_resampling_range(database, data):
+    database, resources = database
+    database.write(data)
+
+    # Delete a range and write its resampled values, like the retention of data does
+    day = data.loc["2024-01-01"]
+    database.delete(resources, day.index[0], day.index[-1])
+    database.write(day.resample("6h").mean())
+
+    assert database.read_first_index(resources) == data.index[0]
+    assert database.read_last_index(resources) == data.index[-1]
+
+    result = database.read(resources, data.index[0], data.index[-1])
+    assert result.index.is_monotonic_increasing
+    assert len(result) == 4 + 48
+
+
+def test_delete_range_of_some_columns(database, data):
+    database, resources = database
+    database.write(data)
+
+    deleted = resources.filter(lambda r: r.key == "c0")
+    database.delete(deleted, data.index[10], data.index[19])
+
+    result = database.read(resources, data.index[0], data.index[-1])
+    assert result["test.c0"].iloc[10:20].isna().all()
+    assert result["test.c0"].drop(result.index[10:20]).notna().all()
+    np.testing.assert_allclose(result["test.c1"].to_numpy(), data["test.c1"].to_numpy())
+    assert database.read_first_index(resources) == data.index[0]
+    assert database.read_last_index(resources) == data.index[-1]
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+tests.data.test_vintages
+~~~~~~~~~~~~~~~~~~~~~~~~
+
+
+"""
+
+import pytest
+
+import numpy as np
+import pandas as pd
+import pytz as tz
+
+pytest.importorskip("pyarrow")
+
+from lori.data.vintages import Vintages  # noqa: E402
+
+
+@pytest.fixture
+def vintages(tmp_path) -> Vintages:
+    return Vintages(tmp_path, horizon="2D")
+
+
+def _forecast(issue: str, values, periods: int = 24) -> pd.DataFrame:
+    index = pd.date_range(pd.Timestamp(issue).ceil("D"), periods=periods, freq="h", tz=tz.UTC)
+    return pd.DataFrame({"power": values}, index=index)
+
+
+def test_read_as_of(vintages):
+    first = _forecast("2024-01-01 06:00", np.arange(24, dtype=float))
+    second = first.copy()
+    second.iloc[12:, 0] += 100
+
+    assert vintages.write(first, issue="2024-01-01 06:00+00:00") == 24
+    # Only changed values will be stored
+    assert vintages.write(second, issue="2024-01-01 18:00+00:00") == 12
+    assert vintages.write(second, issue="2024-01-01 20:00+00:00") == 0
+    assert len(vintages.issues()) == 2
+
+    start, end = first.index[0], first.index[-1]
+    pd.testing.assert_frame_equal(
+        vintages.read(start, end, as_of="2024-01-01 12:00+00:00"), first, check_names=False, check_freq=False
+    )
+    pd.testing.assert_frame_equal(
+        vintages.read(start, end, as_of="2024-01-01 18:00+00:00"), second, check_names=False, check_freq=False
+    )
+    pd.testing.assert_frame_equal(vintages.read(start, end), second, check_names=False, check_freq=False)
+    assert vintages.read(start, end, as_of="2024-01-01 00:00+00:00").empty
+
+
+def test_missing_values_kept(vintages):
+    first = _forecast("2024-01-01 06:00", 1.0)
+    second = first.copy()
+    second.iloc[:6, 0] = np.nan
+    second.iloc[6:, 0] = 2.0
+
+    vintages.write(first, issue="2024-01-01 06:00+00:00")
+    vintages.write(second, issue="2024-01-01 12:00+00:00")
+
+    data = vintages.read(first.index[0], first.index[-1])
+    assert data["power"].iloc[:6].tolist() == [1.0] * 6
+    assert data["power"].iloc[6:].tolist() == [2.0] * 18
+
+
+def test_partitions_across_days(vintages, tmp_path):
+    for day in range(1, 6):
+        issue = f"2024-01-0{day} 06:00+00:00"
+        vintages.write(_forecast(issue, float(day), periods=48), issue=issue)
+    assert len(list(tmp_path.glob("issue=*.parquet"))) == 5
+
+    # Read again from disk, with partitions exceeding the cache
+    vintages = Vintages(tmp_path, horizon="2D")
+    data = vintages.read("2024-01-04 00:00+00:00", "2024-01-04 23:00+00:00", as_of="2024-01-03 12:00+00:00")
+    assert data["power"].tolist() == [3.0] * 24
+    assert data.index[0] == pd.Timestamp("2024-01-04", tz=tz.UTC)
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+tests.io.test_http
+~~~~~~~~~~~~~~~~~~
+
+
+"""
+
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+import pytest
+
+from lori.io.http import HttpSession
+
+ETAG = '"v1"'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+
+    # noinspection PyShadowingBuiltins
+    def log_message(self, format, *args) -> None:
+        pass
+
+    # noinspection PyPep8Naming
+    def do_GET(self) -> None:
+        if self.headers.get("If-None-Match") == ETAG:
+            self.server.hits["revalidated"] += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.server.hits["requests"] += 1
+        # Respond slowly, to let concurrent requests for the same resource wait for the pending one
+        time.sleep(0.2)
+        body = self.path.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", ETAG)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.hits = Counter()
+
+
+@pytest.fixture
+def server():
+    server = _Server()
+    Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def url(server) -> str:
+    return f"http://127.0.0.1:{server.server_port}/values"
+
+
+def test_concurrent_requests_sent_once(server, url, tmp_path):
+    session = HttpSession(cache_dir=tmp_path, ttl=60)
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        responses = list(executor.map(lambda _: session.get(url, params={"day": 1}), range(5)))
+
+    assert server.hits["requests"] == 1
+    assert all(r.status_code == 200 and r.text == "/values?day=1" for r in responses)
+
+
+def test_cached_within_ttl(server, url, tmp_path):
+    session = HttpSession(cache_dir=tmp_path, ttl=60)
+    first = session.get(url)
+    second = session.get(url)
+
+    assert server.hits["requests"] == 1
+    assert not first.from_cache
+    assert second.from_cache
+    assert second.text == first.text
+    assert second.headers["ETag"] == ETAG
+
+    # The time to live may be overridden per request
+    session.get(url, ttl=0)
+    assert server.hits["revalidated"] == 1
+
+
+def test_revalidated_with_etag(server, url, tmp_path):
+    session = HttpSession(cache_dir=tmp_path, ttl=0)
+    first = session.get(url)
+    second = session.get(url)
+
+    assert server.hits["requests"] == 1
+    assert server.hits["revalidated"] == 1
+    assert second.status_code == 200
+    assert second.from_cache
+    assert second.text == first.text
+
+
+def test_shared_by_settings(tmp_path):
+    session = HttpSession.get_shared("test", cache_dir=tmp_path, ttl=60, timeout=10)
+    try:
+        assert HttpSession.get_shared("test", timeout=10, ttl=60, cache_dir=tmp_path) is session
+
+        other = HttpSession.get_shared("test", cache_dir=tmp_path, ttl=3600, timeout=10)
+        assert other is not session
+        assert other.ttl == 3600
+        assert session.ttl == 60
+    finally:
+        HttpSession._sessions.clear()